@@ -0,0 +1,497 @@
+"""Benchmark of AFINN matching engines."""
+
+from __future__ import absolute_import, division, print_function
+
+"""
+# ------------------------------------------------------------------------------------------------
+
+Compares the throughput (characters per second) of the 'trie' and 're' matching engines
+of AfinnWords on a synthetic corpus of Finnish-like comments.
+The comments are built from the word forms of the Finnish AFINN lexicon and from common
+Finnish function words, so that about every sixth word is a lexicon hit.
+
+The 're' engine is measured on a smaller part of the corpus ('--re-docs'),
+as it is about two orders of magnitude slower. Throughput is a rate, so the
+numbers are comparable. Match results of both engines are compared on that part.
+
+Usage (from the AFINN-Classification folder):
+
+    python -m AFINNfin.AFINN_benchmark --docs 1000000
+
+With '--suite' the benchmark measures AfinnWords, AfinnEmoticons and AfinnEmojis
+under each combination of their flags (see SUITE_FLAGS):
+    - construction time, without cache ('cold') and from the cache ('cached')
+    - throughput of find_all over the comments and of bulk scoring (score_many),
+      in chars/s and docs/s, the best of '--repeat' runs
+    - peak memory of construction and of bulk scoring, measured with tracemalloc
+      in separate runs (Python allocations, including NumPy arrays)
+
+The comments also contain emoticons and emojis of the lexicons ('--emoticon-rate',
+'--emoji-rate'). Emojis are written as demojized names (':thumbs_up:'), as in the notebooks,
+and as raw emojis for the graphemes flag of AfinnEmojis. The graphemes flag is skipped
+without the 'emoji' package. The corpus is the same in every run with the same seed
+and rates, so results saved with '--output' can be compared with '--compare':
+
+    python -m AFINNfin.AFINN_benchmark --suite --docs 20000 --output before.json
+    python -m AFINNfin.AFINN_benchmark --suite --docs 20000 --output after.json
+    python -m AFINNfin.AFINN_benchmark --compare before.json after.json
+
+# ------------------------------------------------------------------------------------------------
+"""
+
+import argparse
+import itertools
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from os.path import dirname, join
+
+import numpy as np
+
+from . import AFINN_emojis
+from .AFINN_scores import LANGUAGE_TO_FILENAME, AfinnEmojis, AfinnEmoticons, AfinnWords
+
+FILLER_WORDS = (
+    'ja', 'on', 'se', 'että', 'mutta', 'kun', 'tämä', 'sitä', 'niin', 'kuin',
+    'oli', 'ei', 'ole', 'vaan', 'myös', 'minä', 'sinä', 'hän', 'me', 'te', 'he',
+    'nyt', 'sitten', 'vielä', 'jo', 'kyllä', 'tai', 'jos', 'vain', 'mitä',
+    )
+
+FILLER_ENDINGS = ('', '', 'ssa', 'lla', 'ko', 'kin', 'han')
+
+CLASSES = {
+    'AfinnWords': AfinnWords,
+    'AfinnEmoticons': AfinnEmoticons,
+    'AfinnEmojis': AfinnEmojis,
+    }
+
+# Flag combinations of the suite: engine and word_boundary for all classes,
+# and the lexicon flags of each class
+SUITE_FLAGS = {
+    'AfinnWords': [
+        {},
+        {'stems': True},
+        {'obfuscation': True},
+        ],
+    'AfinnEmoticons': [
+        {},
+        {'emoticons': True},
+        {'emoticons': True, 'emoticons_only': True},
+        ],
+    'AfinnEmojis': [
+        {},
+        {'emojis': True},
+        {'emojis': True, 'emojis_only': True},
+        {'emojis': True, 'graphemes': True},
+        {'emojis': True, 'emojis_only': True, 'graphemes': True},
+        ],
+    }
+
+ENGINES = ('trie', 're')
+
+
+def make_corpus(lexicon, n_docs, min_words=3, max_words=40, hit_rate=0.15, seed=0,
+                emoticons=None, emoticon_rate=0.0, emojis=None, emoji_rate=0.0):
+    """Return list of synthetic comments.
+    Parameters
+    ----------
+    lexicon : list of str
+        Lexicon tokens used as hits.
+    n_docs : int
+        Number of comments.
+    min_words, max_words : int, optional
+        Range of the number of words in a comment.
+    hit_rate : float, optional
+        Probability of a word to be taken from the lexicon.
+    seed : int, optional
+        Seed for the random number generator.
+    emoticons : list of str, optional
+        Emoticons added after words.
+    emoticon_rate : float, optional
+        Probability of an emoticon after a word.
+    emojis : list of str, optional
+        Emojis added after words, e.g. demojized names or raw emojis.
+    emoji_rate : float, optional
+        Probability of an emoji after a word.
+    Returns
+    -------
+    docs : list of str
+        Comments
+    Notes
+    -----
+    The random numbers depend only on the lengths of the token lists, so
+    emoji lists of the same length in the same order (names and raw emojis)
+    give the same comments with the emojis written differently.
+    """
+    rng = random.Random(seed)
+    docs = []
+    for _ in range(n_docs):
+        words = []
+        for _ in range(rng.randint(min_words, max_words)):
+            if rng.random() < hit_rate:
+                words.append(rng.choice(lexicon))
+            else:
+                words.append(rng.choice(FILLER_WORDS) + rng.choice(FILLER_ENDINGS))
+            if emoticons and rng.random() < emoticon_rate:
+                words.append(rng.choice(emoticons))
+            if emojis and rng.random() < emoji_rate:
+                words.append(rng.choice(emojis))
+        docs.append(' '.join(words).capitalize() + rng.choice(('.', '!', '?', ' :)', '')))
+    return docs
+
+
+def read_lexicons(language='fin'):
+    """Return tokens of the word, emoticon and emoji lexicons of the DATA folder.
+    Parameters
+    ----------
+    language : str, optional
+        Language of the word lexicon.
+    Returns
+    -------
+    lexicons : dict
+        Lists of tokens keyed by 'words', 'emoticons' and 'emojis'
+    """
+    data_dir = join(dirname(__file__), 'DATA')
+    return dict(
+        (name, list(AfinnWords.read_word_file(join(data_dir, LANGUAGE_TO_FILENAME[key]))))
+        for name, key in (('words', language), ('emoticons', 'emoticons'), ('emojis', 'emojis')))
+
+
+def emoji_renderings(names):
+    """Return emojis of the lexicon as demojized names and as raw emojis.
+    Parameters
+    ----------
+    names : list of str
+        Lexicon names of emojis.
+    Returns
+    -------
+    demojized : list of str
+        Names between colons, e.g. ':thumbs_up:'.
+    raw : list of str or None
+        Emoji of each name, in the same order, or None without the 'emoji' package.
+        Names without an emoji are left out of both lists.
+    """
+    if AFINN_emojis.emoji is None:
+        return [':%s:' % name for name in names], None
+    sequences = {}
+    for sequence, name in sorted(AFINN_emojis.emoji_table(names).items()):
+        sequences.setdefault(name, sequence)
+    names = [name for name in names if name in sequences]
+    return [':%s:' % name for name in names], [sequences[name] for name in names]
+
+
+def run_engine(afinn, docs):
+    """Return matches and elapsed seconds of find_all over docs."""
+    start = time.perf_counter()
+    matches = [afinn.find_all(doc) for doc in docs]
+    return matches, time.perf_counter() - start
+
+
+def config_key(class_name, flags):
+    """Return name of a benchmark configuration, e.g. 'AfinnWords(engine=trie, stems=True)'."""
+    return '%s(%s)' % (class_name, ', '.join('%s=%s' % item for item in sorted(flags.items())))
+
+
+def suite_configs(classes=None, engines=ENGINES):
+    """Return list of (class name, flags) of the benchmark suite.
+    Parameters
+    ----------
+    classes : list of str, optional
+        Names of the benchmarked classes, default is all classes of SUITE_FLAGS.
+    engines : list of str, optional
+        Matching engines.
+    Returns
+    -------
+    configs : list of (str, dict)
+        Class names and constructor flags
+    """
+    configs = []
+    for class_name in classes or list(SUITE_FLAGS):
+        for engine, word_boundary, flags in itertools.product(
+                engines, (True, False), SUITE_FLAGS[class_name]):
+            configs.append((class_name, dict(flags, engine=engine, word_boundary=word_boundary)))
+    return configs
+
+
+def _rates(seconds, n_docs, n_chars):
+    return {
+        'seconds': seconds,
+        'docs_per_sec': n_docs / seconds if seconds else None,
+        'chars_per_sec': n_chars / seconds if seconds else None,
+        }
+
+
+def _peak_memory(function):
+    """Return result and peak traced memory (bytes) of a call."""
+    tracemalloc.start()
+    try:
+        result = function()
+        return result, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def benchmark_config(class_name, flags, docs, language='fin', repeat=3):
+    """Return measurements of one configuration.
+    Parameters
+    ----------
+    class_name : str
+        Name of the class in CLASSES.
+    flags : dict
+        Constructor flags.
+    docs : list of str
+        Comments.
+    language : str, optional
+        Language of the word lexicon.
+    repeat : int, optional
+        Number of runs, the fastest run is reported.
+    Returns
+    -------
+    result : dict
+        Construction times, throughput of find_all and score_many,
+        peak memory and number of matches
+    """
+    cls = CLASSES[class_name]
+
+    def construct(cache):
+        return cls(language=language, cache=cache, **flags)
+
+    start = time.perf_counter()
+    afinn = construct(False)
+    cold = time.perf_counter() - start
+    # First construction with cache saves the object to the cache
+    construct(True)
+    start = time.perf_counter()
+    construct(True)
+    cached = time.perf_counter() - start
+
+    n_docs = len(docs)
+    n_chars = sum(len(doc) for doc in docs)
+    find_all = score_many = None
+    for _ in range(repeat):
+        matches, elapsed = run_engine(afinn, docs)
+        find_all = elapsed if find_all is None else min(find_all, elapsed)
+        start = time.perf_counter()
+        results = afinn.score_many(docs)
+        elapsed = time.perf_counter() - start
+        score_many = elapsed if score_many is None else min(score_many, elapsed)
+
+    construction_memory = _peak_memory(lambda: construct(False))[1]
+    scoring_memory = _peak_memory(lambda: afinn.score_many(docs))[1]
+
+    return {
+        'class': class_name,
+        'flags': flags,
+        'key': config_key(class_name, flags),
+        'docs': n_docs,
+        'chars': n_chars,
+        'matches': sum(len(doc_matches) for doc_matches in matches),
+        'hit_docs': int(np.count_nonzero(results.hits)),
+        'construction': {'cold': cold, 'cached': cached},
+        'find_all': _rates(find_all, n_docs, n_chars),
+        'score_many': _rates(score_many, n_docs, n_chars),
+        'peak_memory': {'construction': construction_memory, 'score_many': scoring_memory},
+        }
+
+
+def run_suite(n_docs=20000, re_docs=2000, language='fin', classes=None, engines=ENGINES,
+              repeat=3, seed=0, min_words=3, max_words=40, hit_rate=0.15,
+              emoticon_rate=0.02, emoji_rate=0.02, log=None):
+    """Return benchmark results of the suite configurations.
+    Parameters
+    ----------
+    n_docs : int, optional
+        Number of comments for the 'trie' engine.
+    re_docs : int, optional
+        Number of comments for the 're' engine.
+    language : str, optional
+        Language of the word lexicon.
+    classes : list of str, optional
+        Names of the benchmarked classes, default is all.
+    engines : list of str, optional
+        Matching engines.
+    repeat : int, optional
+        Number of timed runs of each configuration.
+    seed : int, optional
+        Seed of the synthetic corpus.
+    min_words, max_words, hit_rate, emoticon_rate, emoji_rate : optional
+        Parameters of the synthetic corpus, see make_corpus.
+    log : callable, optional
+        Called with a line of text after each configuration, e.g. print.
+    Returns
+    -------
+    results : dict
+        Run metadata under 'meta' and a list of configuration results
+        under 'results'. Skipped configurations have the reason under 'skipped'.
+    """
+    lexicons = read_lexicons(language)
+    demojized, raw = emoji_renderings(lexicons['emojis'])
+    corpus = dict(lexicon=lexicons['words'], n_docs=n_docs, min_words=min_words,
+                  max_words=max_words, hit_rate=hit_rate, seed=seed,
+                  emoticons=lexicons['emoticons'], emoticon_rate=emoticon_rate,
+                  emoji_rate=emoji_rate)
+    docs = make_corpus(emojis=demojized, **corpus)
+    raw_docs = make_corpus(emojis=raw, **corpus) if raw is not None else None
+
+    results = []
+    for class_name, flags in suite_configs(classes, engines):
+        if flags.get('graphemes') and raw_docs is None:
+            results.append({'class': class_name, 'flags': flags,
+                            'key': config_key(class_name, flags),
+                            'skipped': "the 'emoji' package is not installed"})
+        else:
+            subset = raw_docs if flags.get('graphemes') else docs
+            if flags['engine'] == 're':
+                subset = subset[:re_docs]
+            results.append(benchmark_config(class_name, flags, subset, language=language,
+                                            repeat=repeat))
+        if log is not None:
+            log(format_result(results[-1]))
+
+    meta = {
+        'created': datetime.now(timezone.utc).isoformat(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'numpy': np.__version__,
+        'emoji': AFINN_emojis.EMOJI_VERSION,
+        'language': language,
+        'repeat': repeat,
+        'corpus': {
+            'docs': n_docs, 're_docs': re_docs, 'chars': sum(len(doc) for doc in docs),
+            'seed': seed, 'min_words': min_words, 'max_words': max_words,
+            'hit_rate': hit_rate, 'emoticon_rate': emoticon_rate, 'emoji_rate': emoji_rate,
+            },
+        }
+    return {'meta': meta, 'results': results}
+
+
+def format_result(result):
+    """Return one line of text of a configuration result."""
+    if 'skipped' in result:
+        return '%-75s skipped: %s' % (result['key'], result['skipped'])
+    return '%-75s cold %6.2f s  cached %6.3f s  %10.0f chars/s  %8.0f docs/s  %10.0f chars/s bulk' \
+        '  peak %6.1f MB' % (
+            result['key'], result['construction']['cold'], result['construction']['cached'],
+            result['find_all']['chars_per_sec'], result['find_all']['docs_per_sec'],
+            result['score_many']['chars_per_sec'],
+            max(result['peak_memory'].values()) / 2 ** 20)
+
+
+def compare(old, new):
+    """Return lines of text comparing the throughput of two suite results.
+    Parameters
+    ----------
+    old, new : dict
+        Results of run_suite, e.g. read from the JSON files of '--output'.
+    Returns
+    -------
+    lines : list of str
+        Throughput of find_all and score_many and their ratio (new / old)
+        of the configurations in both results, after a note if the corpora differ
+    """
+    lines = []
+    if old['meta']['corpus'] != new['meta']['corpus']:
+        lines.append('note: the corpora differ, %s and %s' % (
+            json.dumps(old['meta']['corpus']), json.dumps(new['meta']['corpus'])))
+    previous = dict((result['key'], result) for result in old['results']
+                    if 'skipped' not in result)
+    for result in new['results']:
+        before = previous.get(result['key'])
+        if before is None or 'skipped' in result:
+            continue
+        ratios = []
+        for measure in ('find_all', 'score_many'):
+            ratios.append(result[measure]['chars_per_sec'] / before[measure]['chars_per_sec'])
+        lines.append('%-75s find_all %10.0f -> %10.0f chars/s (%.2fx)  '
+                     'score_many %10.0f -> %10.0f chars/s (%.2fx)' % (
+                         result['key'],
+                         before['find_all']['chars_per_sec'], result['find_all']['chars_per_sec'],
+                         ratios[0],
+                         before['score_many']['chars_per_sec'],
+                         result['score_many']['chars_per_sec'], ratios[1]))
+    return lines
+
+
+def compare_engines(args):
+    """Compare the 'trie' and 're' engines of AfinnWords."""
+    n_docs = args.docs or 1000000
+    results = {}
+    for engine in ('trie', 're'):
+        start = time.perf_counter()
+        afinn = AfinnWords(language=args.language, engine=engine)
+        results[engine] = {'setup': time.perf_counter() - start, 'afinn': afinn}
+
+    docs = make_corpus(list(results['trie']['afinn']._dict), n_docs, seed=args.seed)
+    n_docs = {'trie': n_docs, 're': min(args.re_docs or 10000, n_docs)}
+
+    for engine in ('trie', 're'):
+        subset = docs[:n_docs[engine]]
+        matches, elapsed = run_engine(results[engine]['afinn'], subset)
+        n_chars = sum(len(doc) for doc in subset)
+        results[engine].update(matches=matches, elapsed=elapsed, chars=n_chars)
+        print('%-5s setup %6.2f s  docs %8d  chars %11d  time %8.2f s  %12.0f chars/s' % (
+            engine, results[engine]['setup'], len(subset), n_chars, elapsed, n_chars / elapsed))
+
+    n_same = n_docs['re']
+    same = results['trie']['matches'][:n_same] == results['re']['matches']
+    speedup = (results['trie']['chars'] / results['trie']['elapsed']) / (
+        results['re']['chars'] / results['re']['elapsed'])
+    print('identical matches on %d docs: %s' % (n_same, same))
+    print('speedup: %.1fx' % speedup)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--docs', type=int, default=None,
+                        help='number of comments for the trie engine '
+                             '(default 1000000, or 20000 with --suite)')
+    parser.add_argument('--re-docs', type=int, default=None,
+                        help='number of comments for the re engine '
+                             '(default 10000, or 2000 with --suite)')
+    parser.add_argument('--language', default='fin')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--suite', action='store_true',
+                        help='benchmark all classes and flag combinations')
+    parser.add_argument('--classes', nargs='+', choices=list(SUITE_FLAGS),
+                        help='classes of the suite (default all)')
+    parser.add_argument('--engines', nargs='+', choices=ENGINES, default=list(ENGINES),
+                        help='engines of the suite')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='timed runs of each configuration, the fastest is reported')
+    parser.add_argument('--min-words', type=int, default=3)
+    parser.add_argument('--max-words', type=int, default=40)
+    parser.add_argument('--hit-rate', type=float, default=0.15,
+                        help='probability of a word to be a lexicon word')
+    parser.add_argument('--emoticon-rate', type=float, default=0.02,
+                        help='probability of an emoticon after a word')
+    parser.add_argument('--emoji-rate', type=float, default=0.02,
+                        help='probability of an emoji after a word')
+    parser.add_argument('--output', help='JSON file for the results of the suite')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'),
+                        help='compare two JSON files of the suite')
+    args = parser.parse_args()
+
+    if args.compare:
+        old, new = [json.load(open(filename, encoding='utf-8')) for filename in args.compare]
+        for line in compare(old, new):
+            print(line)
+    elif args.suite:
+        results = run_suite(
+            n_docs=args.docs or 20000, re_docs=args.re_docs or 2000, language=args.language,
+            classes=args.classes, engines=args.engines, repeat=args.repeat, seed=args.seed,
+            min_words=args.min_words, max_words=args.max_words, hit_rate=args.hit_rate,
+            emoticon_rate=args.emoticon_rate, emoji_rate=args.emoji_rate, log=print)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(results, f, ensure_ascii=False, indent=2)
+    else:
+        compare_engines(args)
+
+
+if __name__ == '__main__':
+    main()
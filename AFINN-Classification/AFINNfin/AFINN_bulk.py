@@ -0,0 +1,223 @@
+"""Bulk scoring of many texts with AFINN classes."""
+
+from __future__ import absolute_import, division, print_function
+
+"""
+# ------------------------------------------------------------------------------------------------
+
+Scoring of a whole text collection (list, generator or pandas Series) at once.
+
+All documents are lowercased and joined into one text, which is matched with a single scan.
+The matches are mapped back to their documents with the document start offsets,
+so no Python lists are built per document.
+
+Per-match scores are returned in CSR-style layout:
+    - values[offsets[i]:offsets[i + 1]] are the scores of document i
+
+Per-document results are returned as contiguous NumPy arrays:
+    - score     sum of scores
+    - hits      number of matched lexicon tokens
+    - positive  sum of positive scores
+    - negative  sum of negative scores
+
+# ------------------------------------------------------------------------------------------------
+"""
+
+import re
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from . import AFINN_stats
+
+BulkScores = namedtuple('BulkScores', ['score', 'hits', 'positive', 'negative'])
+
+# Documents are joined with newline. Lexicon tokens are read line by line from
+# the data files, so a match can never cross a document border.
+_SEPARATOR = '\n'
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def prepare_texts(texts, clean_whitespace=True):
+    """Return list of lowercased texts as in find_all.
+    Parameters
+    ----------
+    texts : iterable of str
+        Texts, e.g. list or pandas Series.
+    clean_whitespace : bool, optional
+        Change multiple whitespaces to a single.
+    Returns
+    -------
+    texts : list of str
+        Lowercased texts
+    """
+    if clean_whitespace:
+        return [_WHITESPACE.sub(" ", text).lower() for text in texts]
+    return [text.lower() for text in texts]
+
+
+def match_many(afinn, texts, clean_whitespace=True, with_channels=False, with_spans=False):
+    """Return document indices and matched tokens for many texts.
+    Parameters
+    ----------
+    afinn : AfinnWords, AfinnEmoticons or AfinnEmojis
+        Sentiment analyzer.
+    texts : iterable of str
+        Texts, e.g. list or pandas Series.
+    clean_whitespace : bool, optional
+        Change multiple whitespaces to a single.
+    with_channels : bool, optional
+        Return also the matched channel of each match,
+        for matchers with named channels.
+    with_spans : bool, optional
+        Return also the joined text of the documents, and the offsets of the matches in it.
+    Returns
+    -------
+    n_docs : int
+        Number of documents.
+    doc_index : numpy.ndarray of int64
+        Document index of each match, in increasing order.
+    tokens : list of str
+        Matched tokens
+    channels : list of str
+        Matched channels, if with_channels is True.
+    text : str
+        Lowercased documents joined with newline, if with_spans is True.
+    starts, ends : numpy.ndarray of int64
+        Start and end offsets of the matches in text, if with_spans is True.
+    """
+    stats = getattr(afinn, 'stats', None)
+    if stats is not None:
+        start = time.perf_counter()
+    documents = prepare_texts(texts, clean_whitespace=clean_whitespace)
+    n_docs = len(documents)
+    lengths = np.fromiter(map(len, documents), dtype=np.int64, count=n_docs)
+    doc_starts = np.cumsum(lengths + 1) - (lengths + 1)
+
+    match_starts = []
+    match_ends = []
+    tokens = []
+    channels = []
+    text = _SEPARATOR.join(documents)
+    for match in afinn._pattern.finditer(text):
+        match_starts.append(match.start())
+        tokens.append(match.group())
+        if with_channels:
+            channels.append(match.lastgroup)
+        if with_spans:
+            match_ends.append(match.end())
+
+    match_starts = np.asarray(match_starts, dtype=np.int64)
+    doc_index = np.searchsorted(doc_starts, match_starts, side='right') - 1
+    if stats is not None:
+        matched = time.perf_counter()
+        stats.matching_time += matched - start
+        AFINN_stats.record_bulk(afinn, documents, doc_index, tokens,
+                                channels=channels if with_channels else None)
+        stats.instrumentation_time += time.perf_counter() - matched
+    result = (n_docs, doc_index, tokens)
+    if with_channels:
+        result += (channels,)
+    if with_spans:
+        result += (text, match_starts, np.asarray(match_ends, dtype=np.int64))
+    return result
+
+
+def scores_many(afinn, texts, clean_whitespace=True):
+    """Return per-match scores of many texts in CSR-style layout.
+    Parameters
+    ----------
+    afinn : AfinnWords, AfinnEmoticons, AfinnEmojis, AfinnCombined or AfinnMultiLabel
+        Sentiment analyzer.
+    texts : iterable of str
+        Texts, e.g. list or pandas Series.
+    clean_whitespace : bool, optional
+        Change multiple whitespaces to a single.
+    Returns
+    -------
+    offsets : numpy.ndarray of int64
+        Offsets of documents in values, length is number of texts + 1.
+    values : numpy.ndarray of int32
+        Scores of matched tokens
+    """
+    if getattr(afinn, 'schemes', None) is not None:
+        # AfinnMultiLabel matches the terms of its label scheme as a single-scheme analyzer
+        return afinn.scores_many(texts, clean_whitespace=clean_whitespace)
+    stats = getattr(afinn, 'stats', None)
+    dicts = getattr(afinn, '_dicts', None)
+    if dicts is not None and afinn._pattern.names:
+        # Tokens are scored from the dictionary of the matched channel, as in score
+        n_docs, doc_index, tokens, channels = match_many(
+            afinn, texts, clean_whitespace=clean_whitespace, with_channels=True)
+        if stats is not None:
+            start = time.perf_counter()
+        values = np.fromiter((dicts[channel][token] for channel, token in zip(channels, tokens)),
+                             dtype=np.int32, count=len(tokens))
+    else:
+        n_docs, doc_index, tokens = match_many(afinn, texts, clean_whitespace=clean_whitespace)
+        if stats is not None:
+            start = time.perf_counter()
+        values = np.fromiter(map(afinn._dict.__getitem__, tokens), dtype=np.int32,
+                             count=len(tokens))
+    offsets = np.zeros(n_docs + 1, dtype=np.int64)
+    np.cumsum(np.bincount(doc_index, minlength=n_docs), out=offsets[1:])
+    if stats is not None:
+        stats.aggregation_time += time.perf_counter() - start
+    return offsets, values
+
+
+def score_many(afinn, texts, clean_whitespace=True):
+    """Return per-document score sums of many texts.
+    Parameters
+    ----------
+    afinn : AfinnWords, AfinnEmoticons or AfinnEmojis
+        Sentiment analyzer.
+    texts : iterable of str
+        Texts, e.g. list or pandas Series.
+    clean_whitespace : bool, optional
+        Change multiple whitespaces to a single.
+    Returns
+    -------
+    scores : BulkScores
+        Named tuple of arrays: score (float64), hits (int64),
+        positive (float64) and negative (float64).
+    """
+    offsets, values = scores_many(afinn, texts, clean_whitespace=clean_whitespace)
+    stats = getattr(afinn, 'stats', None)
+    if stats is None:
+        return score_from_csr(offsets, values)
+    start = time.perf_counter()
+    scores = score_from_csr(offsets, values)
+    stats.aggregation_time += time.perf_counter() - start
+    return scores
+
+
+def score_from_csr(offsets, values):
+    """Return per-document score sums from CSR-style scores.
+    Parameters
+    ----------
+    offsets : numpy.ndarray of int
+        Offsets of documents in values.
+    values : numpy.ndarray
+        Scores of matched tokens.
+    Returns
+    -------
+    scores : BulkScores
+        Named tuple of arrays: score, hits, positive and negative.
+    """
+    n_docs = len(offsets) - 1
+    hits = np.diff(offsets)
+    doc_index = np.repeat(np.arange(n_docs), hits)
+    values = np.asarray(values, dtype=np.float64)
+
+    def doc_sum(weights):
+        return np.bincount(doc_index, weights=weights, minlength=n_docs).astype(np.float64)
+
+    return BulkScores(
+        score=doc_sum(values),
+        hits=hits,
+        positive=doc_sum(np.maximum(values, 0)),
+        negative=doc_sum(np.minimum(values, 0)),
+        )
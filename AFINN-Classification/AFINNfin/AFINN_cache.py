@@ -0,0 +1,145 @@
+"""Cache of compiled lexicons for AFINN classes."""
+
+from __future__ import absolute_import, division, print_function
+
+"""
+# ------------------------------------------------------------------------------------------------
+
+Setup of AFINN classes reads the lexicon files, builds the dictionary and compiles
+the matcher for ~10000 word forms. The built dictionary and matcher are cached:
+
+    - in a process-wide registry, so repeated constructions share the same objects
+    - on disk, so new processes (notebooks, worker processes) skip reading the lexicon
+      files and building the tries; matchers are pickled as regex source and flags and
+      compiled with re.compile on load, so cache files do not depend on the internals
+      of the regex engine
+
+Cache entries are keyed by the content of the lexicon files and the constructor flags.
+Edited lexicon files get a new key, and the old cache files can be removed with clear().
+
+The cache folder is '~/.cache/afinnfin', or the folder given in the environment
+variable AFINNFIN_CACHE_DIR.
+
+# ------------------------------------------------------------------------------------------------
+"""
+
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+from os.path import expanduser, join
+
+# Changed when the format of cached objects changes
+CACHE_VERSION = 9
+
+_REGISTRY = {}
+
+
+def cache_dir():
+    """Return folder of cache files."""
+    return os.environ.get('AFINNFIN_CACHE_DIR') or join(expanduser('~'), '.cache', 'afinnfin')
+
+
+def lexicon_key(name, filenames, **flags):
+    """Return cache key for lexicon files and constructor flags.
+    Parameters
+    ----------
+    name : str
+        Name of the AFINN class.
+    filenames : list of str
+        Full filenames of lexicon files.
+    flags : dict
+        Constructor flags.
+    Returns
+    -------
+    key : str
+        Hexadecimal hash
+    """
+    digest = hashlib.sha256()
+    digest.update(repr((CACHE_VERSION, name, sorted(flags.items()),
+                        sys.version_info[:2])).encode('UTF-8'))
+    for filename in filenames:
+        with open(filename, 'rb') as fid:
+            digest.update(hashlib.sha256(fid.read()).digest())
+    return digest.hexdigest()
+
+
+def _cache_filename(key):
+    return join(cache_dir(), key + '.pickle')
+
+
+def load(key):
+    """Return cached object, or None if not cached.
+    Parameters
+    ----------
+    key : str
+        Cache key from lexicon_key.
+    Returns
+    -------
+    value : object or None
+        Cached object
+    """
+    value = _REGISTRY.get(key)
+    if value is not None:
+        return value
+    try:
+        with open(_cache_filename(key), 'rb') as fid:
+            value = pickle.load(fid)
+    except Exception:
+        # Missing, unreadable or broken cache file is built again
+        return None
+    _REGISTRY[key] = value
+    return value
+
+
+def save(key, value):
+    """Store object to the registry and to the cache folder.
+    Failures to write the cache file (e.g. read-only file system) are ignored.
+    Parameters
+    ----------
+    key : str
+        Cache key from lexicon_key.
+    value : object
+        Object to be cached.
+    """
+    _REGISTRY[key] = value
+    directory = cache_dir()
+    try:
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_filename = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    except OSError:
+        return
+    # Write to a temporary file first, so that concurrent processes
+    # never read a partially written cache file
+    try:
+        with os.fdopen(fd, 'wb') as fid:
+            pickle.dump(value, fid, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_filename, _cache_filename(key))
+    except OSError:
+        try:
+            os.remove(temp_filename)
+        except OSError:
+            pass
+
+
+def clear(disk=True):
+    """Clear the registry and optionally the cache files.
+    Parameters
+    ----------
+    disk : bool, optional
+        Remove also the cache files.
+    """
+    _REGISTRY.clear()
+    if not disk:
+        return
+    try:
+        filenames = os.listdir(cache_dir())
+    except OSError:
+        return
+    for filename in filenames:
+        if filename.endswith('.pickle') or filename.endswith('.tmp'):
+            try:
+                os.remove(join(cache_dir(), filename))
+            except OSError:
+                pass
@@ -0,0 +1,221 @@
+"""Lexicon-based classification with AFINN classes."""
+
+from __future__ import absolute_import, division, print_function
+
+"""
+# ------------------------------------------------------------------------------------------------
+
+The AFINN notebooks map scores to labels in pandas, one label scheme at a time:
+
+    HS binary   sum of scores, 1 if the sum is positive, else 0
+    binary      mean of non-zero scores, 1 if the mean is positive or zero
+                (or there are no scores), -1 if negative
+    trinary     mean of non-zero scores (0 if there are no scores),
+    polarity    rounded away from zero: ceil of positive and floor of negative means
+
+AfinnClassifier scores texts with bulk scoring (see AFINN_bulk.py), and maps the sums and
+counts of non-zero scores to int8 labels of all label schemes in one vectorized step.
+With AfinnMultiLabel, the texts are matched once for all label schemes.
+
+The decision rule of each label scheme is a DecisionRule:
+    - statistic   'sum' or 'mean' (mean of non-zero scores)
+    - threshold   labels (below, above) the threshold, or for rounded labels,
+                  the half-width of the neutral band around zero
+    - labels      (below, above) labels, or None for rounding away from zero
+    - tie         label of statistics at the threshold (or in the neutral band)
+    - empty       label of texts without non-zero scores, or None to
+                  handle the statistic as zero
+
+# ------------------------------------------------------------------------------------------------
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+from . import AFINN_bulk
+
+DecisionRule = namedtuple('DecisionRule', ['statistic', 'threshold', 'labels', 'tie', 'empty'])
+
+# Decision rules of the AFINN notebooks
+DECISION_RULES = {
+    'HS_binary': DecisionRule(statistic='sum', threshold=0.0, labels=(0, 1), tie=0, empty=None),
+    'binary': DecisionRule(statistic='mean', threshold=0.0, labels=(-1, 1), tie=1, empty=None),
+    'trinary': DecisionRule(statistic='mean', threshold=0.0, labels=None, tie=0, empty=None),
+    'polarity': DecisionRule(statistic='mean', threshold=0.0, labels=None, tie=0, empty=None),
+    }
+
+
+def apply_rule(rule, sums, counts):
+    """Return labels of a label scheme from score sums.
+    Parameters
+    ----------
+    rule : DecisionRule
+        Decision rule of the label scheme.
+    sums : numpy.ndarray
+        Sum of scores of each text.
+    counts : numpy.ndarray
+        Number of non-zero scores of each text.
+    Returns
+    -------
+    labels : numpy.ndarray of int8
+        Label of each text
+    Examples
+    --------
+    >>> apply_rule(DECISION_RULES['trinary'], np.array([2., -1., 0.]), np.array([4, 2, 0]))
+    array([ 1, -1,  0], dtype=int8)
+    """
+    sums = np.asarray(sums, dtype=np.float64)
+    counts = np.asarray(counts)
+    if rule.statistic == 'mean':
+        statistic = np.divide(sums, counts, out=np.zeros_like(sums), where=counts > 0)
+    elif rule.statistic == 'sum':
+        statistic = sums
+    else:
+        raise ValueError('Unknown statistic %r' % (rule.statistic,))
+
+    threshold = rule.threshold
+    if rule.labels is None:
+        labels = np.where(statistic > threshold, np.ceil(statistic),
+                          np.where(statistic < -threshold, np.floor(statistic), rule.tie))
+    else:
+        below, above = rule.labels
+        labels = np.where(statistic > threshold, above,
+                          np.where(statistic < threshold, below, rule.tie))
+    labels = labels.astype(np.int8)
+    if rule.empty is not None:
+        labels[counts == 0] = rule.empty
+    return labels
+
+
+class AfinnClassifier(object):
+    """Lexicon-based classifier for label schemes.
+       ----------
+       Texts are scored with an AFINN object, and the sum and number of
+       non-zero scores of each text are mapped to labels with the
+       decision rule of each label scheme (see DECISION_RULES).
+
+       With AfinnMultiLabel (default), all label schemes of the lexicon
+       are predicted from one match of the texts. Other AFINN objects
+       score one label scheme, given with the 'schemes' flag.
+    """
+
+    def __init__(self, afinn=None, schemes=None, rules=None):
+        """Setup classifier.
+        Parameters
+        ----------
+        afinn : AfinnMultiLabel, AfinnWords, AfinnEmoticons, AfinnEmojis or AfinnCombined, optional
+            Sentiment analyzer, default is AfinnMultiLabel().
+        schemes : tuple of str, optional
+            Label schemes to predict, default is all schemes of AfinnMultiLabel.
+            Other AFINN objects have one label scheme, default is 'polarity'.
+        rules : dict, optional
+            Decision rules by label scheme, replacing the rules of DECISION_RULES.
+        """
+        if afinn is None:
+            from .AFINN_scores import AfinnMultiLabel
+            afinn = AfinnMultiLabel()
+        self.afinn = afinn
+        self._multilabel = hasattr(afinn, 'schemes')
+
+        if schemes is None:
+            schemes = afinn.schemes if self._multilabel else ('polarity',)
+        elif isinstance(schemes, str):
+            schemes = (schemes,)
+        self.schemes = tuple(schemes)
+        if self._multilabel:
+            self._columns = [afinn.schemes.index(scheme) for scheme in self.schemes]
+        elif len(self.schemes) != 1:
+            raise ValueError('AFINN objects other than AfinnMultiLabel score one label scheme')
+
+        self.rules = dict(DECISION_RULES)
+        if rules:
+            self.rules.update(rules)
+        missing = [scheme for scheme in self.schemes if scheme not in self.rules]
+        if missing:
+            raise ValueError('No decision rule for label schemes %r' % (missing,))
+
+    def score_counts(self, texts, clean_whitespace=True):
+        """Return sums and numbers of non-zero scores of many texts.
+        All texts are matched in one scan, see AFINN_bulk.py.
+        Parameters
+        ----------
+        texts : iterable of str
+            Texts to be classified, e.g. list or pandas Series.
+        clean_whitespace : bool, optional
+            Change multiple whitespaces to a single.
+        Returns
+        -------
+        sums : numpy.ndarray of float64
+            Sum of scores, one row per text and one column per label scheme
+        counts : numpy.ndarray of int64
+            Number of non-zero scores, one row per text and one column per label scheme
+        """
+        if self._multilabel:
+            # Each label scheme matches as its single-scheme analyzer, see AFINN_multilabel.py
+            offsets, rows = self.afinn.scores_all_many(texts, clean_whitespace=clean_whitespace)
+            rows = rows[:, self._columns]
+        else:
+            offsets, values = AFINN_bulk.scores_many(self.afinn, texts,
+                                                     clean_whitespace=clean_whitespace)
+            rows = values[:, np.newaxis]
+        n_docs = len(offsets) - 1
+        doc_index = np.repeat(np.arange(n_docs), np.diff(offsets))
+
+        sums = np.empty((n_docs, len(self.schemes)), dtype=np.float64)
+        counts = np.empty((n_docs, len(self.schemes)), dtype=np.int64)
+        for column in range(len(self.schemes)):
+            sums[:, column] = np.bincount(doc_index, weights=rows[:, column], minlength=n_docs)
+            counts[:, column] = np.bincount(doc_index[rows[:, column] != 0], minlength=n_docs)
+        return sums, counts
+
+    def labels(self, sums, counts):
+        """Return labels from score sums.
+        Parameters
+        ----------
+        sums : numpy.ndarray
+            Sum of scores, one row per text and one column per label scheme.
+        counts : numpy.ndarray
+            Number of non-zero scores, one row per text and one column per label scheme.
+        Returns
+        -------
+        labels : numpy.ndarray of int8
+            Labels, one row per text and one column per label scheme
+        """
+        sums = np.asarray(sums).reshape(-1, len(self.schemes))
+        counts = np.asarray(counts).reshape(-1, len(self.schemes))
+        labels = np.empty(sums.shape, dtype=np.int8)
+        for column, scheme in enumerate(self.schemes):
+            labels[:, column] = apply_rule(self.rules[scheme], sums[:, column], counts[:, column])
+        return labels
+
+    def predict(self, texts, scheme=None, clean_whitespace=True):
+        """Predict labels of many texts.
+        Parameters
+        ----------
+        texts : iterable of str
+            Texts to be classified, e.g. list or pandas Series.
+        scheme : str, optional
+            Label scheme, default is all label schemes of the classifier.
+        clean_whitespace : bool, optional
+            Change multiple whitespaces to a single.
+        Returns
+        -------
+        labels : numpy.ndarray of int8
+            Label of each text for the label scheme, or with all label schemes,
+            one row per text and one column per label scheme
+        Examples
+        --------
+        >>> classifier = AfinnClassifier()
+        >>> classifier.schemes
+        ('HS_binary', 'binary', 'trinary', 'polarity')
+        >>> classifier.predict(['Vitun pelle :)', 'Hyvä päivä'])
+        array([[ 1,  1, -1, -1],
+               [ 0,  1,  1,  2]], dtype=int8)
+        >>> classifier.predict(['Vitun pelle :)', 'Hyvä päivä'], scheme='polarity')
+        array([-1,  2], dtype=int8)
+        """
+        labels = self.labels(*self.score_counts(texts, clean_whitespace=clean_whitespace))
+        if scheme is None:
+            return labels
+        return labels[:, self.schemes.index(scheme)]
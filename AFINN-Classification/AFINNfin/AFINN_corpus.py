@@ -0,0 +1,190 @@
+"""Scoring of newline-delimited corpus files with AFINN classes."""
+
+from __future__ import absolute_import, division, print_function
+
+"""
+# ------------------------------------------------------------------------------------------------
+
+Corpus-scale runs export one comment per line. Reading the lines to Python strings,
+and cleaning whitespace and lowercasing each of them in find_all, allocates three
+strings per document before matching starts.
+
+score_file memory-maps the UTF-8 file and scores it in blocks of whole lines:
+    - each block is decoded and lowercased as one string, and whitespace runs other
+      than newlines are changed to single spaces on the code points of the block in
+      NumPy; the block is then the lines as in score_many, cleaned as in find_all
+      (leading and trailing whitespace kept as one space) and joined with newline
+    - the block is matched with the pattern of the AFINN object in one scan, and
+      the matches are mapped to their lines with searchsorted of the line start
+      offsets (the offsets of the newlines of the block)
+No string is built per line. Per-line scores are written to preallocated NumPy arrays,
+line by line in the order of the file. Memory use depends on the block size, not on the
+file size.
+
+The scores are the same as from score_many for the lines of the file.
+
+# ------------------------------------------------------------------------------------------------
+"""
+
+import mmap
+
+import numpy as np
+
+from . import AFINN_bulk
+
+_NEWLINE = ord('\n')
+_SPACE = ord(' ')
+
+# Code points of whitespace other than newline, as matched by \s in find_all
+# (all whitespace characters of Unicode are below U+3001)
+_WHITESPACE = np.array([code for code in range(0x3001) if chr(code).isspace() and code != _NEWLINE],
+                       dtype=np.uint32)
+
+
+def count_lines(buffer):
+    """Return number of lines in a buffer of newline-delimited text."""
+    n_lines = 0
+    size = len(buffer)
+    for start in range(0, size, 1 << 26):
+        block = np.frombuffer(buffer, dtype=np.uint8, count=min(1 << 26, size - start),
+                              offset=start)
+        n_lines += int(np.count_nonzero(block == _NEWLINE))
+    if size and buffer[size - 1] != _NEWLINE:
+        # Last line without newline
+        n_lines += 1
+    return n_lines
+
+
+def score_file(afinn, filename, block_size=1 << 24, errors='replace'):
+    """Score each line of a UTF-8 text file.
+    The file is memory-mapped and scored in blocks of whole lines.
+    Parameters
+    ----------
+    afinn : AfinnWords, AfinnEmoticons, AfinnEmojis, AfinnCombined or AfinnMultiLabel
+        Sentiment analyzer.
+    filename : str
+        UTF-8 text file, one document per line.
+    block_size : int, optional
+        Approximate number of bytes scored at a time.
+    errors : str, optional
+        Handling of invalid UTF-8, see bytes.decode.
+    Returns
+    -------
+    scores : AFINN_bulk.BulkScores
+        Named tuple of arrays with one element per line: score (float64),
+        hits (int64), positive (float64) and negative (float64).
+    Examples
+    --------
+    >>> from AFINNfin.AFINN_scores import AfinnWords
+    >>> afinn = AfinnWords(language='fin')
+    >>> score_buffer(afinn, b'Vitun\\tpelle!\\n\\n  Ihana  p\\xc3\\xa4iv\\xc3\\xa4 ').score
+    array([-4.,  0.,  4.])
+    """
+    with open(filename, 'rb') as fid:
+        try:
+            buffer = mmap.mmap(fid.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty file cannot be mapped
+            buffer = b''
+    try:
+        return score_buffer(afinn, buffer, block_size=block_size, errors=errors)
+    finally:
+        if isinstance(buffer, mmap.mmap):
+            buffer.close()
+
+
+def _clean_lines(text):
+    """Return text with whitespace runs of each line changed to single spaces, and the
+    offsets of the lines in it.
+    """
+    codes = np.frombuffer(text.encode('UTF-32-LE'), dtype=np.uint32)
+    whitespace = np.isin(codes, _WHITESPACE)
+    if whitespace.any():
+        # Whitespace after whitespace is dropped, the rest is changed to space
+        keep = ~whitespace
+        keep[1:] |= ~whitespace[:-1]
+        keep[0] = True
+        codes = np.where(whitespace, np.uint32(_SPACE), codes)[keep]
+        text = codes.tobytes().decode('UTF-32-LE')
+    return text, np.concatenate([[0], np.flatnonzero(codes == _NEWLINE) + 1])
+
+
+def score_buffer(afinn, buffer, block_size=1 << 24, errors='replace'):
+    """Score each line of UTF-8 text in a buffer (bytes or mmap).
+    Parameters
+    ----------
+    afinn : AfinnWords, AfinnEmoticons, AfinnEmojis, AfinnCombined or AfinnMultiLabel
+        Sentiment analyzer.
+    buffer : bytes or mmap.mmap
+        UTF-8 text, one document per line.
+    block_size : int, optional
+        Approximate number of bytes scored at a time.
+    errors : str, optional
+        Handling of invalid UTF-8, see bytes.decode.
+    Returns
+    -------
+    scores : AFINN_bulk.BulkScores
+        Named tuple of arrays with one element per line.
+    """
+    n_lines = count_lines(buffer)
+    score = np.zeros(n_lines, dtype=np.float64)
+    hits = np.zeros(n_lines, dtype=np.int64)
+    positive = np.zeros(n_lines, dtype=np.float64)
+    negative = np.zeros(n_lines, dtype=np.float64)
+
+    pattern = afinn._pattern
+    dicts = getattr(afinn, '_dicts', None) if pattern.names else None
+    size = len(buffer)
+    start = 0
+    first_line = 0
+    while start < size:
+        # Block of whole lines, without the newline of the last line
+        end = buffer.find(b'\n', min(start + block_size, size) - 1)
+        end = size if end < 0 else end + 1
+        text = buffer[start:end].decode('UTF-8', errors).lower()
+        if text.endswith('\n'):
+            text = text[:-1]
+        text, line_starts = _clean_lines(text)
+        n_block_lines = len(line_starts)
+
+        if getattr(afinn, 'schemes', None) is not None:
+            # Matches of the label scheme of AfinnMultiLabel, see AFINN_multilabel.py
+            match_starts, ends, ids, labeled, _ = afinn._matches(text)
+            match_lines = np.searchsorted(line_starts, match_starts, side='right') - 1
+            match_lines, ids, columns = afinn._column_matches(
+                text, match_starts, ends, ids, labeled, match_lines)
+            column = afinn.schemes.index(afinn.scheme)
+            match_lines = match_lines[columns[:, column]]
+            values = afinn._lexicon.scores[ids[columns[:, column]], column].astype(np.float64)
+        else:
+            match_starts = []
+            values = []
+            if dicts is not None:
+                # Tokens are scored from the dictionary of the matched channel, as in score
+                for match in pattern.finditer(text):
+                    match_starts.append(match.start())
+                    values.append(dicts[match.lastgroup][match.group()])
+            else:
+                word_dict = afinn._dict
+                for match in pattern.finditer(text):
+                    match_starts.append(match.start())
+                    values.append(word_dict[match.group()])
+            match_lines = np.searchsorted(
+                line_starts, np.asarray(match_starts, dtype=np.int64), side='right') - 1
+            values = np.asarray(values, dtype=np.float64)
+
+        if len(values):
+            lines_slice = slice(first_line, first_line + n_block_lines)
+
+            def line_sum(weights):
+                return np.bincount(match_lines, weights=weights, minlength=n_block_lines)
+
+            score[lines_slice] += line_sum(values)
+            hits[lines_slice] += np.bincount(match_lines, minlength=n_block_lines)
+            positive[lines_slice] += line_sum(np.maximum(values, 0))
+            negative[lines_slice] += line_sum(np.minimum(values, 0))
+
+        first_line += n_block_lines
+        start = end
+
+    return AFINN_bulk.BulkScores(score=score, hits=hits, positive=positive, negative=negative)
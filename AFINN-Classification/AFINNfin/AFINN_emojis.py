@@ -0,0 +1,354 @@
+"""Grapheme-based emoji matching for AFINN sentiment analysis."""
+
+from __future__ import absolute_import, division, print_function
+
+"""
+# ------------------------------------------------------------------------------------------------
+
+The emoji lexicons list emojis by their English names (e.g. 'thumbs_up', 'face_with_tears_of_joy'),
+and the notebooks change the emojis of text to names with emoji.demojize before scoring.
+Matching the names with the alternation regex of ~600 names misses emojis with skin tone
+modifiers, zero width joiner (ZWJ) sequences and variation selectors, when the exact
+sequence is not in the lexicon.
+
+EmojiMatcher matches the emojis of raw text instead:
+    - text is segmented into the extended grapheme clusters of emoji sequences (the emoji
+      rules of Unicode Standard Annex #29): a base character followed by variation selectors,
+      skin tone modifiers, keycap or tag characters, and ZWJ sequences of these,
+      and pairs of regional indicators (flags)
+    - each cluster is looked up from a hash table of emoji sequences to lexicon names,
+      built from the emoji data of the 'emoji' package
+    - a cluster missing from the table falls back to the sequence without skin tone
+      modifiers, then to the first emoji of a ZWJ sequence, e.g. '👊🏻' to 'oncoming_fist'
+      when 'oncoming_fist_light_skin_tone' is not listed
+    - clusters start only at the first characters of the listed emojis, so that letters
+      such as 'ä' and 'ö' are skipped by the regex engine; texts without these characters
+      are not scanned at all: the emojis from U+2000 on are checked with the largest
+      character of the text, and the few emojis starting below U+2000 (e.g. '©', '®' and
+      keycaps) one character at a time
+
+Matches are reported as the lexicon names, so the dictionaries of AfinnEmojis are used as such.
+
+The 'emoji' package is needed to build the table of emoji sequences (pip install emoji).
+
+# ------------------------------------------------------------------------------------------------
+"""
+
+import heapq
+import re
+from functools import lru_cache
+
+try:
+    import emoji
+except ImportError:
+    emoji = None
+
+EMOJI_VERSION = getattr(emoji, '__version__', None)
+
+VARIATION_SELECTORS = '\ufe0e\ufe0f'
+
+SKIN_TONES = ''.join(chr(code) for code in range(0x1f3fb, 0x1f400))
+
+ZWJ = '\u200d'
+
+# Characters extending the emoji of a grapheme cluster
+_EXTEND = VARIATION_SELECTORS + SKIN_TONES + '\u20e3' + ''.join(
+    chr(code) for code in range(0xe0020, 0xe0080))
+
+_EXTEND_CLASS = '[' + re.escape(_EXTEND) + ']'
+
+# Emoji joined to a ZWJ sequence, e.g. the female sign of 'woman_tipping_hand'
+_COMPONENT = '[^\\s' + re.escape(_EXTEND + ZWJ) + ']'
+
+# Checked after the first character of a cluster, which is not an extending character
+_NOT_EXTEND = '(?<![' + re.escape(_EXTEND + ZWJ) + '])'
+
+_REGIONAL_INDICATOR = '[\U0001f1e6-\U0001f1ff]'
+
+_VARIATION_TABLE = dict.fromkeys(map(ord, VARIATION_SELECTORS))
+
+_SKIN_TONE_TABLE = dict.fromkeys(map(ord, SKIN_TONES))
+
+# Emojis starting below this character are checked separately, before a scan of text
+_HIGH_START = '\u2000'
+
+
+def normalize(sequence):
+    """Return emoji sequence without variation selectors.
+    Parameters
+    ----------
+    sequence : str
+        Emoji sequence, e.g. a grapheme cluster.
+    Returns
+    -------
+    sequence : str
+        Sequence without variation selectors
+    """
+    return sequence.translate(_VARIATION_TABLE)
+
+
+def fallbacks(sequence):
+    """Return sequences tried for an emoji sequence, in order.
+    Parameters
+    ----------
+    sequence : str
+        Emoji sequence without variation selectors.
+    Returns
+    -------
+    sequences : list of str
+        The sequence, the sequence without skin tone modifiers and
+        the first emoji of a ZWJ sequence
+    Examples
+    --------
+    >>> fallbacks('\\U0001f44a\\U0001f3fb') == ['\\U0001f44a\\U0001f3fb', '\\U0001f44a']
+    True
+    """
+    sequences = [sequence]
+    untoned = sequence.translate(_SKIN_TONE_TABLE)
+    if untoned != sequence:
+        sequences.append(untoned)
+    if ZWJ in untoned:
+        sequences.append(untoned.split(ZWJ, 1)[0])
+    return sequences
+
+
+@lru_cache(maxsize=None)
+def _emoji_sequences():
+    """Return emoji sequences of lowercased names of the 'emoji' package.
+    The English name of a sequence comes before its aliases.
+    """
+    if emoji is None:
+        raise ImportError("Grapheme matching of emojis needs the 'emoji' package")
+    sequences = {}
+    for sequence, data in emoji.EMOJI_DATA.items():
+        names = [data['en']] + list(data.get('alias', []))
+        for priority, name in enumerate(names):
+            name = name.strip(':').lower()
+            sequences.setdefault(name, []).append((priority, normalize(sequence)))
+    return sequences
+
+
+def _char_set(chars):
+    """Return regex character set of characters, with ranges of consecutive characters.
+    Examples
+    --------
+    >>> _char_set('\u00a9\u00ae\u2600\u2601\u2602')
+    '[©®☀-☂]'
+    """
+    ranges = []
+    for char in sorted(set(chars)):
+        if ranges and ord(char) == ord(ranges[-1][1]) + 1:
+            ranges[-1][1] = char
+        else:
+            ranges.append([char, char])
+    return '[' + ''.join(re.escape(first) if first == last else
+                         re.escape(first) + '-' + re.escape(last)
+                         for first, last in ranges) + ']'
+
+
+def emoji_table(names):
+    """Return hash table of emoji sequences to lexicon names.
+    Parameters
+    ----------
+    names : iterable of str
+        Lexicon names of emojis, e.g. 'thumbs_up'.
+    Returns
+    -------
+    table : dict
+        Lexicon names keyed by emoji sequences without variation selectors
+    """
+    sequences = _emoji_sequences()
+    best = {}
+    for name in names:
+        for priority, sequence in sequences.get(name, ()):
+            if sequence not in best or (priority, name) < best[sequence]:
+                best[sequence] = (priority, name)
+    return dict((sequence, name) for sequence, (priority, name) in best.items())
+
+
+class EmojiMatch(object):
+    """Match of a lexicon emoji, with the interface of regex match objects."""
+
+    __slots__ = ('_name', '_start', '_end', 'lastgroup')
+
+    def __init__(self, name, start, end, lastgroup=None):
+        self._name = name
+        self._start = start
+        self._end = end
+        self.lastgroup = lastgroup
+
+    def group(self, *groups):
+        """Return the lexicon name of the matched emoji."""
+        return self._name
+
+    def start(self, *groups):
+        return self._start
+
+    def end(self, *groups):
+        return self._end
+
+    def span(self, *groups):
+        return self._start, self._end
+
+
+class EmojiMatcher(object):
+    """Emoji matcher with grapheme segmentation and table lookup.
+       ----------
+       The matcher has the interface of the matchers of AFINN_matcher.py.
+       Tokens of the matcher are lexicon names of emojis. The other channels
+       (e.g. words) are matched with a matcher of AFINN_matcher.py, and
+       the matches are merged in text order.
+    """
+
+    engine = 'graphemes'
+
+    def __init__(self, names, matcher=None, channel=0, table=None):
+        """Setup matcher.
+        Parameters
+        ----------
+        names : iterable of str
+            Lexicon names of emojis.
+        matcher : RegexMatcher or TrieMatcher, optional
+            Matcher of the other channels.
+        channel : int, optional
+            Index of the emoji channel for add_tokens.
+        table : dict, optional
+            Lexicon names keyed by emoji sequences, default is built from
+            the emoji data of the 'emoji' package.
+        """
+        self.names = list(names)
+        self.matcher = matcher
+        self.channel = channel
+        self._source_table = table
+        self._setup()
+
+    def _setup(self):
+        """Set table and cluster pattern of the names."""
+        if self._source_table is None:
+            table = emoji_table(self.names)
+        else:
+            names = set(self.names)
+            table = dict((normalize(sequence), name)
+                         for sequence, name in self._source_table.items() if name in names)
+        self.table = table
+        self._lookups = {}
+        if self.table:
+            # Only the first characters of the listed emojis start a cluster
+            starts = set(sequence[0] for sequence in self.table)
+            high_starts = [char for char in starts if char >= _HIGH_START]
+            self._first = min(high_starts) if high_starts else None
+            self._low_starts = ''.join(sorted(char for char in starts if char < _HIGH_START))
+            # The regex starts with a character set, so that the regex engine
+            # skips to the candidate characters without trying the cluster
+            self._pattern = re.compile(
+                _char_set(starts) + _NOT_EXTEND
+                + '(?:(?<=' + _REGIONAL_INDICATOR + ')' + _REGIONAL_INDICATOR
+                + '|' + _EXTEND_CLASS + '*(?:' + ZWJ + _COMPONENT + _EXTEND_CLASS + '*)*)')
+        else:
+            self._first = None
+            self._low_starts = ''
+            self._pattern = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_lookups'] = {}
+        return state
+
+    def lookup(self, cluster):
+        """Return lexicon name of a grapheme cluster.
+        Parameters
+        ----------
+        cluster : str
+            Grapheme cluster of text.
+        Returns
+        -------
+        name : str or None
+            Lexicon name of the emoji or of its fallback, or None.
+        """
+        try:
+            return self._lookups[cluster]
+        except KeyError:
+            pass
+        name = None
+        for sequence in fallbacks(normalize(cluster)):
+            name = self.table.get(sequence)
+            if name is not None:
+                break
+        self._lookups[cluster] = name
+        return name
+
+    def _has_starts(self, text):
+        """Return True, if a character of text can start a listed emoji.
+        Examples
+        --------
+        >>> matcher = EmojiMatcher(['copyright', 'thumbs_up'],
+        ...                        table={'\u00a9': 'copyright', '\U0001f44d': 'thumbs_up'})
+        >>> matcher._has_starts('hyvää päivää'), matcher._has_starts('(c) \u00a9 2023')
+        (False, True)
+        >>> matcher.findall('hyvää päivää \U0001f44d\U0001f3fd')
+        ['thumbs_up']
+        """
+        if self._first is not None and max(text) >= self._first:
+            return True
+        return any(char in text for char in self._low_starts)
+
+    def _emoji_matches(self, text):
+        if self._pattern is None or not text or not self._has_starts(text):
+            return
+        lookup = self.lookup
+        for match in self._pattern.finditer(text):
+            name = lookup(match.group())
+            if name is not None:
+                yield EmojiMatch(name, match.start(), match.end())
+
+    def finditer(self, text):
+        """Return iterator over match objects in text."""
+        if self.matcher is None:
+            return self._emoji_matches(text)
+        return heapq.merge(self.matcher.finditer(text), self._emoji_matches(text),
+                           key=lambda match: match.start())
+
+    def findall(self, text):
+        """Return list of matched tokens in text."""
+        if self.matcher is None:
+            return [match.group() for match in self._emoji_matches(text)]
+        return [match.group() for match in self.finditer(text)]
+
+    def add_tokens(self, tokens, channel=0):
+        """Add tokens to a channel.
+        Parameters
+        ----------
+        tokens : iterable of str
+            Tokens to be added, lexicon names for the emoji channel.
+        channel : int, optional
+            Index of the channel.
+        """
+        if channel != self.channel:
+            self.matcher.add_tokens(tokens, channel=channel)
+            return
+        existing = set(self.names)
+        self.names.extend(token for token in tokens if token and token not in existing)
+        self._setup()
+
+    def remove_tokens(self, tokens):
+        """Remove tokens from all channels.
+        Parameters
+        ----------
+        tokens : iterable of str
+            Tokens to be removed.
+        """
+        tokens = set(tokens)
+        if self.matcher is not None:
+            self.matcher.remove_tokens(tokens)
+        self.names = [name for name in self.names if name not in tokens]
+        self._setup()
+
+    def copy(self):
+        """Return copy of the matcher, which can be changed separately."""
+        matcher = self.__class__.__new__(self.__class__)
+        matcher.__dict__.update(self.__getstate__())
+        matcher.names = list(self.names)
+        matcher.table = dict(self.table)
+        if self.matcher is not None:
+            matcher.matcher = self.matcher.copy()
+        return matcher
@@ -0,0 +1,796 @@
+"""Matching engines for AFINN sentiment analysis."""
+
+from __future__ import absolute_import, division, print_function
+
+"""
+# ------------------------------------------------------------------------------------------------
+
+The original AFINN method matches text with one regular expression, where all
+lexicon tokens are joined into a single '(?:w1|w2|...)' alternation.
+Python's 're' engine tries every alternative at every text position,
+so the matching cost grows with the size of the lexicon (~10000 Finnish word forms).
+
+The 'trie' engine stores the lexicon tokens in a character trie, and compiles the trie
+into a nested regular expression, where the common prefixes of tokens are shared.
+At each text position only the branch of the trie that follows the text is tried,
+so the matching cost depends on the length of the matched text, not on the lexicon size.
+The scan itself runs in the C implementation of the 're' module.
+
+Both engines have the same matching semantics:
+    - the longest lexicon token is matched first,
+    - a shorter token is tried, when the word boundary after a longer token fails,
+    - lexicon channels (words, emoticons, emojis) are tried in the given order,
+    - word boundary '\\b' is used optionally for each channel.
+
+Edits (add_tokens, remove_tokens) do not compile the pattern of the whole lexicon again
+(~0.25 s for the Finnish word list, ~5 s with obfuscated variants). They are matched
+through an overlay:
+    - added tokens are compiled into a small side pattern with the same channels,
+    - removed tokens are kept in a set, and the compiled pattern is kept as such.
+Matches of the pattern and of the side pattern are merged in text order. This is exact,
+because the pattern (side pattern) has no match at the positions before its next match.
+Where the overlay alone does not decide the match (both patterns match at the same position,
+or the pattern matches a removed token, or a token that may be an obfuscated variant or
+stem match of a removed token), the match at that position is found from the current tokens:
+the longest substring in the token set for literal channels, and the regex of the tokens
+starting with the character at the position for obfuscated and stem channels (compiled once
+per character until the next edit). The pattern is compiled with the edits, when the overlay
+has more than OVERLAY_LIMIT tokens, or with compile(). The regex of each first-character
+branch of a trie is cached, so that compiling builds only the regexes of the changed branches
+again, before the joined regex is compiled with re.compile.
+
+Channels given as obfuscated channels match masked and leetspeak variants of their tokens
+(e.g. 'v.ttu' for 'vittu') instead of the tokens, see AFINN_obfuscation.py. A channel of
+the exact tokens is given before the obfuscated channel, so that exact matches take precedence.
+
+# ------------------------------------------------------------------------------------------------
+"""
+
+import re
+
+from .AFINN_stems import is_stem
+
+ENGINES = ('re', 'trie')
+
+# Number of added and removed tokens matched through the overlay, before the pattern
+# is compiled with the edits
+OVERLAY_LIMIT = 500
+
+# Marks the end of a token in a trie node. Tokens never contain the empty string as a character.
+_END = ''
+
+# Marks the end of a wildcard stem in a trie node, see AFINN_stems.py.
+# Two characters, so that it is never a character of a token.
+_STEM = '**'
+
+_MARKS = (_END, _STEM)
+
+
+def regex_from_tokens(tokens, word_boundary=True, stems=False):
+    r"""Return non-capturing alternation regex from list of tokens.
+    Parameters
+    ----------
+    tokens : List of str
+        List of tokens/words to form a regex
+    word_boundary : bool, optional
+        Add word boundary match to the regular expression
+    stems : bool, optional
+        Match 'stem*' tokens as wildcard stems, see AFINN_stems.py.
+    Returns
+    -------
+    regex : str
+        String with regular expression
+    Examples
+    --------
+    >>> regex_from_tokens(['good', 'bad'])
+    '\\b(?:good|bad)\\b'
+    """
+    tokens_ = sorted(tokens, key=lambda word: len(word), reverse=True)
+    if stems:
+        tokens_ = [re.escape(word[:-1]) + r'\w*' if is_stem(word) else re.escape(word)
+                   for word in tokens_]
+    else:
+        tokens_ = [re.escape(word) for word in tokens_]
+    regex = '(?:' + "|".join(tokens_) + ')'
+    if word_boundary:
+        regex = r"\b" + regex + r"\b"
+    return regex
+
+
+class Trie(object):
+    """Character trie over lexicon tokens."""
+
+    def __init__(self, tokens=(), stems=False):
+        """Setup trie from tokens.
+        Parameters
+        ----------
+        tokens : iterable of str, optional
+            Tokens to be added to the trie.
+        stems : bool, optional
+            Add 'stem*' tokens as wildcard stems, see AFINN_stems.py.
+        """
+        self._root = {}
+        self._size = 0
+        self.stems = stems
+        # Regexes of the branches of the root, keyed by the first character
+        self._branches = {}
+        for token in tokens:
+            self.add(token)
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, token):
+        path, mark = self._path(token)
+        node = self._find_node(path)
+        return node is not None and mark in node
+
+    def __iter__(self):
+        stack = [('', self._root)]
+        while stack:
+            prefix, node = stack.pop()
+            for char, child in node.items():
+                if char == _END:
+                    yield prefix
+                elif char == _STEM:
+                    yield prefix + '*'
+                else:
+                    stack.append((prefix + char, child))
+
+    def _path(self, token):
+        """Return characters and end mark of token."""
+        if self.stems and is_stem(token):
+            return token[:-1], _STEM
+        return token, _END
+
+    def copy(self):
+        """Return copy of the trie, which can be changed separately."""
+        trie = Trie(stems=self.stems)
+        trie._size = self._size
+        # Cached branches are not changed in place, only replaced
+        trie._branches = self._branches.copy()
+        stack = [(self._root, trie._root)]
+        while stack:
+            node, node_copy = stack.pop()
+            for char, child in node.items():
+                if char in _MARKS:
+                    node_copy[char] = True
+                else:
+                    node_copy[char] = {}
+                    stack.append((child, node_copy[char]))
+        return trie
+
+    def _find_node(self, token):
+        node = self._root
+        for char in token:
+            node = node.get(char)
+            if node is None:
+                return None
+        return node
+
+    def add(self, token):
+        """Add token to the trie.
+        Parameters
+        ----------
+        token : str
+            Token to be added. Empty tokens are ignored.
+        """
+        if not token:
+            return
+        path, mark = self._path(token)
+        node = self._root
+        for char in path:
+            node = node.setdefault(char, {})
+        if mark not in node:
+            node[mark] = True
+            self._size += 1
+            self._branches.pop(token[0], None)
+
+    def remove(self, token):
+        """Remove token from the trie.
+        Parameters
+        ----------
+        token : str
+            Token to be removed.
+        Returns
+        -------
+        removed : bool
+            True, if the token was in the trie.
+        """
+        chars, mark = self._path(token)
+        path = [self._root]
+        for char in chars:
+            node = path[-1].get(char)
+            if node is None:
+                return False
+            path.append(node)
+        if mark not in path[-1]:
+            return False
+        del path[-1][mark]
+        # Prune nodes left without tokens
+        for char, node, parent in zip(reversed(chars), reversed(path), reversed(path[:-1])):
+            if node:
+                break
+            del parent[char]
+        self._size -= 1
+        self._branches.pop(token[0], None)
+        return True
+
+    def _branch(self, char):
+        """Return regex of the root branch of the first character."""
+        branch = self._branches.get(char)
+        if branch is None:
+            branch = self._branches[char] = re.escape(char) + _node_to_regex(self._root[char])
+        return branch
+
+    def first_chars_regex(self):
+        """Return character set regex of the first characters of tokens."""
+        return '[' + ''.join(re.escape(char) for char in sorted(self._root)) + ']'
+
+    def to_regex(self, first=None):
+        r"""Return the trie as a non-capturing regular expression.
+        The longest token is tried first at every node, therefore the regex
+        has the same matching order as the alternation from regex_from_tokens.
+        Parameters
+        ----------
+        first : str, optional
+            Character of text, only the branch of tokens starting with it is included.
+            The regex matches the same as the whole trie at a position of this character.
+        Returns
+        -------
+        regex : str
+            String with regular expression
+        Examples
+        --------
+        >>> Trie(['good', 'goody', 'bad']).to_regex()
+        '(?:bad|good(?:y)?)'
+        >>> Trie(['good', 'goody', 'bad']).to_regex(first='g')
+        '(?:good(?:y)?)'
+        """
+        chars = sorted(self._root) if first is None else [first] if first in self._root else []
+        if not chars:
+            # Matches nothing
+            return '(?!)'
+        # Branches of the root are cached, so that only the branches changed
+        # by add and remove are built again
+        regexes, leaves = [], []
+        for char in chars:
+            child = self._root[char]
+            if len(child) == 1 and _END in child:
+                leaves.append(re.escape(char))
+            else:
+                regexes.append(self._branch(char))
+        regex = _join_regex(regexes, leaves, False)
+        if len(chars) == 1:
+            regex = '(?:' + regex + ')'
+        return regex
+
+def _node_to_regex(node):
+    """Return regex for the children of a trie node."""
+    leaves = []
+    branches = []
+    for char in sorted(node):
+        if char in _MARKS:
+            continue
+        child = node[char]
+        if len(child) == 1 and _END in child:
+            leaves.append(re.escape(char))
+        else:
+            branches.append(re.escape(char) + _node_to_regex(child))
+    return _join_regex(branches, leaves, _END in node, _STEM in node)
+
+
+def _join_regex(branches, leaves, optional, stem=False):
+    """Return regex of alternative branches and single character leaves."""
+    # Single characters ending a token are collected to a character set
+    if len(leaves) == 1:
+        branches.append(leaves[0])
+    elif leaves:
+        branches.append('[' + ''.join(leaves) + ']')
+    if stem:
+        # Rest of the word, tried after the longer tokens.
+        # Matches also the empty string, so the node is not optional.
+        branches.append(r'\w*')
+        optional = False
+
+    if len(branches) == 1 and not optional:
+        return branches[0]
+    regex = '(?:' + '|'.join(branches) + ')'
+    if optional:
+        # Greedy optional group keeps the longest match first
+        regex += '?'
+    return regex
+
+
+def _is_word_char(char):
+    # As '\w' of the regex engine
+    return char.isalnum() or char == '_'
+
+
+def _is_boundary(text, position):
+    """Return True, if '\\b' matches at a position of text."""
+    before = position > 0 and _is_word_char(text[position - 1])
+    after = position < len(text) and _is_word_char(text[position])
+    return before != after
+
+
+def longest_token_at(text, position, tokens, max_length, word_boundary=True):
+    """Return the longest token of a set at a position of text, as the regex of the tokens.
+    Parameters
+    ----------
+    text : str
+        Text, lowercased as for matching.
+    position : int
+        Position of text.
+    tokens : set of str
+        Literal tokens.
+    max_length : int
+        Length of the longest token.
+    word_boundary : bool, optional
+        Check word boundary before and after the token.
+    Returns
+    -------
+    token : str or None
+        Matched token, or None
+    Examples
+    --------
+    >>> tokens = {'hyvä', 'hyvää', 'hyvää päivää'}
+    >>> longest_token_at('hyvää päivänjatkoa', 0, tokens, 12)
+    'hyvää'
+    >>> longest_token_at('hyvääkin', 0, tokens, 12)
+    >>> longest_token_at('hyvääkin', 0, tokens, 12, word_boundary=False)
+    'hyvää'
+    """
+    if word_boundary and not _is_boundary(text, position):
+        return None
+    for stop in range(min(len(text), position + max_length), position, -1):
+        token = text[position:stop]
+        if token in tokens and (not word_boundary or _is_boundary(text, stop)):
+            return token
+    return None
+
+
+class TokenMatch(object):
+    """Match of a token resolved by the overlay, with the interface of regex match objects."""
+
+    __slots__ = ('_token', '_start', 'lastgroup')
+
+    def __init__(self, token, start, lastgroup=None):
+        self._token = token
+        self._start = start
+        self.lastgroup = lastgroup
+
+    def group(self, *groups):
+        """Return the matched token, or None for the groups of other channels."""
+        if groups and groups[0] not in (0, 1, self.lastgroup):
+            return None
+        return self._token
+
+    def start(self, *groups):
+        return self._start
+
+    def end(self, *groups):
+        return self._start + len(self._token)
+
+    def span(self, *groups):
+        return self._start, self.end()
+
+
+class RegexMatcher(object):
+    """Original AFINN matching with one alternation regex."""
+
+    engine = 're'
+
+    def __init__(self, channels, names=None, stem_channels=(), obfuscated_channels=()):
+        """Setup matcher.
+        Parameters
+        ----------
+        channels : list of (list of str, bool)
+            Lexicon tokens and word boundary flag for each channel,
+            in the order of matching precedence.
+        names : list of str, optional
+            Names of channels. The name of the matched channel is
+            available as 'lastgroup' of the match objects.
+        stem_channels : tuple of int, optional
+            Indices of channels, where 'stem*' tokens are wildcard stems
+            (see AFINN_stems.py).
+        obfuscated_channels : tuple of int, optional
+            Indices of channels matching obfuscated variants of the tokens
+            (see AFINN_obfuscation.py).
+        """
+        self.channels = [(list(tokens), word_boundary) for tokens, word_boundary in channels]
+        self.names = list(names) if names else None
+        self.stem_channels = tuple(stem_channels)
+        self.obfuscated_channels = tuple(obfuscated_channels)
+        self._compile()
+
+    def _compile(self):
+        """Compile pattern of the channels, and clear the overlay of edits."""
+        self._setup_pattern(self.join_channels(self.channel_regexes(), self.names))
+        self._clear_overlay()
+
+    def _clear_overlay(self):
+        self._added = [[] for _ in self.channels]
+        self._removed = set()
+        # Removed tokens of obfuscated or stem channels, whose matches are not the tokens
+        self._removed_special = False
+        self._side = None
+        self._token_sets = None
+        self._patterns_at = {}
+
+    def channel_regexes(self):
+        """Return list of regex strings for channels."""
+        from .AFINN_obfuscation import ObfuscationTrie
+
+        regexes = []
+        for n, (tokens, word_boundary) in enumerate(self.channels):
+            if n in self.obfuscated_channels:
+                regex = ObfuscationTrie(tokens).to_regex()
+                if word_boundary:
+                    regex = r"\b" + regex + r"\b"
+            elif tokens:
+                regex = regex_from_tokens(tokens, word_boundary=word_boundary,
+                                          stems=n in self.stem_channels)
+            else:
+                # The empty alternation would match the empty string
+                regex = '(?!)'
+            regexes.append(regex)
+        return regexes
+
+    @staticmethod
+    def join_channels(regexes, names=None):
+        """Return combined regex string from channel regexes.
+        The whole match is captured in group 1, or in a named group
+        for each channel, if names are given.
+        """
+        if names:
+            return '|'.join('(?P<%s>%s)' % (name, regex) for name, regex in zip(names, regexes))
+        return '(' + '|'.join(regexes) + ')'
+
+    def _setup_pattern(self, regex, flags=re.UNICODE):
+        """Set compiled pattern and its regex source from regex string."""
+        self._regex = regex
+        self._flags = flags
+        self.pattern = re.compile(regex, flags)
+
+    def __getstate__(self):
+        # Only the regex source and flags are pickled, and compiled again
+        # on load, so that cache files do not depend on the regex engine
+        state = self.__dict__.copy()
+        del state['pattern']
+        state['_token_sets'] = None
+        state['_patterns_at'] = {}
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.pattern = re.compile(self._regex, self._flags)
+        if '_added' not in state:
+            self._clear_overlay()
+
+    def add_tokens(self, tokens, channel=0):
+        """Add tokens to a channel, see the overlay of edits in the module documentation.
+        Parameters
+        ----------
+        tokens : iterable of str
+            Tokens to be added.
+        channel : int, optional
+            Index of the channel.
+        """
+        channel_tokens = self.channels[channel][0]
+        existing = set(channel_tokens)
+        added = []
+        for token in tokens:
+            if token and token not in existing:
+                channel_tokens.append(token)
+                existing.add(token)
+                added.append(token)
+        self._add_overlay(added, channel)
+
+    def remove_tokens(self, tokens):
+        """Remove tokens from all channels, see the overlay of edits in the module documentation.
+        Parameters
+        ----------
+        tokens : iterable of str
+            Tokens to be removed.
+        """
+        tokens = set(tokens)
+        removed = []
+        for n, (channel_tokens, word_boundary) in enumerate(self.channels):
+            kept = [token for token in channel_tokens if token not in tokens]
+            if len(kept) < len(channel_tokens):
+                removed.append((n, tokens.difference(kept).intersection(channel_tokens)))
+                self.channels[n] = (kept, word_boundary)
+        self._remove_overlay(removed)
+
+    def _add_overlay(self, tokens, channel):
+        """Add tokens to the side pattern of the overlay."""
+        self._token_sets = None
+        if tokens:
+            self._added[channel].extend(tokens)
+            self._update_overlay(side=True)
+
+    def _remove_overlay(self, removed):
+        """Add removed tokens of channels, list of (int, set of str), to the overlay."""
+        self._token_sets = None
+        changed = False
+        for channel, tokens in removed:
+            added = self._added[channel]
+            side_tokens = tokens.intersection(added)
+            if side_tokens:
+                added[:] = [token for token in added if token not in side_tokens]
+                changed = True
+            # Tokens of the compiled pattern
+            tokens = tokens - side_tokens
+            if tokens:
+                self._removed.update(tokens)
+                if channel in self.obfuscated_channels or channel in self.stem_channels:
+                    self._removed_special = True
+        if removed:
+            self._update_overlay(side=changed)
+
+    def _update_overlay(self, side):
+        """Compile the side pattern of the added tokens (if side is True),
+        or the pattern past OVERLAY_LIMIT.
+        """
+        if sum(map(len, self._added)) + len(self._removed) > OVERLAY_LIMIT:
+            self._compile()
+        elif side:
+            self._side = self.__class__(
+                [(list(tokens), word_boundary)
+                 for tokens, (_, word_boundary) in zip(self._added, self.channels)],
+                names=self.names, stem_channels=self.stem_channels,
+                obfuscated_channels=self.obfuscated_channels) if any(self._added) else None
+
+    @property
+    def has_overlay(self):
+        """True if edits are matched through the overlay, see the module documentation."""
+        return self._side is not None or bool(self._removed)
+
+    def _channel_sets(self):
+        """Return sets of the current tokens of channels, None for obfuscated and stem channels
+        (their matches are not the tokens as such), and the length of the longest token.
+        """
+        if self._token_sets is None:
+            self._patterns_at = {}
+            special = set(self.obfuscated_channels) | set(self.stem_channels)
+            sets = [None if n in special else set(tokens)
+                    for n, (tokens, _) in enumerate(self.channels)]
+            max_length = max((len(token) for tokens in sets if tokens for token in tokens),
+                             default=0)
+            self._token_sets = (sets, max_length)
+        return self._token_sets
+
+    def _channel_regex_at(self, channel, char):
+        """Return regex of the current tokens of an obfuscated or stem channel,
+        which matches the same as the channel at a position of the character.
+        """
+        tokens = self.channels[channel][0]
+        if channel in self.obfuscated_channels:
+            from .AFINN_obfuscation import ObfuscationTrie
+
+            # The trie of the channel is kept with the patterns (key of no character)
+            trie = self._patterns_at.get((channel, None))
+            if trie is None:
+                trie = self._patterns_at[(channel, None)] = ObfuscationTrie(tokens)
+            return trie.to_regex(first=char)
+        tokens = [token for token in tokens if token[0] == char]
+        return regex_from_tokens(tokens, word_boundary=False, stems=True) if tokens else '(?!)'
+
+    def _pattern_at(self, channel, char):
+        """Return compiled pattern of _channel_regex_at, kept until the next edit."""
+        key = (channel, char)
+        pattern = self._patterns_at.get(key)
+        if pattern is None:
+            regex = self._channel_regex_at(channel, char)
+            if self.channels[channel][1]:
+                regex = r"\b" + regex + r"\b"
+            pattern = self._patterns_at[key] = re.compile(regex, self._flags)
+        return pattern
+
+    def _match_at(self, text, position):
+        """Return match of the current tokens at a position of text, or None for no match.
+        As in the pattern, the first channel with a match gives the longest of its tokens
+        with the word boundaries of the channel. Obfuscated and stem channels are matched
+        with the regex of the tokens starting with the character at the position.
+        """
+        sets, max_length = self._channel_sets()
+        for n, (tokens, (_, word_boundary)) in enumerate(zip(sets, self.channels)):
+            if tokens is None:
+                match = self._pattern_at(n, text[position]).match(text, position)
+                token = match.group() if match is not None else None
+            else:
+                token = longest_token_at(text, position, tokens, max_length, word_boundary)
+            if token is not None:
+                return TokenMatch(token, position, self.names[n] if self.names else None)
+        return None
+
+    def _overlay_finditer(self, text):
+        """Return iterator over match objects of the pattern and the overlay."""
+        pattern = self.pattern
+        side = self._side.pattern if self._side is not None else None
+        removed = self._removed
+        sets = self._channel_sets()[0] if self._removed_special else None
+        position = 0
+        base = pattern.search(text)
+        other = side.search(text) if side is not None else None
+        while base is not None or other is not None:
+            if other is None or (base is not None and base.start() < other.start()):
+                start = base.start()
+                token = base.group()
+                if token in removed or (sets is not None and not any(
+                        tokens is not None and token in tokens for tokens in sets)):
+                    # Removed token, or a match of an obfuscated or stem channel
+                    match = self._match_at(text, start)
+                else:
+                    match = base
+            elif base is not None and base.start() == other.start():
+                start = base.start()
+                match = self._match_at(text, start)
+            else:
+                start = other.start()
+                match = other
+            if match is not None:
+                yield match
+                position = match.end()
+            else:
+                position = start + 1
+            if base is not None and base.start() < position:
+                base = pattern.search(text, position)
+            if other is not None and other.start() < position:
+                other = side.search(text, position)
+
+    def findall(self, text):
+        """Return list of matched tokens in text."""
+        if not self.has_overlay:
+            return self.pattern.findall(text)
+        if self.names:
+            names = self.names
+            return [tuple(match.group() if name == match.lastgroup else '' for name in names)
+                    for match in self._overlay_finditer(text)]
+        return [match.group() for match in self._overlay_finditer(text)]
+
+    def finditer(self, text):
+        """Return iterator over match objects in text."""
+        if not self.has_overlay:
+            return self.pattern.finditer(text)
+        return self._overlay_finditer(text)
+
+    def compile(self):
+        """Compile the pattern with the edits of the overlay."""
+        if self.has_overlay:
+            self._compile()
+
+    def copy(self):
+        """Return copy of the matcher, which can be changed separately."""
+        matcher = self.__class__.__new__(self.__class__)
+        matcher.__setstate__(self.__getstate__())
+        matcher.channels = [(list(tokens), word_boundary) for tokens, word_boundary in self.channels]
+        matcher._added = [list(tokens) for tokens in self._added]
+        matcher._removed = set(self._removed)
+        matcher._token_sets = None
+        return matcher
+
+
+class TrieMatcher(RegexMatcher):
+    """AFINN matching with a regex compiled from character tries."""
+
+    engine = 'trie'
+
+    @property
+    def tries(self):
+        """List of (Trie, bool) for each channel, built when first needed.
+        Obfuscated channels have an ObfuscationTrie.
+        """
+        if self.__dict__.get('_tries') is None:
+            from .AFINN_obfuscation import ObfuscationTrie
+
+            self._tries = [(ObfuscationTrie(tokens) if n in self.obfuscated_channels
+                            else Trie(tokens, stems=n in self.stem_channels), word_boundary)
+                           for n, (tokens, word_boundary) in enumerate(self.channels)]
+        return self._tries
+
+    def __getstate__(self):
+        state = RegexMatcher.__getstate__(self)
+        state.pop('_tries', None)
+        return state
+
+    def _channel_prefix(self, trie):
+        """Return regex checked before the trie of a channel."""
+        if len(self.channels) > 1 and len(trie):
+            # Lookahead for first characters skips a channel with one
+            # character set test, when the channel cannot match
+            return '(?=' + trie.first_chars_regex() + ')'
+        return ''
+
+    def _channel_regex_at(self, channel, char):
+        return self.tries[channel][0].to_regex(first=char)
+
+    def channel_regexes(self):
+        """Return list of regex strings for channels."""
+        regexes = []
+        for trie, word_boundary in self.tries:
+            regex = self._channel_prefix(trie) + trie.to_regex()
+            if word_boundary:
+                regex = r"\b" + regex + r"\b"
+            regexes.append(regex)
+        return regexes
+
+    def add_tokens(self, tokens, channel=0):
+        """Add tokens to a channel, see the overlay of edits in the module documentation.
+        When the pattern is compiled, only the trie branches of the first characters
+        of the changed tokens are built again.
+        Parameters
+        ----------
+        tokens : iterable of str
+            Tokens to be added.
+        channel : int, optional
+            Index of the channel.
+        """
+        trie = self.tries[channel][0]
+        channel_tokens = self.channels[channel][0]
+        added = []
+        for token in tokens:
+            if token and token not in trie:
+                trie.add(token)
+                channel_tokens.append(token)
+                added.append(token)
+        self._add_overlay(added, channel)
+
+    def remove_tokens(self, tokens):
+        """Remove tokens from all channels, see the overlay of edits in the module documentation.
+        Parameters
+        ----------
+        tokens : iterable of str
+            Tokens to be removed.
+        """
+        tokens = set(tokens)
+        removed = []
+        for n, ((trie, _), (channel_tokens, _)) in enumerate(zip(self.tries, self.channels)):
+            channel_removed = set(token for token in tokens if trie.remove(token))
+            if channel_removed:
+                channel_tokens[:] = [token for token in channel_tokens
+                                     if token not in channel_removed]
+                removed.append((n, channel_removed))
+        self._remove_overlay(removed)
+
+    def copy(self):
+        """Return copy of the matcher, which can be changed separately."""
+        matcher = RegexMatcher.copy(self)
+        if self.__dict__.get('_tries') is not None:
+            matcher._tries = [(trie.copy(), word_boundary) for trie, word_boundary in self._tries]
+        return matcher
+
+
+MATCHERS = {
+    're': RegexMatcher,
+    'trie': TrieMatcher,
+    }
+
+
+def make_matcher(channels, engine='trie', names=None, stem_channels=(), obfuscated_channels=()):
+    """Return matcher for lexicon channels.
+    Parameters
+    ----------
+    channels : list of (list of str, bool)
+        Lexicon tokens and word boundary flag for each channel,
+        in the order of matching precedence.
+    engine : 're' or 'trie', optional
+        Matching engine.
+    names : list of str, optional
+        Names of channels for match objects.
+    stem_channels : tuple of int, optional
+        Indices of channels with wildcard stem tokens.
+    obfuscated_channels : tuple of int, optional
+        Indices of channels matching obfuscated variants of the tokens.
+    Returns
+    -------
+    matcher : RegexMatcher or TrieMatcher
+        Object with findall() and finditer() methods.
+    """
+    try:
+        matcher_class = MATCHERS[engine]
+    except KeyError:
+        raise ValueError('Unknown matching engine %r, use one of %s' % (engine, ENGINES))
+    return matcher_class(channels, names=names, stem_channels=stem_channels,
+                         obfuscated_channels=obfuscated_channels)
@@ -0,0 +1,302 @@
+"""Memory-mapped binary lexicon format for AFINN sentiment analysis."""
+
+from __future__ import absolute_import, division, print_function
+
+"""
+# ------------------------------------------------------------------------------------------------
+
+Each process using the AFINN classes holds its own Python dictionary of ~10000 word forms.
+The binary lexicon format ('.afnlex') is opened with mmap, so that all processes
+share one physical copy of the lexicon from the page cache.
+
+Only the lexicon is shared. The matcher of AfinnMapped is a compiled regular expression,
+which is private to each process: it is compiled in each process from the regex source in
+the disk cache of AFINN_cache.py, or built from the terms of the mapped file without it
+(~0.2-0.3 s and ~9 MB per process with the cache, ~0.3-0.45 s and ~16 MB without, for
+the Finnish polarity list).
+
+File layout (little-endian):
+
+    header      magic (8 bytes), n_terms, n_columns, n_slots, names_size (uint32),
+                strings_size (uint64)
+    names       tab-separated UTF-8 names of score columns, padded to 8 bytes
+    offsets     (n_terms + 1) x uint32, offsets of terms in the string table
+    slots       n_slots x uint32, open addressing hash index (term id + 1, 0 is empty)
+    scores      n_terms x n_columns int8, one row per term
+    present     n_terms x n_columns uint8, 1 where the lexicon of the column has the term
+    strings     UTF-8 string table of terms, sorted by bytes
+
+Terms are looked up with the CRC32 hash of their UTF-8 bytes and linear probing,
+and compared directly against the mapped string table. In a file of several lexicons,
+the terms of all lexicons are in one table; a term missing from the lexicon of a column
+has score 0 and is not present in the column, so MappedLexicon of the column (and the
+matcher of AfinnMapped) does not have it.
+
+Conversion of the tab-separated lexicons in the DATA folder (from the AFINN-Classification folder):
+
+    python -m AFINNfin.AFINN_mmap AFINNfin/DATA/fin_afinn_polarity_MerjasList_2023.txt
+    python -m AFINNfin.AFINN_mmap --output fin_afinn_all.afnlex \\
+        AFINNfin/DATA/fin_afinn_{HS_binary,binary,trinary,polarity}_MerjasList_2023.txt
+
+# ------------------------------------------------------------------------------------------------
+"""
+
+import argparse
+import mmap
+import os
+import struct
+import sys
+import zlib
+from os.path import splitext
+
+import numpy as np
+
+MAGIC = b'AFNLEX\x00\x02'
+
+_HEADER = struct.Struct('<8sIIIIQ')
+
+SUFFIX = '.afnlex'
+
+
+def _pad(size):
+    """Return size rounded up to multiple of 8 bytes."""
+    return (size + 7) & ~7
+
+
+def _n_slots(n_terms):
+    """Return hash index size, a power of two with load factor at most 0.5."""
+    n_slots = 8
+    while n_slots < 2 * n_terms:
+        n_slots *= 2
+    return n_slots
+
+
+def write_lexicon(filename, word_dicts, columns=None):
+    """Write dictionaries to binary lexicon file.
+    Parameters
+    ----------
+    filename : str
+        Output filename.
+    word_dicts : list of dict
+        Dictionaries with terms as keys and scores as values,
+        one dictionary for each score column.
+    columns : list of str, optional
+        Names of score columns.
+    """
+    if columns is None:
+        columns = [str(n) for n in range(len(word_dicts))]
+    if len(columns) != len(word_dicts):
+        raise ValueError('Number of columns and dictionaries differ')
+
+    terms = set()
+    for word_dict in word_dicts:
+        terms.update(word_dict)
+    encoded = sorted(term.encode('UTF-8') for term in terms)
+    n_terms = len(encoded)
+    n_columns = len(word_dicts)
+
+    offsets = np.zeros(n_terms + 1, dtype='<u4')
+    np.cumsum([len(term) for term in encoded], out=offsets[1:])
+
+    n_slots = _n_slots(n_terms)
+    mask = n_slots - 1
+    slots = np.zeros(n_slots, dtype='<u4')
+    for term_id, term in enumerate(encoded):
+        slot = zlib.crc32(term) & mask
+        while slots[slot]:
+            slot = (slot + 1) & mask
+        slots[slot] = term_id + 1
+
+    scores = np.zeros((n_terms, n_columns), dtype=np.int8)
+    present = np.zeros((n_terms, n_columns), dtype=np.uint8)
+    for column, word_dict in enumerate(word_dicts):
+        for term_id, term in enumerate(encoded):
+            score = word_dict.get(term.decode('UTF-8'))
+            if score is None:
+                continue
+            if not -128 <= score <= 127:
+                raise ValueError('Score %d of %r does not fit to int8' % (score, term))
+            scores[term_id, column] = score
+            present[term_id, column] = 1
+
+    names = '\t'.join(columns).encode('UTF-8')
+    strings = b''.join(encoded)
+    with open(filename, 'wb') as fid:
+        fid.write(_HEADER.pack(MAGIC, n_terms, n_columns, n_slots, len(names), len(strings)))
+        for block in (names, offsets.tobytes(), slots.tobytes(), scores.tobytes(),
+                      present.tobytes()):
+            fid.write(block)
+            fid.write(b'\x00' * (_pad(len(block)) - len(block)))
+        fid.write(strings)
+
+
+class MappedLexicon(object):
+    """Read-only dictionary over a memory-mapped binary lexicon file.
+       ----------
+       The dictionary has the terms present in the score column, see the
+       'present' array. The 'scores' array has the rows of all terms, with
+       0 for terms missing from a column.
+    """
+
+    def __init__(self, filename, column=0):
+        """Open binary lexicon file.
+        Parameters
+        ----------
+        filename : str
+            Binary lexicon filename.
+        column : int or str, optional
+            Score column (index or name) for dictionary lookups.
+        """
+        if sys.byteorder != 'little':
+            raise ValueError('Binary lexicon files are supported on little-endian systems only')
+        self.filename = filename
+        with open(filename, 'rb') as fid:
+            self._mmap = mmap.mmap(fid.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, n_terms, n_columns, n_slots, names_size, strings_size = _HEADER.unpack_from(
+            self._mmap, 0)
+        if magic[:6] != MAGIC[:6]:
+            raise ValueError('%s is not a binary lexicon file' % filename)
+        if magic != MAGIC:
+            raise ValueError('%s is a binary lexicon file of another version, convert the '
+                             'lexicon again with AFINN_mmap.py' % filename)
+
+        position = _HEADER.size
+        self.columns = tuple(
+            self._mmap[position:position + names_size].decode('UTF-8').split('\t'))
+        position += _pad(names_size)
+        view = memoryview(self._mmap)
+        self._offsets = view[position:position + 4 * (n_terms + 1)].cast('I')
+        position += _pad(4 * (n_terms + 1))
+        self._slots = view[position:position + 4 * n_slots].cast('I')
+        position += _pad(4 * n_slots)
+        self.scores = np.frombuffer(self._mmap, dtype=np.int8, count=n_terms * n_columns,
+                                    offset=position).reshape(n_terms, n_columns)
+        self._scores = view[position:position + n_terms * n_columns].cast('b')
+        position += _pad(n_terms * n_columns)
+        self.present = np.frombuffer(self._mmap, dtype=np.uint8, count=n_terms * n_columns,
+                                     offset=position).reshape(n_terms, n_columns)
+        self._present = view[position:position + n_terms * n_columns].cast('B')
+        position += _pad(n_terms * n_columns)
+        self._strings_start = position
+
+        self._n_terms = n_terms
+        self._n_columns = n_columns
+        self._mask = n_slots - 1
+        self.column = self.columns.index(column) if isinstance(column, str) else column
+        self._len = int(np.count_nonzero(self.present[:, self.column]))
+
+    def __getstate__(self):
+        # Worker processes map the same file again
+        return {'filename': self.filename, 'column': self.column}
+
+    def __setstate__(self, state):
+        self.__init__(state['filename'], column=state['column'])
+
+    def __len__(self):
+        return self._len
+
+    def _term_ids(self):
+        """Return term ids of the terms present in the column."""
+        return np.flatnonzero(self.present[:, self.column])
+
+    def __iter__(self):
+        offsets = self._offsets
+        start = self._strings_start
+        data = self._mmap
+        for term_id in self._term_ids():
+            yield data[start + offsets[term_id]:start + offsets[term_id + 1]].decode('UTF-8')
+
+    def __contains__(self, term):
+        return self._column_term_id(term) >= 0
+
+    def __getitem__(self, term):
+        term_id = self._column_term_id(term)
+        if term_id < 0:
+            raise KeyError(term)
+        return self._scores[term_id * self._n_columns + self.column]
+
+    def get(self, term, default=None):
+        term_id = self._column_term_id(term)
+        if term_id < 0:
+            return default
+        return self._scores[term_id * self._n_columns + self.column]
+
+    def keys(self):
+        return iter(self)
+
+    def items(self):
+        for term_id, term in zip(self._term_ids(), self):
+            yield term, self._scores[term_id * self._n_columns + self.column]
+
+    def copy(self):
+        """Return the lexicon as a dictionary."""
+        return dict(self.items())
+
+    def _column_term_id(self, term):
+        """Return term id of a term present in the column, or -1."""
+        term_id = self.term_id(term)
+        if term_id >= 0 and not self._present[term_id * self._n_columns + self.column]:
+            return -1
+        return term_id
+
+    def term_id(self, term):
+        """Return term id (row of scores), or -1 if term is not in any lexicon of the file.
+        Parameters
+        ----------
+        term : str
+            Term
+        Returns
+        -------
+        term_id : int
+            Term id
+        """
+        key = term.encode('UTF-8')
+        slots = self._slots
+        offsets = self._offsets
+        data = self._mmap
+        start = self._strings_start
+        slot = zlib.crc32(key) & self._mask
+        while True:
+            term_id = slots[slot] - 1
+            if term_id < 0:
+                return -1
+            if data[start + offsets[term_id]:start + offsets[term_id + 1]] == key:
+                return term_id
+            slot = (slot + 1) & self._mask
+
+    def close(self):
+        """Close the memory map."""
+        self._offsets.release()
+        self._slots.release()
+        self._scores.release()
+        self._present.release()
+        self.scores = None
+        self.present = None
+        self._mmap.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Convert tab-separated AFINN lexicons to binary lexicon files.')
+    parser.add_argument('filenames', nargs='+', help='tab-separated lexicon files')
+    parser.add_argument('--output', help='merge all lexicons to this file, one score column each')
+    args = parser.parse_args()
+
+    from .AFINN_scores import AfinnWords
+
+    word_dicts = [AfinnWords.read_word_file(filename) for filename in args.filenames]
+    columns = [splitext(os.path.basename(filename))[0] for filename in args.filenames]
+    if args.output:
+        write_lexicon(args.output, word_dicts, columns=columns)
+        print('%s: %d columns' % (args.output, len(columns)))
+        for column, word_dict in zip(columns, word_dicts):
+            print('  %s: %d terms' % (column, len(word_dict)))
+    else:
+        for filename, word_dict, column in zip(args.filenames, word_dicts, columns):
+            output = splitext(filename)[0] + SUFFIX
+            write_lexicon(output, [word_dict], columns=[column])
+            print('%s: %d terms' % (output, len(word_dict)))
+
+
+if __name__ == '__main__':
+    main()
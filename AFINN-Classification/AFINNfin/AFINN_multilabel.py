@@ -0,0 +1,370 @@
+"""Multi-label lexicon for AFINN sentiment analysis."""
+
+from __future__ import absolute_import, division, print_function
+
+"""
+# ------------------------------------------------------------------------------------------------
+
+Finnish AFINN lexicons have separate files for HS binary, binary, trinary and polarity labels,
+which cover the same ~9990 word forms (and the same emoticons and emojis).
+
+The multi-label lexicon merges the label schemes into one table:
+    - each term of a channel (word, emoticon, emoji) has a term id
+    - each term id maps to an int8 row of scores, one column per label scheme
+
+Text is then matched once, and all label schemes are scored from the rows of matched terms.
+Terms missing from the file of a label scheme (or schemes without a file, e.g. trinary
+emoticons) have score 0 in that column, and False in the 'labeled' table.
+
+Each label scheme matches text as its single-scheme analyzer (AfinnCombined with the files
+of the scheme). A term of another scheme can shadow the terms of a scheme: the emoji name
+'see-no-evil_monkey' (no HS binary emojis) would hide 'no' of the HS binary words, and the
+polarity emoji name 'cat2' would hide 'cat' of the binary emojis. scheme_matches keeps the
+matches of the terms labeled in the scheme, and matches the text of the other matches again
+with the terms of the scheme only. This is exact, because the single-scheme matcher has no
+match where the matcher of all terms has none, and matches the same term where the matched
+term of all terms is labeled in the scheme. Texts with only labeled matches are scored from
+the rows as such. Terms are stripped when read, as 'oiva ' and '>:] ' of some files would
+match only with a following space. check_schemes (and the command line) compares the schemes to the
+single-scheme analyzers, for each term, for pairs of terms and for the lines of a text file:
+
+    python -m AFINNfin.AFINN_multilabel --texts comments.txt
+
+# ------------------------------------------------------------------------------------------------
+"""
+
+import argparse
+import codecs
+
+import numpy as np
+
+SCHEMES = ('HS_binary', 'binary', 'trinary', 'polarity')
+
+MULTILABEL_FILENAMES = {
+    'word': {
+        'HS_binary': 'fin_afinn_HS_binary_MerjasList_2023.txt',
+        'binary': 'fin_afinn_binary_MerjasList_2023.txt',
+        'trinary': 'fin_afinn_trinary_MerjasList_2023.txt',
+        'polarity': 'fin_afinn_polarity_MerjasList_2023.txt',
+        },
+    'emoticon': {
+        'binary': 'afinn_emoticon_binary_MerjasList_2023.txt',
+        'polarity': 'afinn_emoticon_polarity_MerjasList_2023.txt',
+        },
+    'emoji': {
+        'binary': 'afinn_emoji_binary_merja2023.txt',
+        'trinary': 'afinn_emoji_trinary_merja2023.txt',
+        'polarity': 'afinn_emoji_polarity_merja2023.txt',
+        },
+    }
+
+
+class MultiLabelLexicon(object):
+    """Lexicon with a row of scores for each term, one column per label scheme."""
+
+    def __init__(self, channel_dicts, schemes=SCHEMES):
+        """Setup lexicon from dictionaries.
+        Parameters
+        ----------
+        channel_dicts : dict
+            Dictionary of label scheme dictionaries for each channel,
+            e.g. {'word': {'binary': {'hyvä': 1, ...}, ...}, ...}.
+            The order of channels is kept.
+        schemes : tuple of str, optional
+            Label schemes, the columns of the score table.
+        """
+        self.schemes = tuple(schemes)
+        self.channels = tuple(channel_dicts)
+        self.terms = {}
+        self.term_ids = {}
+        all_terms = []
+        for channel in self.channels:
+            terms = set()
+            for word_dict in channel_dicts[channel].values():
+                terms.update(word_dict)
+            terms = sorted(terms)
+            self.terms[channel] = terms
+            self.term_ids[channel] = dict(
+                (term, len(all_terms) + n) for n, term in enumerate(terms))
+            all_terms.extend(terms)
+
+        self.scores = np.zeros((len(all_terms), len(self.schemes)), dtype=np.int8)
+        self.labeled = np.zeros((len(all_terms), len(self.schemes)), dtype=bool)
+        for channel in self.channels:
+            term_ids = self.term_ids[channel]
+            for column, scheme in enumerate(self.schemes):
+                word_dict = channel_dicts[channel].get(scheme)
+                if not word_dict:
+                    continue
+                rows = np.fromiter((term_ids[term] for term in word_dict), dtype=np.int64,
+                                   count=len(word_dict))
+                values = np.fromiter(word_dict.values(), dtype=np.int64, count=len(word_dict))
+                if values.size and (values.min() < -128 or values.max() > 127):
+                    raise ValueError('Scores of %s %s lexicon do not fit to int8' % (
+                        channel, scheme))
+                self.scores[rows, column] = values
+                self.labeled[rows, column] = True
+
+    def __len__(self):
+        return len(self.scores)
+
+    @classmethod
+    def from_files(cls, channel_filenames, read_word_file, schemes=SCHEMES):
+        """Setup lexicon from data files.
+        Parameters
+        ----------
+        channel_filenames : dict
+            Full filenames of label schemes for each channel,
+            in the layout of MULTILABEL_FILENAMES.
+        read_word_file : function
+            Function reading a tab-separated data file to a dictionary.
+        schemes : tuple of str, optional
+            Label schemes, the columns of the score table.
+        Returns
+        -------
+        lexicon : MultiLabelLexicon
+            Lexicon
+        """
+        channel_dicts = {}
+        for channel, filenames in channel_filenames.items():
+            channel_dicts[channel] = dict(
+                (scheme, read_word_file(filename)) for scheme, filename in filenames.items()
+                if scheme in schemes)
+        return cls(channel_dicts, schemes=schemes)
+
+    def scheme_dict(self, channel, scheme):
+        """Return dictionary of scores of one channel and label scheme.
+        Parameters
+        ----------
+        channel : str
+            Channel name, e.g. 'word'.
+        scheme : str
+            Label scheme, e.g. 'polarity'.
+        Returns
+        -------
+        word_dict : dict
+            Dictionary with terms as keys and scores as values
+        """
+        column = self.schemes.index(scheme)
+        term_ids = self.term_ids[channel]
+        ids = np.fromiter(term_ids.values(), dtype=np.int64, count=len(term_ids))
+        return dict(zip(term_ids, self.scores[ids, column].tolist()))
+
+    def labeled_terms(self, channel, scheme):
+        """Return terms of a channel labeled in a label scheme.
+        Parameters
+        ----------
+        channel : str
+            Channel name, e.g. 'word'.
+        scheme : str
+            Label scheme, e.g. 'polarity'.
+        Returns
+        -------
+        terms : set of str
+            Terms with a score in the label scheme
+        """
+        column = self.schemes.index(scheme)
+        labeled = self.labeled[:, column]
+        return set(term for term, row in self.term_ids[channel].items() if labeled[row])
+
+    def copy(self):
+        """Return copy of the lexicon, which can be changed separately."""
+        lexicon = self.__class__.__new__(self.__class__)
+        lexicon.schemes = self.schemes
+        lexicon.channels = self.channels
+        lexicon.terms = dict((channel, list(terms)) for channel, terms in self.terms.items())
+        lexicon.term_ids = dict((channel, dict(term_ids))
+                                for channel, term_ids in self.term_ids.items())
+        lexicon.scores = self.scores.copy()
+        lexicon.labeled = self.labeled.copy()
+        return lexicon
+
+    def set_scores(self, channel, terms, scheme=None):
+        """Set scores of terms of a channel, adding the missing terms.
+        Parameters
+        ----------
+        channel : str
+            Channel name, e.g. 'word'.
+        terms : dict
+            Scores of the terms, a row with a score for each label scheme,
+            or a single score of the label scheme given by scheme.
+        scheme : str, optional
+            Label scheme of single scores. Other label schemes of new terms
+            have score 0 and are not labeled.
+        """
+        term_ids = self.term_ids[channel]
+        new_terms = [term for term in terms if term not in term_ids]
+        if new_terms:
+            start = len(self.scores)
+            for n, term in enumerate(new_terms):
+                term_ids[term] = start + n
+            self.terms[channel].extend(new_terms)
+            shape = (len(new_terms), len(self.schemes))
+            self.scores = np.concatenate([self.scores, np.zeros(shape, dtype=np.int8)])
+            self.labeled = np.concatenate([self.labeled, np.zeros(shape, dtype=bool)])
+        for term, value in terms.items():
+            row = term_ids[term]
+            if np.ndim(value):
+                if len(value) != len(self.schemes):
+                    raise ValueError('%r has %d scores for %d label schemes' % (
+                        term, len(value), len(self.schemes)))
+                columns = slice(None)
+            elif scheme is None:
+                raise ValueError('%r has a single score without a label scheme' % (term,))
+            else:
+                columns = self.schemes.index(scheme)
+            values = np.asarray(value)
+            if values.min() < -128 or values.max() > 127:
+                raise ValueError('Scores of %r do not fit to int8' % (term,))
+            self.scores[row, columns] = values
+            self.labeled[row, columns] = True
+
+    def remove_terms(self, terms):
+        """Remove terms from all channels. Term ids of the other terms are renumbered.
+        Parameters
+        ----------
+        terms : iterable of str
+            Terms to be removed. Missing terms are ignored.
+        """
+        terms = set(terms)
+        keep = np.ones(len(self.scores), dtype=bool)
+        for channel in self.channels:
+            term_ids = self.term_ids[channel]
+            for term in terms:
+                if term in term_ids:
+                    keep[term_ids[term]] = False
+        if keep.all():
+            return
+        new_ids = np.cumsum(keep) - 1
+        for channel in self.channels:
+            self.terms[channel] = [term for term in self.terms[channel] if term not in terms]
+            term_ids = self.term_ids[channel]
+            self.term_ids[channel] = dict((term, int(new_ids[term_ids[term]]))
+                                          for term in self.terms[channel])
+        self.scores = self.scores[keep]
+        self.labeled = self.labeled[keep]
+
+
+def scheme_matches(starts, ends, labeled, match_at):
+    """Return the changes of the matches of the terms of all label schemes for one scheme.
+    Parameters
+    ----------
+    starts, ends : sequence of int
+        Offsets of the matches of all terms, in text order.
+    labeled : sequence of bool
+        True for the matches of terms labeled in the scheme.
+    match_at : function
+        Function of a text position returning (channel, term) of the match of the terms
+        of the scheme at the position, as the single-scheme matcher, or None.
+    Returns
+    -------
+    dropped : list of int
+        Indices of the matches, which are not matches of the scheme.
+    added : list of (int, int, str, str)
+        Index of the dropped match, start, channel and term of the matches of the scheme
+        in the text of the dropped matches
+    Examples
+    --------
+    >>> text = 'hyvä >:] :)'
+    >>> terms = {':]': 'emoticon', ':)': 'emoticon'}
+    >>> def match_at(position):
+    ...     term = text[position:position + 2]
+    ...     return (terms[term], term) if term in terms else None
+    >>> scheme_matches([0, 5, 9], [4, 8, 11], [True, False, True], match_at)
+    ([1], [(1, 6, 'emoticon', ':]')])
+    """
+    labeled = np.asarray(labeled, dtype=bool)
+    dropped, added = [], []
+    n_matches = len(labeled)
+    index = 0
+    for first in np.flatnonzero(~labeled):
+        if first < index:
+            continue
+        # The text of a match of another scheme is matched again, and of the following
+        # matches overlapped by the new matches; before and after it, all terms have no match
+        index = int(first)
+        position = int(starts[index])
+        while True:
+            dropped.append(index)
+            while position < ends[index]:
+                found = match_at(position)
+                if found is None:
+                    position += 1
+                else:
+                    channel, term = found
+                    added.append((index, position, channel, term))
+                    position += len(term)
+            index += 1
+            if index >= n_matches or starts[index] >= position:
+                break
+    return dropped, added
+
+
+def check_schemes(texts=(), schemes=SCHEMES, engine='trie', filenames=MULTILABEL_FILENAMES):
+    """Compare the label schemes of AfinnMultiLabel to the single-scheme analyzers.
+    Each term of the lexicon and each text is scored with AfinnMultiLabel and with
+    AfinnCombined with the files of each label scheme, one by one and in bulk.
+    Parameters
+    ----------
+    texts : iterable of str, optional
+        Texts scored in addition to the terms.
+    schemes : tuple of str, optional
+        Label schemes to be compared.
+    engine : 'trie' or 're', optional
+        Matching engine.
+    filenames : dict, optional
+        Data files of label schemes for each channel, in the layout of MULTILABEL_FILENAMES.
+    Returns
+    -------
+    mismatches : list of (str, str, list, list)
+        Label scheme and text with differing matches, with the (channel, term, score)
+        matches of the single-scheme analyzer and of AfinnMultiLabel
+    Examples
+    --------
+    >>> check_schemes(texts=['hyvä >:]', 'oiva juttu'])
+    []
+    """
+    from .AFINN_scores import AfinnCombined, AfinnMultiLabel
+
+    multi = AfinnMultiLabel(engine=engine, filenames=filenames)
+    texts = list(texts)
+    # The terms as texts, and pairs of terms, where a term of another scheme can shadow
+    terms = [term for channel in multi._lexicon.channels for term in multi._lexicon.terms[channel]]
+    texts = list(dict.fromkeys(texts + terms + [' '.join(pair) for pair in zip(terms, terms[1:])]))
+    bulk = multi.score_all_many(texts)
+    mismatches = []
+    for scheme in schemes:
+        column = multi.schemes.index(scheme)
+        single = AfinnCombined(engine=engine, filenames=dict(
+            (channel, filenames[channel].get(scheme)) for channel in filenames))
+        single_bulk = single.score_many(texts).score
+        for n, text in enumerate(texts):
+            expected = [(channel, term, single._dicts[channel][term])
+                        for channel, term in single.find_all_channels(text)]
+            actual = [(channel, term, int(multi._lexicon.scores[
+                multi._lexicon.term_ids[channel][term], column]))
+                for channel, term in multi.find_all_channels(text, scheme=scheme)]
+            if expected != actual or single_bulk[n] != bulk[n, column]:
+                mismatches.append((scheme, text, expected, actual))
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compare the label schemes of AfinnMultiLabel to single-scheme analyzers.')
+    parser.add_argument('--texts', help='text file of lines scored in addition to the terms')
+    parser.add_argument('--engine', default='trie', choices=('trie', 're'))
+    args = parser.parse_args()
+
+    texts = []
+    if args.texts:
+        with codecs.open(args.texts, encoding='UTF-8') as fid:
+            texts = [line.rstrip('\n') for line in fid]
+    mismatches = check_schemes(texts, engine=args.engine)
+    for scheme, text, expected, actual in mismatches:
+        print('%s\t%r\n    single %r\n    multi  %r' % (scheme, text, expected, actual))
+    print('%d mismatches' % len(mismatches))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,629 @@
+"""Obfuscation-tolerant matching for AFINN sentiment analysis."""
+
+from __future__ import absolute_import, division, print_function
+
+"""
+# ------------------------------------------------------------------------------------------------
+
+Hate speech is often written with masked or leetspeak spellings of swear words, e.g.
+'v.ttu', 'w_ttu', 'viddu', 'vttu' or 'v1ttu' for 'vittu' (see the search lists of
+HS-data-generation/Read-Suomi24). Enumerating the variants of every lexicon entry would
+multiply the size of the matcher.
+
+Instead, each character of a lexicon entry is compiled into the matcher as a class of
+equivalent characters, and runs of the same character to one symbol:
+    - equivalent characters (CHAR_CLASSES), e.g. 'v' or 'w', 't' or 'd', 'i' or '1',
+      and 'a' for 'ä' (missing dots)
+    - repeated characters, e.g. 'viddu' or 'vitu' for 'vittu'
+    - masked characters, a run of MASK_CHARS (e.g. '.', '_', '*') in place of
+      a character of the entry, e.g. 'v.ttu', 'vi__u' or 'p**ka'
+    - an omitted vowel after the first letter, between consonants, e.g. 'vttu' or 'pska'
+The first and the last character of the entry are matched only with letters, and never
+masked or omitted.
+
+Masked spellings are used for swear words and slurs. Equivalent characters and omitted
+vowels would also turn ordinary words into other words of the lexicon (e.g. 'voida' into
+'voittaa'), so only single-word entries of at least MIN_LENGTH letters with a score of
+at most MAX_SCORE are matched with obfuscation (obfuscation_terms). Even so, e.g. 'mutta'
+would be matched for 'muta', 'valta' for 'välttää' and 'pesta' for 'pestä'. A plain word
+(default_plain_words: the plain word lists of AFINN_stems.py, i.e. the stopword list, also
+spelled without the dots of ä and ö) standing as a whole word, i.e. not followed by a word
+character, is not matched as a variant. Other words are not filtered: 'valta' and 'kuusi'
+are matched for 'välttää' and 'kusi', and 40 of 3506 lemmas of the samples without hate
+speech (AFINN_stems.corpus_words(source=AFINN_stems.NOT_HS_LEMMAS)) are matched.
+The plain words are skipped with a negative lookahead before the trie regex, which is
+cheaper than failing in the trie for the most common words; without word boundaries
+(word_boundary=False of AfinnWords) a plain word within a longer word ('mutta' in
+'muttakin') is matched as usual. resolve does not check the plain words, so each matched
+variant has its canonical entry. false_positives (and the command line) lists the words of
+a word list matched as variants:
+
+    python -m AFINNfin.AFINN_obfuscation --words finnish_stopwords_MerjasList_2023.txt
+
+Each alternative of the trie regex starts with a character set or a lookahead of one, so that
+sre skips the alternatives not matching the next character without entering them.
+
+Exact matches take precedence, obfuscated variants are tried only where no lexicon entry
+matches. A matched variant is resolved to its canonical lexicon entry (ObfuscationDict):
+of the entries the variant can be matched for, the entry with the fewest substituted,
+masked and omitted characters, e.g. 'vittu' instead of 'viddu' for 'v.ttu'.
+Variants are scored with the score of the entry.
+
+# ------------------------------------------------------------------------------------------------
+"""
+
+import argparse
+import re
+from functools import lru_cache
+from os.path import dirname, join
+
+from . import AFINN_stems
+from .AFINN_matcher import Trie
+
+# Characters of text matched for a character of a lexicon entry
+CHAR_CLASSES = {
+    'a': 'a4@',
+    'ä': 'äa4@',
+    'b': 'bp',
+    'e': 'e3',
+    'i': 'i1!|',
+    'k': 'kc',
+    'o': 'o0',
+    'ö': 'öo0',
+    'p': 'pb',
+    's': 's5$',
+    't': 'td7+',
+    'd': 'dt',
+    'v': 'vw',
+    'w': 'wv',
+    }
+
+# Characters masking a character of a lexicon entry
+MASK_CHARS = '._-*#'
+
+VOWELS = 'aeiouyäöå'
+
+MIN_LENGTH = 4
+
+MAX_SCORE = -1
+
+# Marks the entries of a symbol path in a trie node
+_ENTRIES = ''
+
+# Spellings of ä and ö without the dots
+_DOTLESS = str.maketrans('äö', 'ao')
+
+
+def symbols(term, min_length=MIN_LENGTH):
+    """Return the symbols of a lexicon entry, runs of a character are one symbol.
+    Parameters
+    ----------
+    term : str
+        Lexicon entry
+    min_length : int, optional
+        Minimum number of letters of entries matched with obfuscation.
+    Returns
+    -------
+    symbols : str or None
+        Characters of the entry without repetition, or None if the entry
+        is not matched with obfuscation.
+    Examples
+    --------
+    >>> symbols('vittu'), symbols('vitun pelle')
+    ('vitu', None)
+    """
+    if len(term) < min_length or not term.isalpha():
+        return None
+    collapsed = re.sub(r'(.)\1+', r'\1', term)
+    if len(collapsed) < 3:
+        return None
+    return collapsed
+
+
+def obfuscation_terms(word_dict, max_score=MAX_SCORE, min_length=MIN_LENGTH):
+    """Return lexicon entries matched with obfuscation.
+    Parameters
+    ----------
+    word_dict : dict
+        Scores of lexicon entries.
+    max_score : int, optional
+        Maximum score of entries matched with obfuscation.
+    min_length : int, optional
+        Minimum number of letters of entries matched with obfuscation.
+    Returns
+    -------
+    terms : list of str
+        Entries matched with obfuscation
+    Examples
+    --------
+    >>> obfuscation_terms({'vittu': -4, 'hyvä': 3, 'paska': -3, 'ok': -1})
+    ['vittu', 'paska']
+    """
+    return [term for term, score in word_dict.items()
+            if score <= max_score and symbols(term, min_length) is not None]
+
+
+def plain_spellings(words):
+    """Return lowercased words and their spellings without the dots of ä and ö.
+    Examples
+    --------
+    >>> sorted(plain_spellings(['Pestä', 'mutta']))
+    ['mutta', 'pesta', 'pestä']
+    """
+    words = set(word.lower() for word in words)
+    return frozenset(words | set(word.translate(_DOTLESS) for word in words))
+
+
+@lru_cache(maxsize=None)
+def default_plain_words():
+    """Return spellings of the plain word lists of AFINN_stems.py (PLAIN_WORD_FILES)."""
+    return plain_spellings(AFINN_stems.plain_words())
+
+
+@lru_cache(maxsize=None)
+def _plain_regex(words):
+    """Return negative lookahead of plain words (frozenset) not followed by a word character."""
+    if not words:
+        return ''
+    return '(?!' + Trie(words).to_regex() + r'(?!\w))'
+
+
+def _char_class(symbol, strict=False):
+    """Return characters of text matched for a symbol.
+    Strict classes of the first and last symbols have only letters.
+    """
+    chars = CHAR_CLASSES.get(symbol, symbol)
+    if strict:
+        chars = ''.join(char for char in chars if char.isalpha())
+    return chars
+
+
+def _class_regex(chars):
+    if len(chars) == 1:
+        return re.escape(chars)
+    return '[' + ''.join(re.escape(char) for char in chars) + ']'
+
+
+def _run_regex(chars):
+    # A leading character set (not a repeat) lets sre skip the alternative on its first character
+    regex = _class_regex(chars)
+    return regex + regex + '*'
+
+
+def _is_vowel(symbol):
+    return symbol in VOWELS
+
+
+# Text characters standing for a consonant, checked before an omitted vowel
+_CONSONANT_CHARS = ''.join(sorted(
+    set('bcdfghjklmnpqrstvwxzšž') | set(''.join(
+        chars for symbol, chars in CHAR_CLASSES.items() if not _is_vowel(symbol)))))
+
+_MASK_REGEX = _run_regex(MASK_CHARS)
+
+
+class ObfuscationTrie(object):
+    """Trie over the symbols of lexicon entries, compiled to an obfuscation-tolerant regex.
+       ----------
+       The trie has the interface of Trie of AFINN_matcher.py, so that it
+       can be used as the trie of a matcher channel.
+    """
+
+    def __init__(self, tokens=(), min_length=MIN_LENGTH, plain_words=None):
+        """Setup trie from tokens.
+        Parameters
+        ----------
+        tokens : iterable of str, optional
+            Lexicon entries. Entries not matched with obfuscation are skipped.
+        min_length : int, optional
+            Minimum number of letters of entries matched with obfuscation.
+        plain_words : iterable of str, optional
+            Dictionary words, which are not variants of entries (also spelled
+            without the dots of ä and ö), default is default_plain_words().
+        """
+        self.min_length = min_length
+        self._plain = default_plain_words() if plain_words is None else plain_spellings(plain_words)
+        self._root = {}
+        self._size = 0
+        # Regexes of the branches of the root, keyed by the first symbol
+        self._branches = {}
+        for token in tokens:
+            self.add(token)
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, token):
+        path = symbols(token, self.min_length)
+        if path is None:
+            return False
+        node = self._root
+        for symbol in path:
+            node = node.get(symbol)
+            if node is None:
+                return False
+        return token in node.get(_ENTRIES, ())
+
+    def copy(self):
+        """Return copy of the trie, which can be changed separately."""
+        trie = ObfuscationTrie(min_length=self.min_length, plain_words=())
+        trie._plain = self._plain
+        trie._size = self._size
+        trie._branches = self._branches.copy()
+        stack = [(self._root, trie._root)]
+        while stack:
+            node, node_copy = stack.pop()
+            for symbol, child in node.items():
+                if symbol == _ENTRIES:
+                    node_copy[symbol] = list(child)
+                else:
+                    node_copy[symbol] = {}
+                    stack.append((child, node_copy[symbol]))
+        return trie
+
+    def add(self, token):
+        """Add lexicon entry to the trie.
+        Parameters
+        ----------
+        token : str
+            Lexicon entry. Entries not matched with obfuscation are ignored.
+        """
+        path = symbols(token, self.min_length)
+        if path is None:
+            return
+        node = self._root
+        for symbol in path:
+            node = node.setdefault(symbol, {})
+        entries = node.setdefault(_ENTRIES, [])
+        if token not in entries:
+            entries.append(token)
+            # Longest entry of the symbols first
+            entries.sort(key=lambda entry: (-len(entry), entry))
+            self._size += 1
+            self._branches.pop(path[0], None)
+
+    def remove(self, token):
+        """Remove lexicon entry from the trie.
+        Parameters
+        ----------
+        token : str
+            Lexicon entry to be removed.
+        Returns
+        -------
+        removed : bool
+            True, if the entry was in the trie.
+        """
+        path = symbols(token, self.min_length)
+        if path is None:
+            return False
+        nodes = [self._root]
+        for symbol in path:
+            node = nodes[-1].get(symbol)
+            if node is None:
+                return False
+            nodes.append(node)
+        entries = nodes[-1].get(_ENTRIES, [])
+        if token not in entries:
+            return False
+        entries.remove(token)
+        if not entries:
+            del nodes[-1][_ENTRIES]
+        # Prune nodes left without entries
+        for symbol, node, parent in zip(reversed(path), reversed(nodes), reversed(nodes[:-1])):
+            if node:
+                break
+            del parent[symbol]
+        self._size -= 1
+        self._branches.pop(path[0], None)
+        return True
+
+    def _branch(self, symbol):
+        """Return regex of the root branch of the first symbol."""
+        branch = self._branches.get(symbol)
+        if branch is None:
+            branch = (_run_regex(_char_class(symbol, strict=True))
+                      + _node_to_regex(self._root[symbol], symbol, omit=True))
+            self._branches[symbol] = branch
+        return branch
+
+    def first_chars_regex(self):
+        """Return character set regex of the first characters of variants."""
+        chars = set()
+        for symbol in self._root:
+            chars.update(_char_class(symbol, strict=True))
+        return _class_regex(''.join(sorted(chars)))
+
+    def to_regex(self, first=None):
+        r"""Return the trie as a non-capturing regular expression.
+        Parameters
+        ----------
+        first : str, optional
+            Character of text, only the branches of variants starting with it are included.
+            The regex matches the same as the whole trie at a position of this character.
+        Returns
+        -------
+        regex : str
+            String with regular expression
+        Examples
+        --------
+        >>> regex = ObfuscationTrie(['vittu', 'muta']).to_regex()
+        >>> re.findall(r'\b' + regex + r'\b', 'v.ttu ja viddu, mutta m.ta')
+        ['v.ttu', 'viddu', 'm.ta']
+        >>> re.findall(regex, 'mutta muttakin')
+        ['mutta']
+        >>> regex = ObfuscationTrie(['vittu', 'muta']).to_regex(first='w')
+        >>> re.match(regex, 'w1ttu').group(), re.match(regex, 'm.ta')
+        ('w1ttu', None)
+        """
+        symbols = sorted(self._root)
+        if first is not None:
+            # A branch starts with a character of the strict class of its symbol
+            symbols = [symbol for symbol in symbols if first in _char_class(symbol, strict=True)]
+        if not symbols:
+            return '(?!)'
+        # Plain words are skipped with the lookahead, before the branches
+        return (_plain_regex(self._plain)
+                + '(?:' + '|'.join(self._branch(symbol) for symbol in symbols) + ')')
+
+    def resolve(self, token):
+        """Return the canonical lexicon entry of an obfuscated token.
+        Of the entries the token is a variant of, the entry with the fewest
+        substituted, masked and omitted characters is returned. Plain words
+        are skipped by the regex of the trie, not here.
+        Parameters
+        ----------
+        token : str
+            Token matched by the regex of the trie.
+        Returns
+        -------
+        entry : str or None
+            Lexicon entry, or None if the token is not a variant of an entry.
+        Examples
+        --------
+        >>> trie = ObfuscationTrie(['vittu', 'viddu', 'pestä'])
+        >>> trie.resolve('v.ttu'), trie.resolve('p3sta'), trie.resolve('vitt')
+        ('vittu', 'pestä', None)
+        """
+        best = None
+        for symbol in sorted(self._root):
+            end = _run_end(token, 0, _char_class(symbol, strict=True))
+            for position in range(end, 0, -1):
+                cost = _substitutions(token, 0, position, symbol)
+                for path_cost, entry in _resolve_node(self._root[symbol], symbol, token,
+                                                      position, omit=True):
+                    if best is None or cost + path_cost < best[0]:
+                        best = (cost + path_cost, entry)
+        return None if best is None else best[1]
+
+
+def _omitted(symbol, previous, omit):
+    """Return True, if the symbol can be omitted after the previous symbol."""
+    return omit and _is_vowel(symbol) and not _is_vowel(previous)
+
+
+def _symbol_alternatives(symbol, previous, omit):
+    """Return regex of an interior symbol: the characters, a mask or an omitted vowel,
+    and the characters of text starting the alternatives.
+    """
+    chars = _char_class(symbol)
+    regex = _run_regex(chars) + '|' + _MASK_REGEX
+    first = chars + MASK_CHARS
+    if _omitted(symbol, previous, omit):
+        # Omitted only between consonants
+        regex += '|(?=' + _class_regex(_CONSONANT_CHARS) + ')'
+        first += _CONSONANT_CHARS
+    return '(?:' + regex + ')', ''.join(sorted(set(first)))
+
+
+def _node_to_regex(node, previous, omit=False):
+    """Return regex of the symbols following a trie node.
+    With omit, a vowel following the node can be omitted.
+    """
+    alternatives = []
+    for symbol in sorted(node):
+        if symbol == _ENTRIES:
+            continue
+        child = node[symbol]
+        if len(child) > 1 or _ENTRIES not in child:
+            # Longer entries first
+            regex, first = _symbol_alternatives(symbol, previous, omit)
+            alternatives.append((regex + _node_to_regex(child, symbol), first))
+        if _ENTRIES in child:
+            alternatives.append((_run_regex(_char_class(symbol, strict=True)), None))
+    if len(alternatives) == 1:
+        return alternatives[0][0]
+    # Lookahead of the first characters lets sre skip an alternative
+    # with one character set test, as alternatives starting with a character set
+    return '(?:' + '|'.join(regex if first is None else '(?=' + _class_regex(first) + ')' + regex
+                            for regex, first in alternatives) + ')'
+
+
+def _run_end(token, position, chars):
+    """Return end of the run of chars from position."""
+    while position < len(token) and token[position] in chars:
+        position += 1
+    return position
+
+
+def _substitutions(token, start, end, symbol):
+    """Return number of characters of token[start:end] other than the symbol."""
+    return sum(1 for char in token[start:end] if char != symbol)
+
+
+def _resolve_node(node, previous, token, position, omit=False):
+    """Yield (cost, entry) of the paths from node consuming the rest of the token.
+    The cost is the number of substituted, masked and omitted characters.
+    """
+    for symbol in sorted(node):
+        if symbol == _ENTRIES:
+            continue
+        child = node[symbol]
+        if len(child) > 1 or _ENTRIES not in child:
+            # Characters, mask run or omitted vowel
+            steps = [(end, _substitutions(token, position, end, symbol)) for end in
+                     range(_run_end(token, position, _char_class(symbol)), position, -1)]
+            steps += [(end, 1) for end in
+                      range(_run_end(token, position, MASK_CHARS), position, -1)]
+            if (_omitted(symbol, previous, omit) and position < len(token)
+                    and token[position] in _CONSONANT_CHARS):
+                steps.append((position, 1))
+            for end, cost in steps:
+                for path_cost, entry in _resolve_node(child, symbol, token, end):
+                    yield cost + path_cost, entry
+        if _ENTRIES in child:
+            end = _run_end(token, position, _char_class(symbol, strict=True))
+            if end > position and end == len(token):
+                yield _substitutions(token, position, end, symbol), child[_ENTRIES][0]
+
+
+class ObfuscationDict(dict):
+    """Lexicon dictionary resolving obfuscated variants of entries.
+       ----------
+       Entries are stored as in a dictionary. Lookup of a token (item
+       access and get) uses the entry of the token first, then the
+       canonical entry of an obfuscated variant (see canonical).
+    """
+
+    def __init__(self, entries=(), max_score=MAX_SCORE, min_length=MIN_LENGTH):
+        """Setup dictionary from entries.
+        Parameters
+        ----------
+        entries : dict or iterable of (str, int), optional
+            Lexicon entries with scores.
+        max_score : int, optional
+            Maximum score of entries matched with obfuscation.
+        min_length : int, optional
+            Minimum number of letters of entries matched with obfuscation.
+        """
+        dict.__init__(self, entries)
+        self.max_score = max_score
+        self.min_length = min_length
+        self._trie = None
+        self._canonical = {}
+
+    def __reduce__(self):
+        return (self.__class__, (list(self.items()), self.max_score, self.min_length))
+
+    def _changed(self):
+        self._trie = None
+        self._canonical = {}
+
+    def __setitem__(self, term, score):
+        dict.__setitem__(self, term, score)
+        self._changed()
+
+    def __delitem__(self, term):
+        dict.__delitem__(self, term)
+        self._changed()
+
+    def __missing__(self, token):
+        entry = self.canonical(token)
+        if entry is None:
+            raise KeyError(token)
+        return dict.__getitem__(self, entry)
+
+    def update(self, entries=(), **kwargs):
+        dict.update(self, entries, **kwargs)
+        self._changed()
+
+    def pop(self, term, *default):
+        self._changed()
+        return dict.pop(self, term, *default)
+
+    def get(self, token, default=None):
+        entry = self.canonical(token)
+        return default if entry is None else dict.__getitem__(self, entry)
+
+    def copy(self):
+        return self.__class__(self.items(), self.max_score, self.min_length)
+
+    @property
+    def trie(self):
+        """ObfuscationTrie of the entries, built when first needed."""
+        if self._trie is None:
+            self._trie = ObfuscationTrie(
+                obfuscation_terms(self, self.max_score, self.min_length),
+                min_length=self.min_length)
+        return self._trie
+
+    def canonical(self, token):
+        """Return lexicon entry of a token.
+        Parameters
+        ----------
+        token : str
+            Matched token, e.g. 'v.ttu'.
+        Returns
+        -------
+        entry : str or None
+            The token, if it is an entry, the canonical entry of an obfuscated
+            variant, or None.
+        Examples
+        --------
+        >>> ObfuscationDict({'vittu': -4}).canonical('w_ttu')
+        'vittu'
+        """
+        if dict.__contains__(self, token):
+            return token
+        try:
+            return self._canonical[token]
+        except KeyError:
+            entry = self._canonical[token] = self.trie.resolve(token)
+            return entry
+
+
+def false_positives(word_dict, words, plain_words=None):
+    """Return words matched as obfuscated variants of lexicon entries.
+    Words of a plain word list should not be matched, except for the entries.
+    Parameters
+    ----------
+    word_dict : dict
+        Scores of lexicon entries.
+    words : iterable of str
+        Words to be checked, e.g. AFINN_stems.plain_words().
+    plain_words : iterable of str, optional
+        Dictionary words of the trie, see ObfuscationTrie.
+    Returns
+    -------
+    matches : dict
+        Canonical lexicon entry of each matched word
+    Examples
+    --------
+    >>> lexicon = {'muta': -1, 'vittu': -4}
+    >>> false_positives(lexicon, ['mutta', 'kissa', 'muta'], plain_words=())
+    {'mutta': 'muta'}
+    >>> false_positives(lexicon, ['mutta', 'kissa', 'muta'])
+    {}
+    """
+    trie = ObfuscationTrie(obfuscation_terms(word_dict), plain_words=plain_words)
+    pattern = re.compile(r'\b' + trie.to_regex() + r'\b', flags=re.UNICODE)
+    matches = {}
+    for word in words:
+        word = word.lower()
+        if word not in word_dict and pattern.fullmatch(word):
+            matches[word] = trie.resolve(word)
+    return matches
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Check plain words matched as obfuscated variants of lexicon entries.')
+    parser.add_argument('--lexicon', default='fin_afinn_polarity_MerjasList_2023.txt',
+                        help='tab-separated word list, in the data folder or with a path')
+    parser.add_argument('--words', nargs='*', default=list(AFINN_stems.PLAIN_WORD_FILES),
+                        help='plain word lists checked')
+    args = parser.parse_args()
+
+    lexicon = args.lexicon
+    if dirname(lexicon) == '':
+        lexicon = join(dirname(__file__), 'DATA', lexicon)
+    word_dict = AFINN_stems.read_word_file(lexicon)
+    words = sorted(AFINN_stems.plain_words(args.words))
+    for name, plain_words in (('unfiltered', ()), ('plain words', None)):
+        matches = false_positives(word_dict, words, plain_words=plain_words)
+        print('%-11s  false positives %4d of %d words' % (name, len(matches), len(words)))
+        for word in sorted(matches)[:20]:
+            print('  %s -> %s (%d)' % (word, matches[word], word_dict[matches[word]]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+"""Parallel scoring of large text corpora with AFINN classes."""
+
+from __future__ import absolute_import, division, print_function
+
+"""
+# ------------------------------------------------------------------------------------------------
+
+Pattern matching in find_all is CPU-bound, so scoring of a large corpus (e.g. Suomi24)
+runs on one core. score_corpus shards the corpus to chunks, which are scored with
+bulk scoring (see AFINN_bulk.py) in a pool of worker processes.
+
+    - the AFINN object is set up once in each worker (shared by fork, or unpickled
+      from the compiled program on platforms starting new processes)
+    - chunks are read lazily from the input iterable, and at most 'prefetch' chunks per
+      worker are in flight, so memory stays bounded regardless of corpus size
+    - results are yielded in input order
+
+Example (from the AFINN-Classification folder):
+
+    from AFINNfin.AFINN_parallel import score_corpus
+    with open('corpus.txt', encoding='utf-8') as fid:
+        for score in score_corpus(fid, workers=8):
+            ...
+
+# ------------------------------------------------------------------------------------------------
+"""
+
+import multiprocessing
+from collections import deque
+from itertools import islice
+
+from . import AFINN_bulk
+
+# AFINN object of a worker process, set up by _init_worker
+_AFINN = None
+
+
+def _init_worker(afinn):
+    global _AFINN
+    _AFINN = afinn
+
+
+def _score_chunk(texts, clean_whitespace):
+    return AFINN_bulk.score_many(_AFINN, texts, clean_whitespace=clean_whitespace)
+
+
+def _chunks(texts, chunksize):
+    texts = iter(texts)
+    while True:
+        chunk = list(islice(texts, chunksize))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _default_afinn():
+    from .AFINN_scores import AfinnWords
+    return AfinnWords(language='fin')
+
+
+def score_chunks(texts, afinn=None, workers=None, chunksize=1000, prefetch=2,
+                 clean_whitespace=True):
+    """Score a corpus in chunks with a pool of worker processes.
+    Parameters
+    ----------
+    texts : iterable of str
+        Texts, e.g. list, generator or open file.
+    afinn : AfinnWords, AfinnEmoticons, AfinnEmojis or AfinnCombined, optional
+        Sentiment analyzer, default is AfinnWords(language='fin').
+    workers : int, optional
+        Number of worker processes, default is the number of CPUs.
+        With 0 or 1 the chunks are scored in this process.
+    chunksize : int, optional
+        Number of texts in a chunk.
+    prefetch : int, optional
+        Maximum number of chunks in flight per worker.
+    clean_whitespace : bool, optional
+        Change multiple whitespaces to a single.
+    Returns
+    -------
+    chunks : generator of BulkScores
+        Scores of chunks in input order, see AFINN_bulk.score_many.
+    """
+    if afinn is None:
+        afinn = _default_afinn()
+    if chunksize < 1:
+        raise ValueError('chunksize must be positive')
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+    if workers <= 1:
+        for chunk in _chunks(texts, chunksize):
+            yield AFINN_bulk.score_many(afinn, chunk, clean_whitespace=clean_whitespace)
+        return
+
+    max_pending = workers * max(prefetch, 1)
+    pool = multiprocessing.Pool(workers, initializer=_init_worker, initargs=(afinn,))
+    try:
+        # Pool.imap would consume the whole input iterable at once,
+        # so chunks are submitted one by one within a bounded window
+        pending = deque()
+        for chunk in _chunks(texts, chunksize):
+            pending.append(pool.apply_async(_score_chunk, (chunk, clean_whitespace)))
+            if len(pending) >= max_pending:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def score_corpus(texts, afinn=None, workers=None, chunksize=1000, prefetch=2,
+                 clean_whitespace=True):
+    """Score a corpus with a pool of worker processes.
+    Parameters
+    ----------
+    texts : iterable of str
+        Texts, e.g. list, generator or open file.
+    afinn : AfinnWords, AfinnEmoticons, AfinnEmojis or AfinnCombined, optional
+        Sentiment analyzer, default is AfinnWords(language='fin').
+    workers : int, optional
+        Number of worker processes, default is the number of CPUs.
+        With 0 or 1 the texts are scored in this process.
+    chunksize : int, optional
+        Number of texts sent to a worker at a time.
+    prefetch : int, optional
+        Maximum number of chunks in flight per worker.
+    clean_whitespace : bool, optional
+        Change multiple whitespaces to a single.
+    Returns
+    -------
+    scores : generator of float
+        Sentiment analysis score of each text, in input order.
+    """
+    for chunk in score_chunks(texts, afinn=afinn, workers=workers, chunksize=chunksize,
+                              prefetch=prefetch, clean_whitespace=clean_whitespace):
+        for score in chunk.score.tolist():
+            yield score
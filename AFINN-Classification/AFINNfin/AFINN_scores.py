@@ -62,6 +62,11 @@ to enable text sample matching with emoticons or emojis only.
      - AFinnEmoticons class has 'emoticons_only' flag
      - AFinnEmojis class has 'emojis only' flag
 
+New 'engine' flag was added to all classes.
+The default 'trie' engine compiles the lexicons into character tries (see AFINN_matcher.py),
+which gives the same matches as the original 're' engine (one long regex alternation) much faster.
+     - engine='trie' (default) or engine='re'
+
 # ------------------------------------------------------------------------------------------------
 """
 
@@ -69,6 +74,12 @@ import codecs
 import re
 from os.path import dirname, join
 
+import numpy as np
+
+from . import (AFINN_bulk, AFINN_cache, AFINN_emojis, AFINN_mmap, AFINN_multilabel,
+               AFINN_obfuscation, AFINN_stats, AFINN_stems, AFINN_tokens)
+from .AFINN_matcher import longest_token_at, make_matcher
+
 LANGUAGE_TO_FILENAME = {
     #'emoticons': 'AFINN-emoticon-8.txt',
     #'emoticons': 'afinn_emoticon_binary_MerjasList_2023.txt',
@@ -85,6 +96,11 @@ LANGUAGE_TO_FILENAME = {
     'emojis': 'afinn_emoji_polarity_merja2023.txt',
     }
 
+# Word lists with 'stem*' entries, read with the stems flag (see AFINN_stems.py)
+LANGUAGE_TO_STEM_FILENAME = {
+    'fin': 'fin_afinn_polarity_stems_MerjasList_2023.txt',
+    }
+
 class AfinnException(Exception):
     """Base for exceptions raised in this module."""
 
@@ -99,7 +115,11 @@ class AfinnEmoticons(object):
     """Sentiment analyzer. The text input should be in Unicode.
     """
 
-    def __init__(self, language="en", emoticons=False, emoticons_only=False, word_boundary=True):
+    # Scoring statistics, see enable_stats
+    stats = None
+
+    def __init__(self, language="en", emoticons=False, emoticons_only=False, word_boundary=True,
+                 engine='trie', cache=True):
         """Setup dictionary from data file.
         The language parameter can be set to English (en) or Danish (da).
         Parameters
@@ -110,26 +130,39 @@ class AfinnEmoticons(object):
             Includes emoticons in the token list
         word_boundary : bool, optional
             Use word boundary match in the regular expression.
+        engine : 'trie' or 're', optional
+            Matching engine, see AFINN_matcher.py.
+        cache : bool, optional
+            Load the dictionary and matcher from cache, see AFINN_cache.py.
         """
 
         filename = LANGUAGE_TO_FILENAME[language]
         full_filename = self.full_filename(filename)
-        
-        regex_words = ""
-        regex_emoticons = ""        
+        self._engine = engine
+
+        channels = []
 
         # Sanity check to make sure that if emoticons_only is True, then emoticons is set True
         if emoticons_only:
             if not emoticons:
                 emoticons = True                
 
-        if emoticons:
+        cached = None
+        if cache:
+            filename_emoticons = LANGUAGE_TO_FILENAME['emoticons']
+            cache_key = AFINN_cache.lexicon_key(
+                'AfinnEmoticons', [full_filename, self.full_filename(filename_emoticons)],
+                emoticons=emoticons, emoticons_only=emoticons_only,
+                word_boundary=word_boundary, engine=engine)
+            cached = AFINN_cache.load(cache_key)
+
+        if cached is not None:
+            self._dict, self._pattern = cached
+        elif emoticons:
             # Words
             if not emoticons_only:
                 self._dict = self.read_word_file(full_filename)
-                regex_words = self.regex_from_tokens(
-                    list(self._dict),
-                    word_boundary=False, capture=False)            
+                channels.append((list(self._dict), False))
 
             # Emoticons
             filename_emoticons = LANGUAGE_TO_FILENAME['emoticons']
@@ -139,19 +172,18 @@ class AfinnEmoticons(object):
                 self._dict.update(emoticons_and_score)
             else:
                 self._dict = emoticons_and_score
-            regex_emoticons = self.regex_from_tokens(
-                list(emoticons_and_score), word_boundary=False, capture=False)
-
-            # Combined words and emoticon regular expression
-            if len(regex_words) > 0 and len(regex_emoticons) > 0:
-                regex = '(' + regex_words + '|' + regex_emoticons + ')'
-            elif len(regex_emoticons) > 0 and len(regex_words) == 0:
-                regex = '(' + regex_emoticons + ')'
-            self._setup_pattern_from_regex(regex)        
+            channels.append((list(emoticons_and_score), False))
+
+            # Combined words and emoticon matcher
+            self._setup_pattern_from_channels(channels)
         else:
             self.setup_from_file(full_filename, word_boundary=word_boundary)
 
+        if cache and cached is None:
+            AFINN_cache.save(cache_key, (self._dict, self._pattern))
+
         self._word_pattern = re.compile('\w+', flags=re.UNICODE)
+        self._ngram_index = None
     
     def data_dir(self):
         """Return directory where the text files are.
@@ -167,9 +199,9 @@ class AfinnEmoticons(object):
         >>> path = afinn.data_dir()
         >>> from os.path import split
         >>> split(path)[-1]
-        'data'
+        'DATA'
         """
-        return join(dirname(__file__), 'data')
+        return join(dirname(__file__), 'DATA')
 
     def full_filename(self, filename):
         """Return filename with full with data directory.
@@ -224,7 +256,8 @@ class AfinnEmoticons(object):
                 except ValueError:
                     msg = 'Error in line %d of %s' % (n + 1, filename)
                     raise WordListReadingError(msg)
-                word_dict[word] = int(score)
+                # Terms are stripped, e.g. 'oiva ' of the binary and trinary lists
+                word_dict[word.strip()] = int(score)
         return word_dict
 
     @staticmethod
@@ -272,19 +305,25 @@ class AfinnEmoticons(object):
         """Set internal variable from regex string."""
         self._pattern = re.compile(regex, flags=re.UNICODE)
 
+    def _setup_pattern_from_channels(self, channels):
+        """Set internal matcher from lexicon channels.
+        Parameters
+        ----------
+        channels : list of (list of str, bool)
+            Lexicon tokens and word boundary flag for each channel,
+            in the order of matching precedence.
+        """
+        self._pattern = make_matcher(channels, engine=self._engine)
+
     def _setup_pattern_from_dict(self, word_boundary=True):
         """Pattern for identification of words from data files.
-        Setup of regular expression pattern for matching phrases from the data
-        files.
+        Setup of matcher for matching phrases from the data files.
         Parameters
         ----------
         word_boundary : bool, optional
             Add word boundary match to the regular expression
         """
-        regex = self.regex_from_tokens(
-            list(self._dict),
-            word_boundary=word_boundary)
-        self._setup_pattern_from_regex(regex)
+        self._setup_pattern_from_channels([(list(self._dict), word_boundary)])
 
     def find_all(self, text, clean_whitespace=True):
         """Find all tokens in a text matching the dictionary.
@@ -400,6 +439,168 @@ class AfinnEmoticons(object):
         score = float(sum(word_scores))
         return score
 
+    def scores_many(self, texts, clean_whitespace=True):
+        """Score many texts based on pattern matching.
+        All texts are matched in one scan, see AFINN_bulk.py.
+        Parameters
+        ----------
+        texts : iterable of str
+            Texts to be analyzed for sentiment, e.g. list or pandas Series.
+        clean_whitespace : bool, optional
+            Change multiple whitespaces to a single.
+        Returns
+        -------
+        offsets : numpy.ndarray of int64
+            Offsets of texts in values, length is number of texts + 1.
+        values : numpy.ndarray of int32
+            Sentiment analysis scores of matched words,
+            values[offsets[i]:offsets[i + 1]] are the scores for texts[i].
+        """
+        return AFINN_bulk.scores_many(self, texts, clean_whitespace=clean_whitespace)
+
+    def score_many(self, texts, clean_whitespace=True):
+        """Score many texts based on pattern matching.
+        Parameters
+        ----------
+        texts : iterable of str
+            Texts to be analyzed for sentiment, e.g. list or pandas Series.
+        clean_whitespace : bool, optional
+            Change multiple whitespaces to a single.
+        Returns
+        -------
+        scores : AFINN_bulk.BulkScores
+            Named tuple of arrays with sum of scores (score), number of matched
+            words (hits), sum of positive scores (positive) and sum of negative
+            scores (negative) for each text.
+        Examples
+        --------
+        >>> afinn = AfinnWords(language='fin')
+        >>> afinn.score_many(df['sample']).score
+        """
+        return AFINN_bulk.score_many(self, texts, clean_whitespace=clean_whitespace)
+
+    def scores_from_tokens(self, tokens):
+        """Score pre-tokenized text based on dictionary lookup.
+        Each token is looked up from the dictionary, and multi-word entries
+        are matched with an n-gram window, see AFINN_tokens.py.
+        The tokens are automatically lower-cased.
+        Parameters
+        ----------
+        tokens : list of str
+            Tokens of text, e.g. from casual_tokenize.
+        Returns
+        -------
+        scores : list of int
+            Sentiment analysis scores for matched tokens
+        Examples
+        --------
+        >>> afinn = AfinnWords(language='fin')
+        >>> afinn.scores_from_tokens(['Vitun', 'pelle', 'ja', 'hieno'])
+        [-4, 3]
+        """
+        if self._ngram_index is None:
+            self._ngram_index = AFINN_tokens.ngram_index(self._dict)
+        return AFINN_tokens.scores_from_tokens(self._dict, self._ngram_index, tokens)
+
+    def score_from_tokens(self, tokens):
+        """Score pre-tokenized text based on dictionary lookup.
+        Parameters
+        ----------
+        tokens : list of str
+            Tokens of text, e.g. from casual_tokenize.
+        Returns
+        -------
+        score : float
+            Sentiment analysis score for text
+        """
+        return float(sum(self.scores_from_tokens(tokens)))
+
+    def _copy_lexicon(self):
+        """Copy the dictionary and matcher before the first change.
+        They may be shared with other objects through the cache.
+        """
+        if not getattr(self, '_lexicon_copied', False):
+            self._dict = self._dict.copy()
+            self._pattern = self._pattern.copy()
+            self._lexicon_copied = True
+
+    def add_terms(self, terms, channel=0):
+        """Add terms to the dictionary and to the matcher.
+        The terms are matched through the overlay of edits of the matcher,
+        without compiling the whole lexicon again, see AFINN_matcher.py.
+        Parameters
+        ----------
+        terms : dict
+            Scores of the terms. Terms should be lowercase,
+            as text is lowercased before matching.
+        channel : int, optional
+            Index of the matcher channel of the terms,
+            e.g. 1 for emoticons when words are matched first.
+        Examples
+        --------
+        >>> afinn = AfinnWords(language='fin')
+        >>> afinn.add_terms({'vitun hölmö': -4})
+        >>> afinn.find_all('Vitun hölmö')
+        ['vitun hölmö']
+        """
+        terms = dict(terms)
+        self._copy_lexicon()
+        self._dict.update(terms)
+        self._pattern.add_tokens(terms, channel=channel)
+        self._ngram_index = None
+
+    def remove_terms(self, terms):
+        """Remove terms from the dictionary and from the matcher.
+        The matcher skips the removed terms through its overlay of edits, see AFINN_matcher.py.
+        Parameters
+        ----------
+        terms : iterable of str
+            Terms to be removed. Missing terms are ignored.
+        """
+        terms = set(terms)
+        self._copy_lexicon()
+        for term in terms:
+            self._dict.pop(term, None)
+        self._pattern.remove_tokens(terms)
+        self._ngram_index = None
+
+    def update_scores(self, terms):
+        """Change scores of terms in the dictionary.
+        The matcher is not changed.
+        Parameters
+        ----------
+        terms : dict
+            New scores of the terms.
+        """
+        terms = dict(terms)
+        for term in terms:
+            if term not in self._dict:
+                raise KeyError('%r is not in the dictionary, use add_terms' % term)
+        self._copy_lexicon()
+        self._dict.update(terms)
+
+    def enable_stats(self, max_samples=AFINN_stats.MAX_SAMPLES):
+        """Start collecting match counters and timing of scoring, see AFINN_stats.py.
+        Parameters
+        ----------
+        max_samples : int, optional
+            Maximum number of zero-hit documents kept as samples.
+        Returns
+        -------
+        stats : ScoringStats
+            Statistics with snapshot, to_json and reset methods.
+        """
+        return AFINN_stats.enable_stats(self, max_samples=max_samples)
+
+    def disable_stats(self):
+        """Stop collecting scoring statistics.
+        Returns
+        -------
+        stats : ScoringStats or None
+            The collected statistics.
+        """
+        return AFINN_stats.disable_stats(self)
+
     score = score_with_pattern
 
     scores = scores_with_pattern
@@ -417,7 +618,15 @@ class AfinnWords(object):
 
     """
 
-    def __init__(self, language="en", word_boundary=True):
+    _stems = False
+
+    _obfuscation = False
+
+    # Scoring statistics, see enable_stats
+    stats = None
+
+    def __init__(self, language="en", word_boundary=True, engine='trie', cache=True, stems=False,
+                 obfuscation=False):
         """Setup dictionary from data file.
         The language parameter can be set to English (en) or Danish (da).
         Parameters
@@ -428,24 +637,53 @@ class AfinnWords(object):
             Includes emoticons in the token list
         word_boundary : bool, optional
             Use word boundary match in the regular expression.
+        engine : 'trie' or 're', optional
+            Matching engine, see AFINN_matcher.py.
+        cache : bool, optional
+            Load the dictionary and matcher from cache, see AFINN_cache.py.
+        stems : bool, optional
+            Read the word list with 'stem*' entries of the language (LANGUAGE_TO_STEM_FILENAME,
+            the word list of the language if it has none), see AFINN_stems.py.
+        obfuscation : bool, optional
+            Match also masked and leetspeak variants of words (e.g. 'v.ttu'),
+            see AFINN_obfuscation.py.
         """
-        filename = LANGUAGE_TO_FILENAME[language]
+        if stems and obfuscation:
+            raise ValueError('stems and obfuscation cannot be used together')
+        if stems:
+            filename = LANGUAGE_TO_STEM_FILENAME.get(language, LANGUAGE_TO_FILENAME[language])
+        else:
+            filename = LANGUAGE_TO_FILENAME[language]
         full_filename = self.full_filename(filename)
+        self._engine = engine
+        self._stems = stems
+        self._obfuscation = obfuscation
+
+        cached = None
+        if cache:
+            cache_key = AFINN_cache.lexicon_key(
+                'AfinnWords', [full_filename],
+                word_boundary=word_boundary, engine=engine, stems=stems,
+                obfuscation=obfuscation)
+            cached = AFINN_cache.load(cache_key)
+
         # ------------------------------------------------------------------
         # changes in original method
-        if not word_boundary:
+        if cached is not None:
+            self._dict, self._pattern = cached
+        elif not word_boundary:
             
-            self._dict = self.read_word_file(full_filename)
-            regex_words = self.regex_from_tokens(
-                    list(self._dict),
-                    word_boundary=False, capture=False) 
-            regex = '(' + regex_words + ')'
-            self._setup_pattern_from_regex(regex) 
+            self._dict = self._lexicon_dict(self.read_word_file(full_filename))
+            self._setup_pattern_from_dict(word_boundary=False)
         else:
             self.setup_from_file(full_filename, word_boundary=word_boundary)
         # ------------------------------------------------------------------
 
+        if cache and cached is None:
+            AFINN_cache.save(cache_key, (self._dict, self._pattern))
+
         self._word_pattern = re.compile('\w+', flags=re.UNICODE)
+        self._ngram_index = None
      
     def data_dir(self):
         """Return directory where the text files are.
@@ -461,9 +699,9 @@ class AfinnWords(object):
         >>> path = afinn.data_dir()
         >>> from os.path import split
         >>> split(path)[-1]
-        'data'
+        'DATA'
         """
-        return join(dirname(__file__), 'data')
+        return join(dirname(__file__), 'DATA')
 
     def full_filename(self, filename):
         """Return filename with full with data directory.
@@ -495,9 +733,17 @@ class AfinnWords(object):
         filename : str
             Full filename.
         """
-        self._dict = self.read_word_file(filename)
+        self._dict = self._lexicon_dict(self.read_word_file(filename))
         self._setup_pattern_from_dict(word_boundary=word_boundary)
 
+    def _lexicon_dict(self, word_dict):
+        """Return dictionary of the lexicon with stem or obfuscated variant lookup."""
+        if self._stems:
+            return AFINN_stems.StemDict(word_dict)
+        if self._obfuscation:
+            return AFINN_obfuscation.ObfuscationDict(word_dict)
+        return word_dict
+
     @staticmethod
     def read_word_file(filename):
         """Read data from tab-separated file.
@@ -518,7 +764,8 @@ class AfinnWords(object):
                 except ValueError:
                     msg = 'Error in line %d of %s' % (n + 1, filename)
                     raise WordListReadingError(msg)
-                word_dict[word] = int(score)
+                # Terms are stripped, e.g. 'oiva ' of the binary and trinary lists
+                word_dict[word.strip()] = int(score)
         return word_dict
 
     @staticmethod
@@ -566,19 +813,31 @@ class AfinnWords(object):
         """Set internal variable from regex string."""
         self._pattern = re.compile(regex, flags=re.UNICODE)
 
+    def _setup_pattern_from_channels(self, channels):
+        """Set internal matcher from lexicon channels.
+        Parameters
+        ----------
+        channels : list of (list of str, bool)
+            Lexicon tokens and word boundary flag for each channel,
+            in the order of matching precedence.
+        """
+        self._pattern = make_matcher(channels, engine=self._engine,
+                                     stem_channels=(0,) if self._stems else (),
+                                     obfuscated_channels=(1,) if self._obfuscation else ())
+
     def _setup_pattern_from_dict(self, word_boundary=True):
         """Pattern for identification of words from data files.
-        Setup of regular expression pattern for matching phrases from the data
-        files.
+        Setup of matcher for matching phrases from the data files.
         Parameters
         ----------
         word_boundary : bool, optional
             Add word boundary match to the regular expression
         """
-        regex = self.regex_from_tokens(
-            list(self._dict),
-            word_boundary=word_boundary)
-        self._setup_pattern_from_regex(regex)
+        channels = [(list(self._dict), word_boundary)]
+        if self._obfuscation:
+            # Variants are matched only where no word of the lexicon matches
+            channels.append((AFINN_obfuscation.obfuscation_terms(self._dict), word_boundary))
+        self._setup_pattern_from_channels(channels)
 
     def find_all(self, text, clean_whitespace=True):
         """Find all tokens in a text matching the dictionary.
@@ -603,10 +862,16 @@ class AfinnWords(object):
         >>> afinn = Afinn(emoticons=True)
         >>> afinn.find_all('It is wonderful :)')
         ['wonderful', ':)']
+        >>> afinn = AfinnWords(language='fin', obfuscation=True, word_boundary=False)
+        >>> afinn.find_all('muttakin mutta v.ttu')
+        ['muta', 'vittu']
         """
         if clean_whitespace:
             text = re.sub(r"\s+", " ", text)
         words = self._pattern.findall(text.lower()) 
+        if self._obfuscation:
+            # Obfuscated variants are reported as their lexicon entries
+            words = [self._dict.canonical(word) for word in words]
         return words
 
     def split(self, text):
@@ -691,6 +956,188 @@ class AfinnWords(object):
         score = float(sum(word_scores))
         return score
 
+    def scores_many(self, texts, clean_whitespace=True):
+        """Score many texts based on pattern matching.
+        All texts are matched in one scan, see AFINN_bulk.py.
+        Parameters
+        ----------
+        texts : iterable of str
+            Texts to be analyzed for sentiment, e.g. list or pandas Series.
+        clean_whitespace : bool, optional
+            Change multiple whitespaces to a single.
+        Returns
+        -------
+        offsets : numpy.ndarray of int64
+            Offsets of texts in values, length is number of texts + 1.
+        values : numpy.ndarray of int32
+            Sentiment analysis scores of matched words,
+            values[offsets[i]:offsets[i + 1]] are the scores for texts[i].
+        """
+        return AFINN_bulk.scores_many(self, texts, clean_whitespace=clean_whitespace)
+
+    def score_many(self, texts, clean_whitespace=True):
+        """Score many texts based on pattern matching.
+        Parameters
+        ----------
+        texts : iterable of str
+            Texts to be analyzed for sentiment, e.g. list or pandas Series.
+        clean_whitespace : bool, optional
+            Change multiple whitespaces to a single.
+        Returns
+        -------
+        scores : AFINN_bulk.BulkScores
+            Named tuple of arrays with sum of scores (score), number of matched
+            words (hits), sum of positive scores (positive) and sum of negative
+            scores (negative) for each text.
+        Examples
+        --------
+        >>> afinn = AfinnWords(language='fin')
+        >>> afinn.score_many(df['sample']).score
+        """
+        return AFINN_bulk.score_many(self, texts, clean_whitespace=clean_whitespace)
+
+    def scores_from_tokens(self, tokens):
+        """Score pre-tokenized text based on dictionary lookup.
+        Each token is looked up from the dictionary, and multi-word entries
+        are matched with an n-gram window, see AFINN_tokens.py.
+        The tokens are automatically lower-cased.
+        Parameters
+        ----------
+        tokens : list of str
+            Tokens of text, e.g. from casual_tokenize.
+        Returns
+        -------
+        scores : list of int
+            Sentiment analysis scores for matched tokens
+        Examples
+        --------
+        >>> afinn = AfinnWords(language='fin')
+        >>> afinn.scores_from_tokens(['Vitun', 'pelle', 'ja', 'hieno'])
+        [-4, 3]
+        """
+        if self._ngram_index is None:
+            self._ngram_index = AFINN_tokens.ngram_index(self._dict)
+        return AFINN_tokens.scores_from_tokens(self._dict, self._ngram_index, tokens)
+
+    def score_from_tokens(self, tokens):
+        """Score pre-tokenized text based on dictionary lookup.
+        Parameters
+        ----------
+        tokens : list of str
+            Tokens of text, e.g. from casual_tokenize.
+        Returns
+        -------
+        score : float
+            Sentiment analysis score for text
+        """
+        return float(sum(self.scores_from_tokens(tokens)))
+
+    def _copy_lexicon(self):
+        """Copy the dictionary and matcher before the first change.
+        They may be shared with other objects through the cache.
+        """
+        if not getattr(self, '_lexicon_copied', False):
+            self._dict = self._dict.copy()
+            self._pattern = self._pattern.copy()
+            self._lexicon_copied = True
+
+    def add_terms(self, terms, channel=0):
+        """Add terms to the dictionary and to the matcher.
+        The terms are matched through the overlay of edits of the matcher,
+        without compiling the whole lexicon again, see AFINN_matcher.py.
+        Parameters
+        ----------
+        terms : dict
+            Scores of the terms. Terms should be lowercase,
+            as text is lowercased before matching.
+        channel : int, optional
+            Index of the matcher channel of the terms,
+            e.g. 1 for emoticons when words are matched first.
+        Examples
+        --------
+        >>> afinn = AfinnWords(language='fin')
+        >>> afinn.add_terms({'vitun hölmö': -4})
+        >>> afinn.find_all('Vitun hölmö')
+        ['vitun hölmö']
+        """
+        terms = dict(terms)
+        self._copy_lexicon()
+        self._dict.update(terms)
+        self._pattern.add_tokens(terms, channel=channel)
+        if self._obfuscation and channel == 0:
+            variants = AFINN_obfuscation.obfuscation_terms(terms)
+            if variants:
+                self._pattern.add_tokens(variants, channel=1)
+        self._ngram_index = None
+
+    def remove_terms(self, terms):
+        """Remove terms from the dictionary and from the matcher.
+        The matcher skips the removed terms through its overlay of edits, see AFINN_matcher.py.
+        Parameters
+        ----------
+        terms : iterable of str
+            Terms to be removed. Missing terms are ignored.
+        """
+        terms = set(terms)
+        self._copy_lexicon()
+        for term in terms:
+            self._dict.pop(term, None)
+        self._pattern.remove_tokens(terms)
+        self._ngram_index = None
+
+    def update_scores(self, terms):
+        """Change scores of terms in the dictionary.
+        The matcher is not changed, except for terms matched with obfuscation
+        before or after the change.
+        Parameters
+        ----------
+        terms : dict
+            New scores of the terms.
+        """
+        terms = dict(terms)
+        for term in terms:
+            if term not in self._dict:
+                raise KeyError('%r is not in the dictionary, use add_terms' % term)
+        self._copy_lexicon()
+        self._dict.update(terms)
+        if self._obfuscation:
+            self._update_variants(terms)
+
+    def _update_variants(self, terms):
+        """Move terms to or from the channel of obfuscated variants after score changes."""
+        variants = set(self._pattern.channels[1][0])
+        matched = set(AFINN_obfuscation.obfuscation_terms(terms))
+        removed = [term for term in terms if term in variants and term not in matched]
+        if removed:
+            # Tokens are removed from all channels
+            self._pattern.remove_tokens(removed)
+            self._pattern.add_tokens(removed, channel=0)
+        added = [term for term in matched if term not in variants]
+        if added:
+            self._pattern.add_tokens(added, channel=1)
+
+    def enable_stats(self, max_samples=AFINN_stats.MAX_SAMPLES):
+        """Start collecting match counters and timing of scoring, see AFINN_stats.py.
+        Parameters
+        ----------
+        max_samples : int, optional
+            Maximum number of zero-hit documents kept as samples.
+        Returns
+        -------
+        stats : ScoringStats
+            Statistics with snapshot, to_json and reset methods.
+        """
+        return AFINN_stats.enable_stats(self, max_samples=max_samples)
+
+    def disable_stats(self):
+        """Stop collecting scoring statistics.
+        Returns
+        -------
+        stats : ScoringStats or None
+            The collected statistics.
+        """
+        return AFINN_stats.disable_stats(self)
+
     score = score_with_pattern
 
     scores = scores_with_pattern
@@ -699,7 +1146,11 @@ class AfinnEmojis(object):
     """Sentiment analyzer. The text input should be in Unicode.
     """
 
-    def __init__(self, language="en", emojis=False, emojis_only=False, word_boundary=True):
+    # Scoring statistics, see enable_stats
+    stats = None
+
+    def __init__(self, language="en", emojis=False, emojis_only=False, word_boundary=True,
+                 engine='trie', cache=True, graphemes=False):
         """Setup dictionary from data file.
         The language parameter can be set to English (en) or Danish (da).
         Parameters
@@ -710,26 +1161,45 @@ class AfinnEmojis(object):
             Includes emoticons in the token list
         word_boundary : bool, optional
             Use word boundary match in the regular expression.
+        engine : 'trie' or 're', optional
+            Matching engine, see AFINN_matcher.py.
+        cache : bool, optional
+            Load the dictionary and matcher from cache, see AFINN_cache.py.
+        graphemes : bool, optional
+            Match emojis of raw text by grapheme clusters and table lookup,
+            instead of the names of demojized text, see AFINN_emojis.py.
         """
 
         filename = LANGUAGE_TO_FILENAME[language]
         full_filename = self.full_filename(filename)
-        
-        regex_words = ""
-        regex_emojis = ""        
+        self._engine = engine
+
+        channels = []
 
         # Sanity check to make sure that if emojis_only is True
         if emojis_only:
             if not emojis:
                 emojis = True                
+        if graphemes:
+            emojis = True
 
-        if emojis:
+        cached = None
+        if cache:
+            filename_emojis = LANGUAGE_TO_FILENAME['emojis']
+            cache_key = AFINN_cache.lexicon_key(
+                'AfinnEmojis', [full_filename, self.full_filename(filename_emojis)],
+                emojis=emojis, emojis_only=emojis_only,
+                word_boundary=word_boundary, engine=engine, graphemes=graphemes,
+                emoji_version=AFINN_emojis.EMOJI_VERSION if graphemes else None)
+            cached = AFINN_cache.load(cache_key)
+
+        if cached is not None:
+            self._dict, self._pattern = cached
+        elif emojis:
             # Words
             if not emojis_only:
                 self._dict = self.read_word_file(full_filename)
-                regex_words = self.regex_from_tokens(
-                    list(self._dict),
-                    word_boundary=True, capture=False)            
+                channels.append((list(self._dict), True))
 
             # Emoticons
             filename_emojis = LANGUAGE_TO_FILENAME['emojis']
@@ -739,20 +1209,28 @@ class AfinnEmojis(object):
                 self._dict.update(emojis_and_score)
             else:
                 self._dict = emojis_and_score
-            regex_emojis = self.regex_from_tokens(
-                list(emojis_and_score), word_boundary=False,
-                capture=False)
-
-            # Combined words and emoticon regular expression
-            if len(regex_words) > 0 and len(regex_emojis) > 0:
-                regex = '(' + regex_words + '|' + regex_emojis + ')'
-            elif len(regex_emojis) > 0 and len(regex_words) == 0:
-                regex = '(' + regex_emojis + ')'
-            self._setup_pattern_from_regex(regex)        
+
+            if graphemes:
+                # Emojis by grapheme clusters, words with the matcher
+                words = None
+                if channels:
+                    self._setup_pattern_from_channels(channels)
+                    words = self._pattern
+                self._pattern = AFINN_emojis.EmojiMatcher(
+                    list(emojis_and_score), matcher=words, channel=len(channels))
+            else:
+                channels.append((list(emojis_and_score), False))
+
+                # Combined words and emoji matcher
+                self._setup_pattern_from_channels(channels)
         else:
             self.setup_from_file(full_filename, word_boundary=word_boundary)
 
+        if cache and cached is None:
+            AFINN_cache.save(cache_key, (self._dict, self._pattern))
+
         self._word_pattern = re.compile('\w+', flags=re.UNICODE)
+        self._ngram_index = None
 
     def data_dir(self):
         """Return directory where the text files are.
@@ -768,9 +1246,9 @@ class AfinnEmojis(object):
         >>> path = afinn.data_dir()
         >>> from os.path import split
         >>> split(path)[-1]
-        'data'
+        'DATA'
         """
-        return join(dirname(__file__), 'data')
+        return join(dirname(__file__), 'DATA')
 
     def full_filename(self, filename):
         """Return filename with full with data directory.
@@ -825,7 +1303,8 @@ class AfinnEmojis(object):
                 except ValueError:
                     msg = 'Error in line %d of %s' % (n + 1, filename)
                     raise WordListReadingError(msg)
-                word_dict[word] = int(score)
+                # Terms are stripped, e.g. 'oiva ' of the binary and trinary lists
+                word_dict[word.strip()] = int(score)
         return word_dict
 
     @staticmethod
@@ -873,19 +1352,25 @@ class AfinnEmojis(object):
         """Set internal variable from regex string."""
         self._pattern = re.compile(regex, flags=re.UNICODE)
 
+    def _setup_pattern_from_channels(self, channels):
+        """Set internal matcher from lexicon channels.
+        Parameters
+        ----------
+        channels : list of (list of str, bool)
+            Lexicon tokens and word boundary flag for each channel,
+            in the order of matching precedence.
+        """
+        self._pattern = make_matcher(channels, engine=self._engine)
+
     def _setup_pattern_from_dict(self, word_boundary=True):
         """Pattern for identification of words from data files.
-        Setup of regular expression pattern for matching phrases from the data
-        files.
+        Setup of matcher for matching phrases from the data files.
         Parameters
         ----------
         word_boundary : bool, optional
             Add word boundary match to the regular expression
         """
-        regex = self.regex_from_tokens(
-            list(self._dict),
-            word_boundary=word_boundary)
-        self._setup_pattern_from_regex(regex)
+        self._setup_pattern_from_channels([(list(self._dict), word_boundary)])
 
     def find_all(self, text, clean_whitespace=True):
         """Find all tokens in a text matching the dictionary.
@@ -998,7 +1483,826 @@ class AfinnEmojis(object):
         score = float(sum(word_scores))
         return score
 
+    def scores_many(self, texts, clean_whitespace=True):
+        """Score many texts based on pattern matching.
+        All texts are matched in one scan, see AFINN_bulk.py.
+        Parameters
+        ----------
+        texts : iterable of str
+            Texts to be analyzed for sentiment, e.g. list or pandas Series.
+        clean_whitespace : bool, optional
+            Change multiple whitespaces to a single.
+        Returns
+        -------
+        offsets : numpy.ndarray of int64
+            Offsets of texts in values, length is number of texts + 1.
+        values : numpy.ndarray of int32
+            Sentiment analysis scores of matched words,
+            values[offsets[i]:offsets[i + 1]] are the scores for texts[i].
+        """
+        return AFINN_bulk.scores_many(self, texts, clean_whitespace=clean_whitespace)
+
+    def score_many(self, texts, clean_whitespace=True):
+        """Score many texts based on pattern matching.
+        Parameters
+        ----------
+        texts : iterable of str
+            Texts to be analyzed for sentiment, e.g. list or pandas Series.
+        clean_whitespace : bool, optional
+            Change multiple whitespaces to a single.
+        Returns
+        -------
+        scores : AFINN_bulk.BulkScores
+            Named tuple of arrays with sum of scores (score), number of matched
+            words (hits), sum of positive scores (positive) and sum of negative
+            scores (negative) for each text.
+        Examples
+        --------
+        >>> afinn = AfinnWords(language='fin')
+        >>> afinn.score_many(df['sample']).score
+        """
+        return AFINN_bulk.score_many(self, texts, clean_whitespace=clean_whitespace)
+
+    def scores_from_tokens(self, tokens):
+        """Score pre-tokenized text based on dictionary lookup.
+        Each token is looked up from the dictionary, and multi-word entries
+        are matched with an n-gram window, see AFINN_tokens.py.
+        The tokens are automatically lower-cased.
+        Parameters
+        ----------
+        tokens : list of str
+            Tokens of text, e.g. from casual_tokenize.
+        Returns
+        -------
+        scores : list of int
+            Sentiment analysis scores for matched tokens
+        Examples
+        --------
+        >>> afinn = AfinnWords(language='fin')
+        >>> afinn.scores_from_tokens(['Vitun', 'pelle', 'ja', 'hieno'])
+        [-4, 3]
+        """
+        if self._ngram_index is None:
+            self._ngram_index = AFINN_tokens.ngram_index(self._dict)
+        return AFINN_tokens.scores_from_tokens(self._dict, self._ngram_index, tokens)
+
+    def score_from_tokens(self, tokens):
+        """Score pre-tokenized text based on dictionary lookup.
+        Parameters
+        ----------
+        tokens : list of str
+            Tokens of text, e.g. from casual_tokenize.
+        Returns
+        -------
+        score : float
+            Sentiment analysis score for text
+        """
+        return float(sum(self.scores_from_tokens(tokens)))
+
+    def _copy_lexicon(self):
+        """Copy the dictionary and matcher before the first change.
+        They may be shared with other objects through the cache.
+        """
+        if not getattr(self, '_lexicon_copied', False):
+            self._dict = self._dict.copy()
+            self._pattern = self._pattern.copy()
+            self._lexicon_copied = True
+
+    def add_terms(self, terms, channel=0):
+        """Add terms to the dictionary and to the matcher.
+        The terms are matched through the overlay of edits of the matcher,
+        without compiling the whole lexicon again, see AFINN_matcher.py.
+        Parameters
+        ----------
+        terms : dict
+            Scores of the terms. Terms should be lowercase,
+            as text is lowercased before matching.
+        channel : int, optional
+            Index of the matcher channel of the terms,
+            e.g. 1 for emoticons when words are matched first.
+        Examples
+        --------
+        >>> afinn = AfinnWords(language='fin')
+        >>> afinn.add_terms({'vitun hölmö': -4})
+        >>> afinn.find_all('Vitun hölmö')
+        ['vitun hölmö']
+        """
+        terms = dict(terms)
+        self._copy_lexicon()
+        self._dict.update(terms)
+        self._pattern.add_tokens(terms, channel=channel)
+        self._ngram_index = None
+
+    def remove_terms(self, terms):
+        """Remove terms from the dictionary and from the matcher.
+        The matcher skips the removed terms through its overlay of edits, see AFINN_matcher.py.
+        Parameters
+        ----------
+        terms : iterable of str
+            Terms to be removed. Missing terms are ignored.
+        """
+        terms = set(terms)
+        self._copy_lexicon()
+        for term in terms:
+            self._dict.pop(term, None)
+        self._pattern.remove_tokens(terms)
+        self._ngram_index = None
+
+    def update_scores(self, terms):
+        """Change scores of terms in the dictionary.
+        The matcher is not changed.
+        Parameters
+        ----------
+        terms : dict
+            New scores of the terms.
+        """
+        terms = dict(terms)
+        for term in terms:
+            if term not in self._dict:
+                raise KeyError('%r is not in the dictionary, use add_terms' % term)
+        self._copy_lexicon()
+        self._dict.update(terms)
+
+    def enable_stats(self, max_samples=AFINN_stats.MAX_SAMPLES):
+        """Start collecting match counters and timing of scoring, see AFINN_stats.py.
+        Parameters
+        ----------
+        max_samples : int, optional
+            Maximum number of zero-hit documents kept as samples.
+        Returns
+        -------
+        stats : ScoringStats
+            Statistics with snapshot, to_json and reset methods.
+        """
+        return AFINN_stats.enable_stats(self, max_samples=max_samples)
+
+    def disable_stats(self):
+        """Stop collecting scoring statistics.
+        Returns
+        -------
+        stats : ScoringStats or None
+            The collected statistics.
+        """
+        return AFINN_stats.disable_stats(self)
+
     score = score_with_pattern
 
     scores = scores_with_pattern
 
+
+CHANNELS = ('word', 'emoticon', 'emoji')
+
+class AfinnCombined(AfinnWords):
+    """Sentiment analyzer for words, emoticons and emojis in one pass.
+       ----------
+       Text is lowercased and scanned once with a combined matcher, where
+       words are matched first (with word boundary), then emoticons and
+       emojis (without word boundary), as with the separate AfinnWords,
+       AfinnEmoticons and AfinnEmojis classes.
+
+       Results are available per channel ('word', 'emoticon', 'emoji')
+       and combined.
+    """
+
+    def __init__(self, language="fin", word_boundary=True, engine='trie', cache=True,
+                 filenames=None):
+        """Setup dictionaries from data files.
+        Parameters
+        ----------
+        language : str, optional
+            Specify language dictionary for words.
+        word_boundary : bool, optional
+            Use word boundary match for words.
+        engine : 'trie' or 're', optional
+            Matching engine, see AFINN_matcher.py.
+        cache : bool, optional
+            Load the dictionaries and matcher from cache, see AFINN_cache.py.
+        filenames : dict, optional
+            Data files of the 'word', 'emoticon' and 'emoji' channels, e.g. the files
+            of one label scheme in AFINN_multilabel.MULTILABEL_FILENAMES. A channel
+            without a file has no terms. Default is the files of LANGUAGE_TO_FILENAME.
+        """
+        if filenames is None:
+            filenames = dict(zip(CHANNELS, [LANGUAGE_TO_FILENAME[name]
+                                            for name in (language, 'emoticons', 'emojis')]))
+        full_filenames = [self.full_filename(filenames[channel]) if filenames.get(channel)
+                          else None for channel in CHANNELS]
+        self._engine = engine
+
+        cached = None
+        if cache:
+            cache_key = AFINN_cache.lexicon_key(
+                'AfinnCombined', [filename for filename in full_filenames if filename],
+                channels=[channel for channel, filename in zip(CHANNELS, full_filenames)
+                          if filename],
+                word_boundary=word_boundary, engine=engine)
+            cached = AFINN_cache.load(cache_key)
+
+        if cached is not None:
+            self._dicts, self._pattern = cached
+        else:
+            self._dicts = dict((channel, self.read_word_file(filename) if filename else {})
+                               for channel, filename in zip(CHANNELS, full_filenames))
+            boundaries = (word_boundary, False, False)
+            channels = [(list(self._dicts[channel]), boundary)
+                        for channel, boundary in zip(CHANNELS, boundaries)]
+            self._pattern = make_matcher(channels, engine=engine, names=CHANNELS)
+            if cache:
+                AFINN_cache.save(cache_key, (self._dicts, self._pattern))
+
+        self._merge_dicts()
+
+        self._word_pattern = re.compile('\w+', flags=re.UNICODE)
+        self._ngram_index = None
+
+    def find_all_channels(self, text, clean_whitespace=True):
+        """Find all tokens in a text matching the dictionaries.
+        The text is automatically lower-cased.
+        Parameters
+        ----------
+        text : str
+            String with text where words are to be found.
+        clean_whitespace : bool, optional
+            Change multiple whitespaces to a single.
+        Returns
+        -------
+        matches : list of (str, str)
+            List of channel and token for each match
+        Examples
+        --------
+        >>> afinn = AfinnCombined(language='fin')
+        >>> afinn.find_all_channels('Vitun pelle :)')
+        [('word', 'vitun pelle'), ('emoticon', ':)')]
+        """
+        if clean_whitespace:
+            text = re.sub(r"\s+", " ", text)
+        # findall returns a tuple of channel groups, where only the matched channel is not empty
+        return [(CHANNELS[0], word) if word else (CHANNELS[1], emoticon) if emoticon
+                else (CHANNELS[2], emoji)
+                for word, emoticon, emoji in self._pattern.findall(text.lower())]
+
+    def find_all(self, text, clean_whitespace=True):
+        """Find all tokens in a text matching the dictionaries.
+        Parameters
+        ----------
+        text : str
+            String with text where words are to be found.
+        clean_whitespace : bool, optional
+            Change multiple whitespaces to a single.
+        Returns
+        -------
+        words : list of str
+            List of words, emoticons and emojis
+        """
+        return [token for channel, token in
+                self.find_all_channels(text, clean_whitespace=clean_whitespace)]
+
+    def scores_with_pattern(self, text):
+        """Score text based on pattern matching.
+        Parameters
+        ----------
+        text : str
+            Text to be analyzed for sentiment.
+        Returns
+        -------
+        scores : list of int
+            Sentiment analysis scores for matched words, emoticons
+            and emojis in text order
+        """
+        dicts = self._dicts
+        return [dicts[channel][token] for channel, token in self.find_all_channels(text)]
+
+    def scores_by_channel(self, text):
+        """Score text based on pattern matching for each channel.
+        Parameters
+        ----------
+        text : str
+            Text to be analyzed for sentiment.
+        Returns
+        -------
+        scores : dict
+            List of scores for each channel ('word', 'emoticon', 'emoji')
+        """
+        scores = dict((channel, []) for channel in CHANNELS)
+        for channel, token in self.find_all_channels(text):
+            scores[channel].append(self._dicts[channel][token])
+        return scores
+
+    def score_by_channel(self, text):
+        """Score text based on pattern matching for each channel.
+        Parameters
+        ----------
+        text : str
+            Text to be analyzed for sentiment.
+        Returns
+        -------
+        score : dict
+            Sentiment analysis score for each channel ('word', 'emoticon',
+            'emoji') and for all channels ('combined')
+        Examples
+        --------
+        >>> afinn = AfinnCombined(language='fin')
+        >>> afinn.score_by_channel('Vitun pelle :)')
+        {'word': -4.0, 'emoticon': 2.0, 'emoji': 0.0, 'combined': -2.0}
+        """
+        score = dict((channel, float(sum(scores)))
+                     for channel, scores in self.scores_by_channel(text).items())
+        score['combined'] = sum(score.values())
+        return score
+
+    def _copy_lexicon(self):
+        """Copy the dictionaries and matcher before the first change.
+        They may be shared with other objects through the cache.
+        """
+        if not getattr(self, '_lexicon_copied', False):
+            self._dicts = dict((channel, dict(self._dicts[channel])) for channel in CHANNELS)
+            self._pattern = self._pattern.copy()
+            self._lexicon_copied = True
+
+    def _merge_dicts(self):
+        """Set merged dictionary with the precedence of matching (words first)."""
+        self._dict = {}
+        for channel in reversed(CHANNELS):
+            self._dict.update(self._dicts[channel])
+
+    def add_terms(self, terms, channel='word'):
+        """Add terms to a channel.
+        Parameters
+        ----------
+        terms : dict
+            Scores of the terms. Terms should be lowercase,
+            as text is lowercased before matching.
+        channel : 'word', 'emoticon' or 'emoji', optional
+            Channel of the terms.
+        """
+        terms = dict(terms)
+        self._copy_lexicon()
+        self._dicts[channel].update(terms)
+        self._pattern.add_tokens(terms, channel=CHANNELS.index(channel))
+        self._merge_dicts()
+        self._ngram_index = None
+
+    def remove_terms(self, terms):
+        """Remove terms from all channels.
+        Parameters
+        ----------
+        terms : iterable of str
+            Terms to be removed. Missing terms are ignored.
+        """
+        terms = set(terms)
+        self._copy_lexicon()
+        for channel in CHANNELS:
+            for term in terms:
+                self._dicts[channel].pop(term, None)
+        self._pattern.remove_tokens(terms)
+        self._merge_dicts()
+        self._ngram_index = None
+
+    def update_scores(self, terms, channel='word'):
+        """Change scores of terms in a channel.
+        Parameters
+        ----------
+        terms : dict
+            New scores of the terms.
+        channel : 'word', 'emoticon' or 'emoji', optional
+            Channel of the terms.
+        """
+        terms = dict(terms)
+        for term in terms:
+            if term not in self._dicts[channel]:
+                raise KeyError('%r is not in the %s dictionary, use add_terms' % (term, channel))
+        self._copy_lexicon()
+        self._dicts[channel].update(terms)
+        self._merge_dicts()
+
+    score = AfinnWords.score_with_pattern
+
+    scores = scores_with_pattern
+
+class AfinnMultiLabel(AfinnCombined):
+    """Sentiment analyzer for all label schemes in one pass.
+       ----------
+       The HS binary, binary, trinary and polarity lexicons of words,
+       emoticons and emojis are merged into one multi-label lexicon
+       (see AFINN_multilabel.py), where each matched term has a row of
+       scores, one column per label scheme.
+
+       Text is matched once, and all label schemes are scored as columns
+       of a 2-D array. The usual score and scores methods use the label
+       scheme given by the 'scheme' flag.
+    """
+
+    def __init__(self, scheme='polarity', word_boundary=True, engine='trie', cache=True,
+                 filenames=None):
+        """Setup multi-label lexicon from data files.
+        Parameters
+        ----------
+        scheme : 'HS_binary', 'binary', 'trinary' or 'polarity', optional
+            Label scheme of the score and scores methods.
+        word_boundary : bool, optional
+            Use word boundary match for words.
+        engine : 'trie' or 're', optional
+            Matching engine, see AFINN_matcher.py.
+        cache : bool, optional
+            Load the lexicon and matcher from cache, see AFINN_cache.py.
+        filenames : dict, optional
+            Data files of label schemes for each channel,
+            default is AFINN_multilabel.MULTILABEL_FILENAMES.
+        """
+        if filenames is None:
+            filenames = AFINN_multilabel.MULTILABEL_FILENAMES
+        channel_filenames = dict(
+            (channel, dict((name, self.full_filename(filename))
+                           for name, filename in filenames[channel].items()))
+            for channel in CHANNELS)
+        self._engine = engine
+
+        cached = None
+        if cache:
+            cache_key = AFINN_cache.lexicon_key(
+                'AfinnMultiLabel',
+                [channel_filenames[channel][name] for channel in CHANNELS
+                 for name in sorted(channel_filenames[channel])],
+                label_files=sorted((channel, sorted(filenames[channel].items()))
+                                   for channel in CHANNELS),
+                word_boundary=word_boundary, engine=engine)
+            cached = AFINN_cache.load(cache_key)
+
+        if cached is not None:
+            self._lexicon, self._pattern = cached
+        else:
+            self._lexicon = AFINN_multilabel.MultiLabelLexicon.from_files(
+                channel_filenames, self.read_word_file)
+            boundaries = (word_boundary, False, False)
+            channels = [(self._lexicon.terms[channel], boundary)
+                        for channel, boundary in zip(CHANNELS, boundaries)]
+            self._pattern = make_matcher(channels, engine=engine, names=CHANNELS)
+            if cache:
+                AFINN_cache.save(cache_key, (self._lexicon, self._pattern))
+
+        self.schemes = self._lexicon.schemes
+        self.scheme = scheme
+        self._set_scheme_dicts()
+
+        self._word_pattern = re.compile('\w+', flags=re.UNICODE)
+
+    def _copy_lexicon(self):
+        """Copy the multi-label lexicon and matcher before the first change.
+        They may be shared with other objects through the cache.
+        """
+        if not getattr(self, '_lexicon_copied', False):
+            self._lexicon = self._lexicon.copy()
+            self._pattern = self._pattern.copy()
+            self._lexicon_copied = True
+
+    def _set_scheme_dicts(self):
+        """Set dictionaries of the label scheme of the score and scores methods."""
+        self._dicts = dict((channel, self._lexicon.scheme_dict(channel, self.scheme))
+                           for channel in CHANNELS)
+        self._merge_dicts()
+        self._ngram_index = None
+        self._scheme_sets = {}
+
+    def add_terms(self, terms, channel='word'):
+        """Add terms to a channel.
+        Parameters
+        ----------
+        terms : dict
+            Scores of the terms, a row with a score for each label scheme
+            (in the order of schemes), or a single score of the label scheme
+            given by the 'scheme' flag. Terms should be lowercase,
+            as text is lowercased before matching.
+        channel : 'word', 'emoticon' or 'emoji', optional
+            Channel of the terms.
+        Examples
+        --------
+        >>> afinn = AfinnMultiLabel()
+        >>> afinn.add_terms({'vitun hölmö': [1, 1, -1, -4]})
+        >>> afinn.score_all('Vitun hölmö')
+        array([ 1.,  1., -1., -4.])
+        """
+        terms = dict(terms)
+        self._copy_lexicon()
+        self._lexicon.set_scores(channel, terms, scheme=self.scheme)
+        self._pattern.add_tokens(terms, channel=CHANNELS.index(channel))
+        self._set_scheme_dicts()
+
+    def remove_terms(self, terms):
+        """Remove terms from all channels.
+        Parameters
+        ----------
+        terms : iterable of str
+            Terms to be removed. Missing terms are ignored.
+        """
+        terms = set(terms)
+        self._copy_lexicon()
+        self._lexicon.remove_terms(terms)
+        self._pattern.remove_tokens(terms)
+        self._set_scheme_dicts()
+
+    def update_scores(self, terms, channel='word'):
+        """Change scores of terms in a channel.
+        Parameters
+        ----------
+        terms : dict
+            New scores of the terms, as in add_terms.
+        channel : 'word', 'emoticon' or 'emoji', optional
+            Channel of the terms.
+        """
+        terms = dict(terms)
+        for term in terms:
+            if term not in self._lexicon.term_ids[channel]:
+                raise KeyError('%r is not in the %s lexicon, use add_terms' % (term, channel))
+        self._copy_lexicon()
+        self._lexicon.set_scores(channel, terms, scheme=self.scheme)
+        self._set_scheme_dicts()
+
+    def _scheme_match_at(self, column, text, position):
+        """Return (channel, term) of the terms of a label scheme at a position of text,
+        as matched by the single-scheme matcher, or None.
+        """
+        sets = self._scheme_sets.get(column)
+        if sets is None:
+            sets = []
+            for channel, (_, word_boundary) in zip(CHANNELS, self._pattern.channels):
+                terms = self._lexicon.labeled_terms(channel, self.schemes[column])
+                # First characters and the longest term skip most positions at once
+                sets.append((channel, terms, set(term[0] for term in terms),
+                             max(map(len, terms), default=0), word_boundary))
+            self._scheme_sets[column] = sets
+        char = text[position]
+        for channel, terms, first_chars, max_length, word_boundary in sets:
+            if char in first_chars:
+                term = longest_token_at(text, position, terms, max_length, word_boundary)
+                if term is not None:
+                    return channel, term
+        return None
+
+    def _matches(self, text):
+        """Return offsets, term ids and labeled rows of the matches of the terms of all
+        label schemes in lowercased text, and their (channel, term).
+        """
+        term_ids = self._lexicon.term_ids
+        starts, ends, ids, matches = [], [], [], []
+        for match in self._pattern.finditer(text):
+            channel, term = match.lastgroup, match.group()
+            starts.append(match.start())
+            ends.append(match.end())
+            ids.append(term_ids[channel][term])
+            matches.append((channel, term))
+        ids = np.asarray(ids, dtype=np.int64)
+        return (np.asarray(starts, dtype=np.int64), np.asarray(ends, dtype=np.int64), ids,
+                self._lexicon.labeled[ids], matches)
+
+    def _column_matches(self, text, starts, ends, ids, labeled, doc_index):
+        """Return document indices, term ids and label scheme columns of the matches of all
+        label schemes, from the matches of their terms in text (see _matches). The columns
+        of a match are True for the label schemes with the match.
+        """
+        if labeled.all():
+            return doc_index, ids, labeled
+        term_ids = self._lexicon.term_ids
+        columns = labeled.copy()
+        added = {}
+        for column in np.flatnonzero(~labeled.all(axis=0)):
+            dropped, matches = AFINN_multilabel.scheme_matches(
+                starts, ends, labeled[:, column],
+                lambda position: self._scheme_match_at(column, text, position))
+            columns[dropped, column] = False
+            for index, start, channel, term in matches:
+                key = (start, term_ids[channel][term])
+                if key not in added:
+                    added[key] = (doc_index[index], np.zeros(len(self.schemes), dtype=bool))
+                added[key][1][column] = True
+        # Matches of terms of no label scheme are left out, the added matches are sorted
+        # to text order
+        keep = columns.any(axis=1)
+        keys = list(added)
+        order = np.argsort(np.concatenate([starts[keep], [start for start, _ in keys]]),
+                           kind='stable')
+        doc_index = np.concatenate([doc_index[keep], [added[key][0] for key in keys]])
+        ids = np.concatenate([ids[keep], [term_id for _, term_id in keys]])
+        columns = np.concatenate([columns[keep], np.array(
+            [added[key][1] for key in keys], dtype=bool).reshape(len(keys), len(self.schemes))])
+        return doc_index[order].astype(np.int64), ids[order].astype(np.int64), columns[order]
+
+    def _column_matches_many(self, texts, clean_whitespace=True):
+        """Return number of texts, and document indices, term ids and label scheme columns
+        of the matches of many texts, see _column_matches. All texts are matched in one scan.
+        """
+        n_docs, doc_index, tokens, channels, text, starts, ends = AFINN_bulk.match_many(
+            self, texts, clean_whitespace=clean_whitespace, with_channels=True, with_spans=True)
+        term_ids = self._lexicon.term_ids
+        ids = np.fromiter((term_ids[channel][token] for channel, token in zip(channels, tokens)),
+                          dtype=np.int64, count=len(tokens))
+        return (n_docs,) + self._column_matches(text, starts, ends, ids,
+                                                self._lexicon.labeled[ids], doc_index)
+
+    def _text_column_matches(self, text):
+        """Return term ids and label scheme columns of the matches of text."""
+        text = re.sub(r"\s+", " ", text).lower()
+        starts, ends, ids, labeled, _ = self._matches(text)
+        return self._column_matches(text, starts, ends, ids, labeled,
+                                    np.zeros(len(ids), dtype=np.int64))[1:]
+
+    def find_all_channels(self, text, clean_whitespace=True, scheme=None):
+        """Find all tokens in a text matching the dictionaries of a label scheme.
+        The tokens are the same as from AfinnCombined with the files of the label scheme,
+        see AFINN_multilabel.py.
+        Parameters
+        ----------
+        text : str
+            String with text where words are to be found.
+        clean_whitespace : bool, optional
+            Change multiple whitespaces to a single.
+        scheme : str, optional
+            Label scheme, default is the 'scheme' flag.
+        Returns
+        -------
+        matches : list of (str, str)
+            List of channel and token for each match
+        Examples
+        --------
+        >>> afinn = AfinnMultiLabel()
+        >>> afinn.find_all_channels('see-no-evil_monkey')
+        [('emoji', 'see-no-evil_monkey')]
+        >>> afinn.find_all_channels('see-no-evil_monkey', scheme='HS_binary')
+        [('word', 'no')]
+        """
+        if clean_whitespace:
+            text = re.sub(r"\s+", " ", text)
+        text = text.lower()
+        column = self.schemes.index(scheme or self.scheme)
+        starts, ends, _, labeled, matches = self._matches(text)
+        dropped, added = AFINN_multilabel.scheme_matches(
+            starts, ends, labeled[:, column],
+            lambda position: self._scheme_match_at(column, text, position))
+        if not dropped:
+            return matches
+        dropped = set(dropped)
+        matches = [(start, match) for index, (start, match) in enumerate(zip(starts, matches))
+                   if index not in dropped]
+        matches.extend((start, (channel, term)) for _, start, channel, term in added)
+        return [match for _, match in sorted(matches)]
+
+    def term_ids(self, text):
+        """Return term ids of matched words, emoticons and emojis.
+        Parameters
+        ----------
+        text : str
+            Text to be analyzed for sentiment.
+        Returns
+        -------
+        ids : numpy.ndarray of int64
+            Term ids in the multi-label lexicon of the matches of all label schemes,
+            in text order
+        """
+        return self._text_column_matches(text)[0]
+
+    def scores_all(self, text):
+        """Score text for all label schemes.
+        Parameters
+        ----------
+        text : str
+            Text to be analyzed for sentiment.
+        Returns
+        -------
+        scores : numpy.ndarray of int8
+            Scores of matched terms, one row per match and one column per label scheme,
+            0 in the columns of label schemes without the match
+        """
+        ids, columns = self._text_column_matches(text)
+        return np.where(columns, self._lexicon.scores[ids], 0).astype(np.int8)
+
+    def scores_all_many(self, texts, clean_whitespace=True):
+        """Score many texts for all label schemes, see scores_all.
+        Parameters
+        ----------
+        texts : iterable of str
+            Texts to be analyzed for sentiment, e.g. list or pandas Series.
+        clean_whitespace : bool, optional
+            Change multiple whitespaces to a single.
+        Returns
+        -------
+        offsets : numpy.ndarray of int64
+            Offsets of documents in rows, length is number of texts + 1.
+        rows : numpy.ndarray of int8
+            Scores of matched terms, one row per match and one column per label scheme
+        """
+        n_docs, doc_index, ids, columns = self._column_matches_many(
+            texts, clean_whitespace=clean_whitespace)
+        offsets = np.zeros(n_docs + 1, dtype=np.int64)
+        np.cumsum(np.bincount(doc_index, minlength=n_docs), out=offsets[1:])
+        return offsets, np.where(columns, self._lexicon.scores[ids], 0).astype(np.int8)
+
+    def scores_many(self, texts, clean_whitespace=True):
+        """Return per-match scores of many texts for the 'scheme' flag, see AFINN_bulk.py.
+        Parameters
+        ----------
+        texts : iterable of str
+            Texts to be analyzed for sentiment, e.g. list or pandas Series.
+        clean_whitespace : bool, optional
+            Change multiple whitespaces to a single.
+        Returns
+        -------
+        offsets : numpy.ndarray of int64
+            Offsets of documents in values, length is number of texts + 1.
+        values : numpy.ndarray of int32
+            Scores of matched tokens
+        """
+        n_docs, doc_index, ids, columns = self._column_matches_many(
+            texts, clean_whitespace=clean_whitespace)
+        column = self.schemes.index(self.scheme)
+        matched = columns[:, column]
+        offsets = np.zeros(n_docs + 1, dtype=np.int64)
+        np.cumsum(np.bincount(doc_index[matched], minlength=n_docs), out=offsets[1:])
+        return offsets, self._lexicon.scores[ids[matched], column].astype(np.int32)
+
+    def score_all(self, text):
+        """Score text for all label schemes.
+        Parameters
+        ----------
+        text : str
+            Text to be analyzed for sentiment.
+        Returns
+        -------
+        score : numpy.ndarray of float64
+            Sum of scores for each label scheme
+        Examples
+        --------
+        >>> afinn = AfinnMultiLabel()
+        >>> afinn.schemes
+        ('HS_binary', 'binary', 'trinary', 'polarity')
+        >>> afinn.score_all('Vitun pelle :)')
+        array([ 1.,  0., -1., -2.])
+        """
+        return self.scores_all(text).sum(axis=0, dtype=np.float64)
+
+    def score_all_many(self, texts, clean_whitespace=True):
+        """Score many texts for all label schemes.
+        All texts are matched in one scan, see AFINN_bulk.py.
+        Parameters
+        ----------
+        texts : iterable of str
+            Texts to be analyzed for sentiment, e.g. list or pandas Series.
+        clean_whitespace : bool, optional
+            Change multiple whitespaces to a single.
+        Returns
+        -------
+        scores : numpy.ndarray of float64
+            Sum of scores, one row per text and one column per label scheme
+        """
+        offsets, rows = self.scores_all_many(texts, clean_whitespace=clean_whitespace)
+        n_docs = len(offsets) - 1
+        doc_index = np.repeat(np.arange(n_docs), np.diff(offsets))
+        scores = np.empty((n_docs, len(self.schemes)), dtype=np.float64)
+        for column in range(len(self.schemes)):
+            scores[:, column] = np.bincount(doc_index, weights=rows[:, column], minlength=n_docs)
+        return scores
+
+class AfinnMapped(AfinnWords):
+    """Sentiment analyzer for words with a memory-mapped lexicon.
+       ----------
+       The lexicon is read from a binary lexicon file (see AFINN_mmap.py),
+       which is memory-mapped instead of being loaded to a dictionary.
+       Processes using the same file share one copy of the lexicon, but
+       each process compiles its own matcher of the terms of the column.
+
+       Matching and scoring is the same as in AfinnWords.
+    """
+
+    def __init__(self, filename, column=0, word_boundary=True, engine='trie', cache=True):
+        """Setup lexicon from binary lexicon file.
+        Parameters
+        ----------
+        filename : str
+            Binary lexicon file, converted with AFINN_mmap.py.
+        column : int or str, optional
+            Score column (index or name) of the lexicon.
+        word_boundary : bool, optional
+            Use word boundary match.
+        engine : 'trie' or 're', optional
+            Matching engine, see AFINN_matcher.py.
+        cache : bool, optional
+            Load the matcher from cache, see AFINN_cache.py.
+        """
+        self._engine = engine
+        self._dict = AFINN_mmap.MappedLexicon(filename, column=column)
+        self.columns = self._dict.columns
+
+        cached = None
+        if cache:
+            cache_key = AFINN_cache.lexicon_key(
+                'AfinnMapped', [filename], column=self._dict.column,
+                word_boundary=word_boundary, engine=engine)
+            cached = AFINN_cache.load(cache_key)
+
+        if cached is not None:
+            self._pattern = cached
+        else:
+            self._setup_pattern_from_channels([(list(self._dict), word_boundary)])
+            if cache:
+                AFINN_cache.save(cache_key, self._pattern)
+
+        self._word_pattern = re.compile('\w+', flags=re.UNICODE)
+        self._ngram_index = None
@@ -0,0 +1,319 @@
+"""Opt-in instrumentation of AFINN sentiment analysis."""
+
+from __future__ import absolute_import, division, print_function
+
+"""
+# ------------------------------------------------------------------------------------------------
+
+Scoring statistics of an AFINN object are collected after enable_stats():
+    - matches per lexicon entry and per matcher channel
+    - number of documents, and documents without matches (zero hits) with a few samples
+    - time of matching (find_all, or the scan of bulk scoring) and of score aggregation,
+      without the time of recording the statistics (instrumentation)
+
+enable_stats replaces the matching and scoring methods of the object with instance
+attributes, which record the statistics and call the methods of the class. Objects without
+stats run the methods of the class as such, so instrumentation costs nothing when disabled.
+Bulk scoring (AFINN_bulk.py) checks the stats of the object once per call.
+Scoring by channel of AfinnCombined (score_by_channel) is not instrumented.
+
+Channels are named as in the matcher, e.g. 'word', 'emoticon' and 'emoji' of AfinnCombined,
+or by their index ('0', '1') in matchers without channel names, e.g. '1' is the emoticon
+channel of AfinnEmoticons(emoticons=True).
+
+The counters are plain Python objects without locks, and are meant to be used by one thread.
+Worker processes (AFINN_parallel.py) collect statistics in their own copies of the object.
+
+    stats = AFINN_fin.enable_stats()
+    AFINN_fin.score_many(df['sample'])
+    stats.snapshot()['entries']        # matches per lexicon entry, most frequent first
+    print(stats.to_json())
+    stats.reset()
+
+# ------------------------------------------------------------------------------------------------
+"""
+
+import json
+import time
+from collections import Counter
+
+import numpy as np
+
+# Maximum number of zero-hit documents kept as samples
+MAX_SAMPLES = 20
+
+UNKNOWN_CHANNEL = 'unknown'
+
+
+def _matcher_channels(matcher):
+    """Return list of (name, set of tokens) of the channels of a matcher."""
+    if hasattr(matcher, 'channels'):
+        names = getattr(matcher, 'names', None)
+        return [(names[n] if names else str(n), set(tokens))
+                for n, (tokens, word_boundary) in enumerate(matcher.channels)]
+    # EmojiMatcher of AFINN_emojis.py, with a matcher of the other channels
+    channels = _matcher_channels(matcher.matcher) if matcher.matcher is not None else []
+    channels.insert(matcher.channel, (str(matcher.channel), set(matcher.names)))
+    return channels
+
+
+class ScoringStats(object):
+    """Counters and timers of AFINN scoring."""
+
+    def __init__(self, max_samples=MAX_SAMPLES):
+        """Setup empty statistics.
+        Parameters
+        ----------
+        max_samples : int, optional
+            Maximum number of zero-hit documents kept as samples.
+        """
+        self.max_samples = max_samples
+        # Channel of lexicon entries, rebuilt when the matcher changes
+        self._matcher = None
+        self._channels = []
+        self._channel_of = {}
+        self.reset()
+
+    def reset(self):
+        """Set all counters and timers to zero."""
+        self.documents = 0
+        self.zero_hit_documents = 0
+        self.zero_hit_samples = []
+        self.entries = Counter()
+        self.channels = Counter()
+        self.matching_time = 0.0
+        self.aggregation_time = 0.0
+        self.instrumentation_time = 0.0
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_matcher'] = None
+        state['_channels'] = []
+        state['_channel_of'] = {}
+        return state
+
+    def channel(self, entry, matcher):
+        """Return name of the matcher channel of a lexicon entry.
+        Parameters
+        ----------
+        entry : str
+            Matched lexicon entry.
+        matcher : RegexMatcher, TrieMatcher or EmojiMatcher
+            Matcher of the AFINN object.
+        Returns
+        -------
+        channel : str
+            Name of the first channel with the entry, or UNKNOWN_CHANNEL.
+        """
+        if matcher is not self._matcher:
+            self._matcher = matcher
+            self._channels = _matcher_channels(matcher)
+            self._channel_of = {}
+        try:
+            return self._channel_of[entry]
+        except KeyError:
+            pass
+        for rebuild in (False, True):
+            if rebuild:
+                # Entries added to the matcher after the channels were read
+                self._channels = _matcher_channels(matcher)
+            for name, tokens in self._channels:
+                if entry in tokens:
+                    self._channel_of[entry] = name
+                    return name
+        self._channel_of[entry] = UNKNOWN_CHANNEL
+        return UNKNOWN_CHANNEL
+
+    def record(self, text, entries, channels):
+        """Record the matches of one document.
+        Parameters
+        ----------
+        text : str
+            Document.
+        entries : list of str
+            Matched lexicon entries.
+        channels : list of str
+            Channel of each match.
+        """
+        self.documents += 1
+        if not entries:
+            self.zero_hit_documents += 1
+            if len(self.zero_hit_samples) < self.max_samples:
+                self.zero_hit_samples.append(text)
+        self.entries.update(entries)
+        self.channels.update(channels)
+
+    def record_many(self, documents, doc_index, entries, channels):
+        """Record the matches of many documents of bulk scoring.
+        Parameters
+        ----------
+        documents : list of str
+            Documents.
+        doc_index : numpy.ndarray of int
+            Document index of each match.
+        entries : list of str
+            Matched lexicon entries.
+        channels : list of str
+            Channel of each match.
+        """
+        n_docs = len(documents)
+        hits = np.bincount(doc_index, minlength=n_docs)
+        zero_hits = np.flatnonzero(hits == 0)
+        self.documents += n_docs
+        self.zero_hit_documents += len(zero_hits)
+        room = self.max_samples - len(self.zero_hit_samples)
+        if room > 0:
+            self.zero_hit_samples.extend(documents[index] for index in zero_hits[:room])
+        self.entries.update(entries)
+        self.channels.update(channels)
+
+    def snapshot(self):
+        """Return the statistics as a dictionary.
+        Returns
+        -------
+        stats : dict
+            Counters and timers (in seconds), entries and channels
+            in order of decreasing number of matches.
+        """
+        documents = self.documents
+        return {
+            'documents': documents,
+            'zero_hit_documents': self.zero_hit_documents,
+            'hit_rate': (documents - self.zero_hit_documents) / documents if documents else 0.0,
+            'matches': sum(self.entries.values()),
+            'entries': dict(self.entries.most_common()),
+            'channels': dict(self.channels.most_common()),
+            'time': {
+                'matching': self.matching_time,
+                'aggregation': self.aggregation_time,
+                'instrumentation': self.instrumentation_time,
+                },
+            'zero_hit_samples': list(self.zero_hit_samples),
+            }
+
+    def to_json(self, **kwargs):
+        """Return the statistics of snapshot as a JSON string.
+        Parameters
+        ----------
+        kwargs : dict, optional
+            Arguments of json.dumps, e.g. indent.
+        Returns
+        -------
+        stats : str
+            JSON string
+        """
+        kwargs.setdefault('ensure_ascii', False)
+        return json.dumps(self.snapshot(), **kwargs)
+
+
+class _Instrumented(object):
+    """Instance attribute replacing a method of an AFINN object."""
+
+    def __init__(self, afinn, name):
+        self.afinn = afinn
+        self.name = name
+
+    def _method(self):
+        return getattr(type(self.afinn), self.name).__get__(self.afinn)
+
+
+class _Matching(_Instrumented):
+    """Records the matches and matching time of find_all and find_all_channels."""
+
+    def __call__(self, text, clean_whitespace=True):
+        afinn = self.afinn
+        stats = afinn.stats
+        start = time.perf_counter()
+        matches = self._method()(text, clean_whitespace=clean_whitespace)
+        matched = time.perf_counter()
+        stats.matching_time += matched - start
+        if self.name == 'find_all_channels':
+            stats.record(text, [entry for channel, entry in matches],
+                         [channel for channel, entry in matches])
+        else:
+            stats.record(text, matches,
+                         [stats.channel(entry, afinn._pattern) for entry in matches])
+        stats.instrumentation_time += time.perf_counter() - matched
+        return matches
+
+
+class _Scoring(_Instrumented):
+    """Records the aggregation time of scoring, without the time of matching."""
+
+    def __call__(self, text):
+        stats = self.afinn.stats
+        inner_time = stats.matching_time + stats.instrumentation_time
+        start = time.perf_counter()
+        scores = self._method()(text)
+        stats.aggregation_time += (time.perf_counter() - start - (
+            stats.matching_time + stats.instrumentation_time - inner_time))
+        return scores
+
+
+def _wrapped_methods(afinn):
+    """Return (name, wrapper class) of the methods instrumented in an AFINN object."""
+    cls = type(afinn)
+    # find_all of AfinnCombined uses find_all_channels
+    matching = 'find_all_channels' if hasattr(cls, 'find_all_channels') else 'find_all'
+    return [(matching, _Matching), ('scores_with_pattern', _Scoring), ('scores', _Scoring)]
+
+
+def enable_stats(afinn, max_samples=MAX_SAMPLES):
+    """Start collecting scoring statistics of an AFINN object.
+    Parameters
+    ----------
+    afinn : AfinnWords, AfinnEmoticons, AfinnEmojis, AfinnCombined or AfinnMultiLabel
+        Sentiment analyzer.
+    max_samples : int, optional
+        Maximum number of zero-hit documents kept as samples.
+    Returns
+    -------
+    stats : ScoringStats
+        Statistics, also available as the 'stats' attribute of the object.
+    """
+    if getattr(afinn, 'stats', None) is not None:
+        return afinn.stats
+    afinn.stats = ScoringStats(max_samples=max_samples)
+    for name, wrapper in _wrapped_methods(afinn):
+        setattr(afinn, name, wrapper(afinn, name))
+    return afinn.stats
+
+
+def disable_stats(afinn):
+    """Stop collecting scoring statistics of an AFINN object.
+    Parameters
+    ----------
+    afinn : AfinnWords, AfinnEmoticons, AfinnEmojis, AfinnCombined or AfinnMultiLabel
+        Sentiment analyzer.
+    Returns
+    -------
+    stats : ScoringStats or None
+        The collected statistics.
+    """
+    stats = afinn.__dict__.pop('stats', None)
+    for name, wrapper in _wrapped_methods(afinn):
+        afinn.__dict__.pop(name, None)
+    return stats
+
+
+def record_bulk(afinn, documents, doc_index, tokens, channels=None):
+    """Record the matches of bulk scoring, see AFINN_bulk.py.
+    Parameters
+    ----------
+    afinn : AfinnWords, AfinnEmoticons, AfinnEmojis, AfinnCombined or AfinnMultiLabel
+        Sentiment analyzer with enabled stats.
+    documents : list of str
+        Documents.
+    doc_index : numpy.ndarray of int
+        Document index of each match.
+    tokens : list of str
+        Matched tokens.
+    channels : list of str, optional
+        Channel of each match, default is the channel of the entry.
+    """
+    stats = afinn.stats
+    canonical = getattr(afinn.__dict__.get('_dict'), 'canonical', None)
+    entries = [canonical(token) for token in tokens] if canonical is not None else tokens
+    if channels is None:
+        channels = [stats.channel(entry, afinn._pattern) for entry in entries]
+    stats.record_many(documents, doc_index, entries, channels)
@@ -0,0 +1,474 @@
+"""Wildcard stem entries for AFINN sentiment analysis."""
+
+from __future__ import absolute_import, division, print_function
+
+"""
+# ------------------------------------------------------------------------------------------------
+
+Finnish inflection is why the word lexicons list ~10000 surface forms.
+As in the EmotionLookupTable of SentiStrength, a lexicon entry 'stem*' matches
+all words starting with the stem, e.g. 'vittuil*' matches 'vittuilu', 'vittuilla'
+and 'vittuilija'.
+
+Matching (see AFINN_matcher.py):
+    - a stem entry matches the stem and the rest of the word ('\\w*')
+    - longer entries are tried first, so an exact entry or a longer stem
+      continuing the text takes precedence over a shorter stem
+
+Scoring (see StemDict):
+    - an exact entry of the matched token is used first
+    - otherwise the score of the longest stem prefixing the token
+
+to_stems converts an expanded word list to stem entries. Only groups of words with
+the same score are replaced by their longest common prefix, so that every listed word
+keeps its score. A stem also matches words missing from the list, e.g. a stem 'kaupu*'
+of 'kaupustella' and 'kaupustelija' would match 'kaupunki'. Stems prefixing a word of
+the vocabulary missing from the list are not used, the group is split to longer stems
+instead. The default vocabulary (STEM_VOCABULARY_FILES) is the stopword list and the
+word forms of the hate speech samples of the manually annotated Suomi24 collection
+(finnish_HS_sample_words_2023.txt): the lowercased alphabetic tokens of the raw and
+corrected samples, as printed by the unigram analysis of the collection
+(Data-Analysis/HS_data_unigram_analysis.ipynb, see corpus_words). The file is written with
+
+    python -c "from AFINNfin import AFINN_stems; AFINN_stems.write_words(
+        'AFINNfin/DATA/finnish_HS_sample_words_2023.txt', AFINN_stems.corpus_words())"
+
+check_stems compares the matches and scores of the converted list to the expanded list,
+for the entries of the expanded list and for other texts, so that stems matching new
+words are reported. Words of the vocabulary are not scored by stems by construction, so
+the conversion is checked on text not used for the vocabulary: the lemmas of the samples
+without hate speech (corpus_words(source=NOT_HS_LEMMAS), stopwords and sentiment words
+removed by the notebook). Of the 3080 of these missing from the vocabulary and the list,
+116 are scored by the stems of the polarity list but not by the list itself: inflections
+such as 'pilkattava' (-3, 'pilkat*'), but also other words such as 'valkoinen' (-5, 'valko*').
+Longer stems score fewer new words (73 with min_stem=6, 43 with 7) and replace fewer entries.
+
+The converted polarity list is fin_afinn_polarity_stems_MerjasList_2023.txt, read by
+AfinnWords(language='fin', stems=True). Conversion of a word list and the checks (from the
+AFINN-Classification folder):
+
+    python -m AFINNfin.AFINN_stems AFINNfin/DATA/fin_afinn_polarity_MerjasList_2023.txt \\
+        AFINNfin/DATA/fin_afinn_polarity_stems_MerjasList_2023.txt --corpus-check
+
+# ------------------------------------------------------------------------------------------------
+"""
+
+import argparse
+import ast
+import bisect
+import codecs
+import json
+import os
+import re
+import time
+from os.path import dirname, join
+
+STEM_MARK = '*'
+
+# Plain Finnish word lists of the data folder
+PLAIN_WORD_FILES = ('finnish_stopwords_MerjasList_2023.txt',)
+
+# Vocabulary of the conversion to stems, see corpus_words
+STEM_VOCABULARY_FILES = PLAIN_WORD_FILES + ('finnish_HS_sample_words_2023.txt',)
+
+# Unigram analysis of the manually annotated collection, with the printed token lists
+CORPUS_NOTEBOOK = join(dirname(dirname(dirname(os.path.abspath(__file__)))),
+                       'Data-Analysis', 'HS_data_unigram_analysis.ipynb')
+
+# Code of the notebook cells printing the word forms of the hate speech samples and
+# the lemmas of the other samples
+HS_SAMPLE_WORDS = 'list_of_all_tokens = word_tokenize'
+NOT_HS_LEMMAS = "df_notHS['correctLemmas']"
+
+_WORD_CHAR = re.compile(r'\w', flags=re.UNICODE)
+
+_WORD = re.compile(r'\w+\Z', flags=re.UNICODE)
+
+
+def is_stem(term):
+    """Return True for wildcard stem entries.
+    The wildcard must follow a word character, so that emoticons such as ':*'
+    are not stems.
+    Parameters
+    ----------
+    term : str
+        Lexicon entry
+    Returns
+    -------
+    stem : bool
+        True, if the entry is a stem entry.
+    Examples
+    --------
+    >>> is_stem('vittuil*'), is_stem('vittuilu'), is_stem(':*')
+    (True, False, False)
+    """
+    return (len(term) > 1 and term[-1] == STEM_MARK
+            and _WORD_CHAR.match(term[-2]) is not None)
+
+
+class StemDict(dict):
+    """Lexicon dictionary with exact and wildcard stem entries.
+       ----------
+       Exact entries are stored as in a dictionary, and 'stem*' entries
+       in the 'stems' dictionary, keyed by the stem. Lookup of a token
+       (item access and get) uses the exact entry first, then the
+       longest stem prefixing the token.
+
+       Iteration, len and 'in' cover the lexicon entries, where
+       stem entries have the wildcard mark.
+    """
+
+    def __init__(self, entries=()):
+        """Setup dictionary from entries.
+        Parameters
+        ----------
+        entries : dict or iterable of (str, int), optional
+            Lexicon entries with scores.
+        """
+        dict.__init__(self)
+        self.stems = {}
+        self.update(entries)
+
+    def __reduce__(self):
+        return (self.__class__, (list(self.items()),))
+
+    def __setitem__(self, term, score):
+        if is_stem(term):
+            self.stems[term[:-1]] = score
+        else:
+            dict.__setitem__(self, term, score)
+
+    def __delitem__(self, term):
+        if is_stem(term):
+            del self.stems[term[:-1]]
+        else:
+            dict.__delitem__(self, term)
+
+    def __missing__(self, token):
+        score = self.stem_score(token)
+        if score is None:
+            raise KeyError(token)
+        return score
+
+    def __contains__(self, term):
+        if is_stem(term):
+            return term[:-1] in self.stems
+        return dict.__contains__(self, term)
+
+    def __iter__(self):
+        for term in dict.__iter__(self):
+            yield term
+        for stem in self.stems:
+            yield stem + STEM_MARK
+
+    def __len__(self):
+        return dict.__len__(self) + len(self.stems)
+
+    def keys(self):
+        return list(self)
+
+    def items(self):
+        return list(dict.items(self)) + [
+            (stem + STEM_MARK, score) for stem, score in self.stems.items()]
+
+    def values(self):
+        return [score for term, score in self.items()]
+
+    def update(self, entries=(), **kwargs):
+        if hasattr(entries, 'items'):
+            entries = entries.items()
+        for term, score in entries:
+            self[term] = score
+        for term, score in kwargs.items():
+            self[term] = score
+
+    def pop(self, term, *default):
+        if is_stem(term):
+            return self.stems.pop(term[:-1], *default)
+        return dict.pop(self, term, *default)
+
+    def get(self, token, default=None):
+        score = dict.get(self, token)
+        if score is None:
+            score = self.stem_score(token)
+        return default if score is None else score
+
+    def copy(self):
+        return self.__class__(self.items())
+
+    def stem_score(self, token):
+        """Return score of the longest stem prefixing the token.
+        Parameters
+        ----------
+        token : str
+            Matched token
+        Returns
+        -------
+        score : int or None
+            Score of the stem, or None if no stem prefixes the token.
+        """
+        stems = self.stems
+        if not stems:
+            return None
+        for end in range(len(token), 0, -1):
+            score = stems.get(token[:end])
+            if score is not None:
+                return score
+        return None
+
+
+def plain_words(filenames=PLAIN_WORD_FILES):
+    """Return words of plain word lists, one word per line.
+    Parameters
+    ----------
+    filenames : iterable of str, optional
+        Filenames of word lists, in the data folder or with a path.
+    Returns
+    -------
+    words : set of str
+        Lowercased words
+    """
+    words = set()
+    for filename in filenames:
+        if dirname(filename) == '':
+            filename = join(dirname(__file__), 'DATA', filename)
+        with codecs.open(filename, encoding='UTF-8') as fid:
+            words.update(line.strip().lower() for line in fid if line.strip())
+    return words
+
+
+def corpus_words(filename=CORPUS_NOTEBOOK, source=HS_SAMPLE_WORDS):
+    """Return words of a token list printed in a Jupyter notebook.
+    Parameters
+    ----------
+    filename : str, optional
+        Notebook, default is the unigram analysis of the manually annotated collection.
+    source : str, optional
+        Code of the cell, the last list printed by the first code cell with the code
+        is read. Default are the word forms of the hate speech samples.
+    Returns
+    -------
+    words : set of str
+        Lowercased alphabetic tokens
+    """
+    with codecs.open(filename, encoding='UTF-8') as fid:
+        notebook = json.load(fid)
+    for cell in notebook['cells']:
+        if cell['cell_type'] == 'code' and source in ''.join(cell['source']):
+            text = ''.join(''.join(output.get('text', ())) for output in cell['outputs'])
+            line = [line for line in text.split('\n') if line.rstrip().endswith(']')][-1]
+            tokens = ast.literal_eval(line[line.index('['):])
+            return set(token.lower() for token in tokens if token.isalpha())
+    raise ValueError('no cell with %r in %s' % (source, filename))
+
+
+def write_words(filename, words):
+    """Write plain word list, one word per line in sorted order."""
+    with codecs.open(filename, 'w', encoding='UTF-8') as fid:
+        for word in sorted(words):
+            fid.write(word + '\n')
+
+
+def to_stems(word_dict, min_stem=5, min_group=2, vocabulary=()):
+    """Convert expanded word list to stem entries.
+    Words (only word characters) with a common prefix of at least min_stem characters
+    and the same score are replaced with the stem entry 'prefix*', where the prefix is
+    the longest common prefix of the words. Other entries (e.g. words with differing
+    scores, multi-word entries) are kept as they are, so every listed word keeps its score.
+    Parameters
+    ----------
+    word_dict : dict
+        Expanded word list with scores.
+    min_stem : int, optional
+        Minimum length of stems.
+    min_group : int, optional
+        Minimum number of words replaced by a stem.
+    vocabulary : iterable of str, optional
+        Words of running text, e.g. plain_words(). A stem prefixing a vocabulary
+        word missing from word_dict is not used, the words are grouped by longer
+        prefixes instead.
+    Returns
+    -------
+    stem_dict : dict
+        Word list with stem entries
+    Examples
+    --------
+    >>> to_stems({'vittuilu': -5, 'vittuilla': -5, 'vittuilija': -5, 'vittu': -4})
+    {'vittu': -4, 'vittuil*': -5}
+    >>> to_stems({'kaupustella': -1, 'kaupustelija': -1})
+    {'kaupustel*': -1}
+    >>> to_stems({'helppo': 2, 'helppous': 2, 'helppoa': 2}, vocabulary=['helppous', 'helppoja'])
+    {'helppo': 2, 'helppoa': 2, 'helppous': 2}
+    """
+    # Prefix tree of single words, entries are stored with the key None
+    root = {}
+    stem_dict = {}
+    for term, score in word_dict.items():
+        if _WORD.match(term) and not is_stem(term):
+            node = root
+            for char in term:
+                node = node.setdefault(char, {})
+            node[None] = score
+        else:
+            stem_dict[term] = score
+
+    def subtree_scores(node, summary):
+        # Set of scores and number of words in the subtree
+        scores, count = set(), 0
+        for char, child in node.items():
+            if char is None:
+                scores.add(child)
+                count += 1
+            else:
+                child_scores, child_count = subtree_scores(child, summary)
+                scores |= child_scores
+                count += child_count
+        summary[id(node)] = (scores, count)
+        return scores, count
+
+    summary = {}
+    subtree_scores(root, summary)
+
+    # Vocabulary words missing from the word list, sorted for prefix search
+    unlisted = sorted(set(word for word in vocabulary if word not in word_dict))
+
+    def covers_unlisted(stem):
+        position = bisect.bisect_left(unlisted, stem)
+        return position < len(unlisted) and unlisted[position].startswith(stem)
+
+    stack = [('', root)]
+    while stack:
+        prefix, node = stack.pop()
+        # Longest common prefix of the words of the subtree
+        while len(node) == 1 and None not in node:
+            char, node = next(iter(node.items()))
+            prefix += char
+        scores, count = summary[id(node)]
+        if (len(prefix) >= min_stem and len(scores) == 1 and count >= min_group
+                and not covers_unlisted(prefix)):
+            stem_dict[prefix + STEM_MARK] = next(iter(scores))
+            continue
+        for char, child in node.items():
+            if char is None:
+                stem_dict[prefix] = child
+            else:
+                stack.append((prefix + char, child))
+    return stem_dict
+
+
+def check_stems(word_dict, stem_dict, texts=(), word_boundary=True, engine='trie'):
+    """Compare stem word list to the expanded word list.
+    Each entry of the expanded list and each text is matched with both lists,
+    and the matched tokens and their scores are compared. Texts other than the
+    entries (e.g. plain_words() or text samples) show stems matching new words.
+    Parameters
+    ----------
+    word_dict : dict
+        Expanded word list with scores.
+    stem_dict : dict
+        Word list with stem entries, e.g. from to_stems.
+    texts : iterable of str, optional
+        Texts matched in addition to the entries of the expanded list.
+    word_boundary : bool, optional
+        Use word boundary match.
+    engine : 'trie' or 're', optional
+        Matching engine.
+    Returns
+    -------
+    mismatches : list of (str, list, list)
+        Entries and texts with differing matches or scores, with the
+        (token, score) matches of the expanded and stem lists.
+    Examples
+    --------
+    >>> words = {'kaupustella': -1, 'kaupustelija': -1}
+    >>> check_stems(words, {'kaupu*': -1}, texts=['kaupungissa'])
+    [('kaupungissa', [], [('kaupungissa', -1)])]
+    >>> check_stems(words, to_stems(words), texts=['kaupungissa'])
+    []
+    """
+    from .AFINN_matcher import make_matcher
+
+    expanded = StemDict(word_dict)
+    stems = StemDict(stem_dict)
+    expanded_matcher = make_matcher([(list(expanded), word_boundary)], engine=engine)
+    stem_matcher = make_matcher([(list(stems), word_boundary)], engine=engine,
+                                stem_channels=(0,))
+    mismatches = []
+    checked = set()
+    for text in list(word_dict) + list(texts):
+        if text in checked:
+            continue
+        checked.add(text)
+        expected = [(token, expanded[token]) for token in expanded_matcher.findall(text)]
+        actual = [(token, stems[token]) for token in stem_matcher.findall(text)]
+        if expected != actual:
+            mismatches.append((text, expected, actual))
+    return mismatches
+
+
+def read_word_file(filename):
+    """Read tab-separated word list with stem entries to a dictionary."""
+    from .AFINN_scores import AfinnWords
+    return AfinnWords.read_word_file(filename)
+
+
+def write_word_file(filename, word_dict):
+    """Write dictionary to tab-separated word list, in descending order."""
+    with codecs.open(filename, 'w', encoding='UTF-8') as fid:
+        for term in sorted(word_dict, reverse=True):
+            fid.write('%s\t%d\n' % (term, word_dict[term]))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Convert expanded AFINN word list to stem entries.')
+    parser.add_argument('input', help='tab-separated word list')
+    parser.add_argument('output', help='tab-separated word list with stem entries')
+    parser.add_argument('--min-stem', type=int, default=5, help='minimum length of stems')
+    parser.add_argument('--min-group', type=int, default=2,
+                        help='minimum number of words replaced by a stem')
+    parser.add_argument('--vocabulary', nargs='*', default=list(STEM_VOCABULARY_FILES),
+                        help='plain word lists, stems prefixing their words are not used')
+    parser.add_argument('--texts', help='text file of lines matched in the check')
+    parser.add_argument('--corpus-check', action='store_true',
+                        help='check also the lemmas of the samples without hate speech '
+                             'of the corpus notebook missing from the vocabulary')
+    args = parser.parse_args()
+
+    from .AFINN_matcher import make_matcher
+
+    word_dict = read_word_file(args.input)
+    vocabulary = plain_words(args.vocabulary)
+    stem_dict = to_stems(word_dict, min_stem=args.min_stem, min_group=args.min_group,
+                         vocabulary=vocabulary)
+    write_word_file(args.output, stem_dict)
+
+    for name, lexicon, stem_channels in (('expanded', word_dict, ()),
+                                          ('stems', stem_dict, (0,))):
+        start = time.perf_counter()
+        matcher = make_matcher([(list(lexicon), True)], stem_channels=stem_channels)
+        elapsed = time.perf_counter() - start
+        print('%-8s  entries %6d  regex %7d  setup %.3f s' % (
+            name, len(lexicon), len(matcher._regex), elapsed))
+
+    texts = sorted(vocabulary)
+    if args.texts:
+        with codecs.open(args.texts, encoding='UTF-8') as fid:
+            texts += [line.strip().lower() for line in fid if line.strip()]
+    mismatches = check_stems(word_dict, stem_dict, texts=texts)
+    print('mismatches %d (entries and %d texts)' % (len(mismatches), len(texts)))
+    for term, expected, actual in mismatches[:20]:
+        print('  %r: %r != %r' % (term, expected, actual))
+
+    if args.corpus_check:
+        # Words not used for the vocabulary, stems scoring them are not excluded by construction
+        words = sorted(corpus_words(source=NOT_HS_LEMMAS) - vocabulary - set(word_dict))
+        mismatches = [mismatch for mismatch in check_stems(word_dict, stem_dict, texts=words)
+                      if mismatch[0] not in word_dict]
+        print('corpus check: %d of %d words scored by stems only' % (len(mismatches), len(words)))
+        for term, expected, actual in mismatches[:20]:
+            print('  %r: %r != %r' % (term, expected, actual))
+
+
+if __name__ == '__main__':
+    main()
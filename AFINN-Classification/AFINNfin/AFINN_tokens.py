@@ -0,0 +1,79 @@
+"""Scoring of pre-tokenized text with AFINN lexicons."""
+
+from __future__ import absolute_import, division, print_function
+
+"""
+# ------------------------------------------------------------------------------------------------
+
+The AFINN notebooks tokenize text samples (e.g. with NLTK casual_tokenize) before scoring.
+Scoring each token with find_all runs a full regex scan for every word.
+
+For pre-tokenized text, each token is looked up from the lexicon dictionary.
+Lexicon entries with several words (e.g. 'vitun pelle') are matched with a small
+n-gram window, which starts only at tokens that are first words of such entries.
+The longest n-gram is matched first, as in pattern matching.
+
+Tokens are matched as whole tokens, so punctuation should be separated by the tokenizer
+(as casual_tokenize does). Subwords inside a token are not matched.
+
+# ------------------------------------------------------------------------------------------------
+"""
+
+
+def ngram_index(word_dict):
+    """Return index of multi-word lexicon entries.
+    Parameters
+    ----------
+    word_dict : dict
+        Lexicon dictionary with tokens as keys.
+    Returns
+    -------
+    index : dict
+        Maximum number of words of the entries, keyed by the first word.
+    Examples
+    --------
+    >>> ngram_index({'vitun pelle': -3, 'vitun hieno': 2, 'ääri islam': -2, 'hyvä': 3})
+    {'vitun': 2, 'ääri': 2}
+    """
+    index = {}
+    for entry in word_dict:
+        words = entry.split()
+        if len(words) > 1:
+            index[words[0]] = max(index.get(words[0], 0), len(words))
+    return index
+
+
+def scores_from_tokens(word_dict, index, tokens):
+    """Return scores of matched tokens.
+    Parameters
+    ----------
+    word_dict : dict
+        Lexicon dictionary with tokens as keys.
+    index : dict
+        Index of multi-word entries from ngram_index.
+    tokens : list of str
+        Tokens of text. Tokens are lowercased.
+    Returns
+    -------
+    scores : list of int
+        Scores of matched tokens and multi-word entries
+    """
+    tokens = [token.lower() for token in tokens]
+    n_tokens = len(tokens)
+    lookup = word_dict.get
+    scores = []
+    i = 0
+    while i < n_tokens:
+        token = tokens[i]
+        # n-gram window, longest first
+        for n in range(min(index.get(token, 1), n_tokens - i), 1, -1):
+            score = lookup(' '.join(tokens[i:i + n]))
+            if score is not None:
+                break
+        else:
+            n = 1
+            score = lookup(token)
+        if score is not None:
+            scores.append(score)
+        i += n
+    return scores
@@ -0,0 +1,166 @@
+"""Epoch-time benchmark of fixed and length-bucketed CharCNN batches."""
+
+from __future__ import absolute_import, division, print_function
+
+"""
+# ------------------------------------------------------------------------------------------------
+
+Trains the CharCNN model (CharCNN_model.py) for one epoch with the batches of the notebooks
+(WeightedRandomSampler, every sample padded to MAX_LENGTH) and with length-bucketed batches
+(BucketBatchSampler over the same WeightedRandomSampler, PadCollate), and reports the epoch
+times, the share of padding and the reduction of the epoch time. The model trained with the
+fixed batches then predicts the first samples padded to MAX_LENGTH and padded by PadCollate,
+and the shares of changed pooled features (the output of the global max pooling) and of
+changed predictions, and the largest change of the log-probabilities are reported: PAD is a
+non-zero one-hot vector and the global max pooling runs over the padded positions, so the
+predictions of a model depend on the padding of its inputs.
+
+The texts are the lines of a text file, or the text column of a csv/xlsx file (pandas), and
+the labels are drawn with --positive-rate (the class balance of the sampler is what matters).
+
+Usage (from the CharCNN-Classification folder, on CPU):
+
+    python -m CharCNNfin.CharCNN_benchmark --data texts.txt --limit 2000 --batch-size 16
+
+# ------------------------------------------------------------------------------------------------
+"""
+
+import argparse
+import time
+
+import numpy as np
+import torch
+import torch.nn as nn
+from torch.utils.data import DataLoader, WeightedRandomSampler
+
+from .CharCNN_buckets import BucketBatchSampler, PadCollate, padded_fraction
+from .CharCNN_data import MAX_LENGTH, CharDataset, OneHotCollate
+from .CharCNN_encoder import CharEncoder
+from .CharCNN_model import CharCNN, CharCNNConfig
+
+
+def read_texts(filename, column='text'):
+    """Return texts of a column of an xlsx or csv file, or the lines of a text file."""
+    if filename.endswith(('.xlsx', '.xls', '.csv')):
+        import pandas as pd
+        reader = pd.read_csv if filename.endswith('.csv') else pd.read_excel
+        return [str(text) for text in reader(filename)[column]]
+    with open(filename, encoding='utf-8') as fid:
+        return [line.rstrip('\n') for line in fid if line.strip()]
+
+
+def class_sampler(labels):
+    """Return class-balancing WeightedRandomSampler of labels, as in the notebooks."""
+    labels = np.asarray(labels)
+    weight = 1. / np.bincount(labels)
+    return WeightedRandomSampler(weights=torch.as_tensor(weight[labels]),
+                                 num_samples=len(labels), replacement=True)
+
+
+def train_epoch(model, dataloader, optimizer, criterion, device):
+    """Train one epoch and return the number of batches."""
+    model.train()
+    n_batches = 0
+    for batch in dataloader:
+        b_input_ids = batch[0].to(device)
+        b_labels = batch[1].to(device).long()
+        optimizer.zero_grad()
+        logits = model(b_input_ids)
+        loss = criterion(logits.view(-1, 2), b_labels.view(-1))
+        loss.backward()
+        optimizer.step()
+        n_batches += 1
+    return n_batches
+
+
+def time_epoch(dataset, batch_sampler, collate_fn, config, device, seed):
+    """Return seconds, batches and model of one training epoch of a new model."""
+    torch.manual_seed(seed)
+    model = CharCNN(config).to(device)
+    optimizer = torch.optim.AdamW(model.parameters(), lr=0.000001, weight_decay=0.5, eps=1e-8)
+    criterion = nn.CrossEntropyLoss()
+    dataloader = DataLoader(dataset, batch_sampler=batch_sampler, collate_fn=collate_fn)
+    t0 = time.perf_counter()
+    n_batches = train_epoch(model, dataloader, optimizer, criterion, device)
+    return time.perf_counter() - t0, n_batches, model
+
+
+def padding_effect(model, dataset, vocab_size, device, n_samples=256, batch_size=16):
+    """Return share of changed pooled features and predictions, and largest change of the
+    log-probabilities, of the first samples padded to MAX_LENGTH and by PadCollate."""
+    model.eval()
+    samples = [dataset[idx] for idx in range(min(n_samples, len(dataset)))]
+    features = []
+    # the input of fc1 is the output of the global max pooling
+    hook = model.fc1.register_forward_pre_hook(lambda module, inputs: features.append(inputs[0]))
+    changed_features, changed, largest = 0., 0, 0.
+    with torch.no_grad():
+        for start in range(0, len(samples), batch_size):
+            batch = samples[start:start + batch_size]
+            fixed = model(OneHotCollate(vocab_size)(batch)[0].to(device))
+            padded = model(PadCollate(vocab_size)(batch)[0].to(device))
+            changed_features += float((features[-2] != features[-1]).float().mean(1).sum())
+            changed += int((fixed.argmax(1) != padded.argmax(1)).sum())
+            largest = max(largest, float((fixed - padded).abs().max()))
+    hook.remove()
+    return changed_features / len(samples), changed / len(samples), largest
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data', required=True, help='text file of lines, or csv/xlsx file')
+    parser.add_argument('--column', default='text', help='text column of csv/xlsx files')
+    parser.add_argument('--limit', type=int, help='number of texts')
+    parser.add_argument('--batch-size', type=int, default=16)
+    parser.add_argument('--max-length', type=int, default=MAX_LENGTH)
+    parser.add_argument('--filters', type=int, help='convolution filters, default is max length')
+    parser.add_argument('--positive-rate', type=float, default=0.2)
+    parser.add_argument('--device', default='cpu')
+    parser.add_argument('--threads', type=int, help='torch threads')
+    parser.add_argument('--seed', type=int, default=123)
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    texts = read_texts(args.data, args.column)[:args.limit]
+    rng = np.random.default_rng(args.seed)
+    labels = (rng.random(len(texts)) < args.positive_rate).astype(np.int64)
+    labels[:2] = (0, 1)
+    encoder = CharEncoder(max_length=args.max_length)
+    dataset = CharDataset.from_texts(texts, labels, encoder=encoder, max_length=args.max_length)
+    config = CharCNNConfig(max_length=args.filters or args.max_length,
+                           vocab_size=encoder.vocab_size)
+    device = torch.device(args.device)
+
+    torch.manual_seed(args.seed)
+    fixed_batches = torch.utils.data.BatchSampler(class_sampler(labels), args.batch_size,
+                                                  drop_last=True)
+    bucket_batches = BucketBatchSampler(dataset.lengths, args.batch_size,
+                                        sampler=class_sampler(labels), drop_last=True)
+    print('texts %d  mean length %.1f  batch size %d  filters %d  device %s' % (
+        len(texts), dataset.lengths.mean(), args.batch_size, config.num_conv_filters, device))
+
+    results, models = [], []
+    for name, batch_sampler, collate_fn in (
+            ('fixed', fixed_batches, OneHotCollate(encoder.vocab_size)),
+            ('bucketed', bucket_batches, PadCollate(encoder.vocab_size))):
+        torch.manual_seed(args.seed)
+        batches = [list(batch) for batch in batch_sampler]
+        padding = padded_fraction(batches, dataset.lengths,
+                                  max_length=args.max_length if name == 'fixed' else None)
+        seconds, n_batches, model = time_epoch(dataset, batches, collate_fn, config, device,
+                                               args.seed)
+        results.append(seconds)
+        models.append(model)
+        print('%-8s epoch %8.1f s  batches %5d  padding %.3f' % (name, seconds, n_batches, padding))
+    print('epoch time reduction %.1f %% (%.1fx faster)' % (
+        100 * (1 - results[1] / results[0]), results[0] / results[1]))
+    features, changed, largest = padding_effect(models[0], dataset, encoder.vocab_size, device)
+    print('fixed model, padding to %d vs PadCollate: changed pooled features %.3f  '
+          'changed predictions %.3f  largest log-probability change %.2e' % (
+              args.max_length, features, changed, largest))
+
+
+if __name__ == '__main__':
+    main()
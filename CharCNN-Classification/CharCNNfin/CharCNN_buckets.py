@@ -0,0 +1,226 @@
+"""Length-bucketed batches with dynamic padding for CharCNN models."""
+
+from __future__ import absolute_import, division, print_function
+
+"""
+# ------------------------------------------------------------------------------------------------
+
+The notebooks pad every sample to MAX_LENGTH = 850 characters, while most samples are short
+(mean length ~35, ~86 % of the samples at most 64 characters), so most of the convolutions
+are computed over padding. BucketBatchSampler and PadCollate batch samples of similar length
+and pad each batch only to its own longest sample:
+
+    - the indices of an epoch are drawn from the sampler of the notebooks (e.g. the
+      class-balancing WeightedRandomSampler), so the samples of an epoch and their
+      frequencies are the ones of the sampler
+    - the drawn indices are taken in pools of pool_batches batches, each pool is sorted by
+      sample length and cut into batches, and the order of the batches is shuffled
+    - PadCollate cuts the batch to the length of its longest sample (at least the
+      MIN_LENGTH of the model, rounded up to a multiple), so the model (CharCNN_model.py,
+      global max pooling over time) gets batches of different lengths
+
+    train_batches = BucketBatchSampler(train_dataset.lengths, batch_size, sampler=train_sampler,
+                                       drop_last=True)
+    train_dataloader = DataLoader(train_dataset, batch_sampler=train_batches,
+                                  collate_fn=PadCollate(vocab_size))
+
+Without a sampler the indices are all samples in order, or shuffled (shuffle=True), e.g.
+for validation and test data. padded_fraction reports the share of padding of the batches.
+
+The padding changes the predictions of a model (PAD is a non-zero one-hot vector and the
+global max pooling runs over the padded positions, see CharCNN_model.py), so a model is
+validated, tested and used with the padding it was trained with: PadCollate for models
+trained with it, OneHotCollate and MAX_LENGTH for the models of the notebooks.
+
+# ------------------------------------------------------------------------------------------------
+"""
+
+import numpy as np
+import torch
+
+from .CharCNN_data import one_hot, text_lengths
+from .CharCNN_model import MIN_LENGTH
+
+# Batches per sorted pool
+POOL_BATCHES = 50
+
+
+def padded_length(length, min_length=MIN_LENGTH, multiple=8):
+    """Return padded length of a batch with samples of at most length characters.
+    Examples
+    --------
+    >>> padded_length(35), padded_length(200), padded_length(200, min_length=1, multiple=1)
+    (144, 200, 200)
+    """
+    length = max(int(length), min_length)
+    return -(-length // multiple) * multiple
+
+
+def bucket_batches(indices, lengths, batch_size, pool_batches=POOL_BATCHES, drop_last=False,
+                   shuffle=True, rng=None):
+    """Return batches of samples of similar length.
+    Parameters
+    ----------
+    indices : array_like of int
+        Indices of the samples of an epoch, in the order drawn by a sampler.
+    lengths : numpy.ndarray
+        Lengths of all samples of the dataset.
+    batch_size : int
+        Samples per batch.
+    pool_batches : int, optional
+        Batches per pool sorted by length; 1 keeps the batches of the drawn order.
+    drop_last : bool, optional
+        Drop the last drawn indices not filling a batch (before sorting, as the last
+        incomplete batch of DataLoader).
+    shuffle : bool, optional
+        Shuffle the order of the batches.
+    rng : numpy.random.Generator, optional
+        Random generator of the batch order.
+    Returns
+    -------
+    batches : list of lists of int
+        Indices of the batches
+    Examples
+    --------
+    >>> lengths = np.array([5, 100, 7, 90, 6, 80])
+    >>> bucket_batches(range(6), lengths, 2, shuffle=False)
+    [[0, 4], [2, 5], [3, 1]]
+    """
+    indices = np.asarray(indices, dtype=np.int64)
+    lengths = np.asarray(lengths)
+    pool_size = batch_size * max(int(pool_batches), 1)
+    if drop_last:
+        indices = indices[:len(indices) // batch_size * batch_size]
+    batches = []
+    for start in range(0, len(indices), pool_size):
+        pool = indices[start:start + pool_size]
+        pool = pool[np.argsort(lengths[pool], kind='stable')]
+        batches.extend(pool[position:position + batch_size].tolist()
+                       for position in range(0, len(pool), batch_size))
+    if shuffle and batches:
+        rng = np.random.default_rng() if rng is None else rng
+        batches = [batches[position] for position in rng.permutation(len(batches))]
+    return batches
+
+
+def padded_fraction(batches, lengths, max_length=None, **kwargs):
+    """Return share of padding in batches.
+    Parameters
+    ----------
+    batches : list of lists of int
+        Indices of the batches.
+    lengths : numpy.ndarray
+        Lengths of the samples.
+    max_length : int, optional
+        Fixed length of all batches, default is the padded length of each batch
+        (keyword arguments of padded_length).
+    Returns
+    -------
+    fraction : float
+        Padding characters per all characters of the batches
+    """
+    lengths = np.asarray(lengths)
+    characters = padded = 0
+    for batch in batches:
+        batch_lengths = np.minimum(lengths[batch], max_length or np.inf)
+        width = max_length or padded_length(batch_lengths.max(), **kwargs)
+        characters += batch_lengths.sum()
+        padded += width * len(batch)
+    return 1.0 - characters / padded if padded else 0.0
+
+
+class BucketBatchSampler(torch.utils.data.Sampler):
+    """Batch sampler of samples of similar length."""
+
+    def __init__(self, lengths, batch_size, sampler=None, pool_batches=POOL_BATCHES,
+                 drop_last=False, shuffle=None):
+        """Setup sampler.
+        Parameters
+        ----------
+        lengths : array_like of int
+            Lengths of the samples, e.g. CharDataset.lengths.
+        batch_size : int
+            Samples per batch.
+        sampler : torch.utils.data.Sampler, optional
+            Sampler of the indices of an epoch, e.g. WeightedRandomSampler,
+            default is all samples.
+        pool_batches : int, optional
+            Batches per pool sorted by length.
+        drop_last : bool, optional
+            Drop the last incomplete batch.
+        shuffle : bool, optional
+            Shuffle the batches (and the samples without a sampler), default is True
+            with a sampler and False without.
+        """
+        self.lengths = np.asarray(lengths)
+        self.batch_size = batch_size
+        self.sampler = sampler
+        self.pool_batches = pool_batches
+        self.drop_last = drop_last
+        self.shuffle = sampler is not None if shuffle is None else shuffle
+
+    def _rng(self):
+        # Seeded from the torch generator, as the samplers of torch
+        seed = int(torch.empty((), dtype=torch.int64).random_().item())
+        return np.random.default_rng(seed)
+
+    def batches(self):
+        """Return batches of an epoch."""
+        rng = self._rng() if self.shuffle else None
+        if self.sampler is not None:
+            indices = np.fromiter(iter(self.sampler), dtype=np.int64)
+        elif self.shuffle:
+            indices = rng.permutation(len(self.lengths))
+        else:
+            indices = np.arange(len(self.lengths))
+        return bucket_batches(indices, self.lengths, self.batch_size,
+                              pool_batches=self.pool_batches, drop_last=self.drop_last,
+                              shuffle=self.shuffle, rng=rng)
+
+    def __iter__(self):
+        return iter(self.batches())
+
+    def __len__(self):
+        n_samples = len(self.sampler) if self.sampler is not None else len(self.lengths)
+        if self.drop_last:
+            return n_samples // self.batch_size
+        return -(-n_samples // self.batch_size)
+
+
+class PadCollate(object):
+    """Collate function of DataLoaders padding batches of CharDataset samples to their length.
+    Not for models trained on samples padded to MAX_LENGTH, which predict otherwise with
+    shorter padding.
+    """
+
+    def __init__(self, vocab_size=None, min_length=MIN_LENGTH, multiple=8, dtype=torch.float32):
+        """Setup collate function.
+        Parameters
+        ----------
+        vocab_size : int, optional
+            Length of the one-hot vectors; None gives index batches (the model
+            changes them to one-hot vectors).
+        min_length : int, optional
+            Shortest batch length, default is the shortest input of the model.
+        multiple : int, optional
+            Batch lengths are rounded up to a multiple, which limits the number of
+            different input shapes.
+        dtype : torch.dtype, optional
+            Type of the one-hot vectors.
+        """
+        self.vocab_size = vocab_size
+        self.min_length = min_length
+        self.multiple = multiple
+        self.dtype = dtype
+
+    def __call__(self, samples):
+        indices = np.stack([sample[0] for sample in samples])
+        labels = torch.as_tensor(np.array([sample[1] for sample in samples]))
+        length = padded_length(text_lengths(indices).max(), min_length=self.min_length,
+                               multiple=self.multiple)
+        if length > indices.shape[1]:
+            indices = np.pad(indices, ((0, 0), (0, length - indices.shape[1])))
+        indices = indices[:, :length]
+        if self.vocab_size is None:
+            return torch.from_numpy(indices.astype(np.int64)), labels
+        return one_hot(indices, self.vocab_size, dtype=self.dtype), labels
@@ -0,0 +1,206 @@
+"""Index-based datasets of character sequences for CharCNN models."""
+
+from __future__ import absolute_import, division, print_function
+
+"""
+# ------------------------------------------------------------------------------------------------
+
+The Dataset class of the notebooks stores every sample as a one-hot float32 matrix
+(MAX_LENGTH x vocab_size, 850 x 112 x 4 bytes = ~380 KB per sample), built row by row with
+a new identity matrix per sample. CharDataset stores the padded character indices only:
+
+    - indices are kept in the smallest unsigned integer type of the vocabulary (uint8 for
+      the 112 characters of the notebooks, 850 bytes per sample), ~450 times less memory
+      than the one-hot matrices
+    - one-hot matrices are built per batch, by OneHotCollate in the DataLoader or by
+      one_hot in the model, with the same values as np.identity(vocab_size)[indices]
+      (the PAD index 0 is the one-hot vector of index 0, as in the notebooks)
+    - texts are encoded with CharEncoder (CharCNN_encoder.py), or with the Keras character
+      tokenizer of the notebooks
+    - classes, get_batch_labels and get_batch_texts are kept, so target_count and
+      create_sampler of the notebooks work as such
+
+    train_dataset = CharDataset.from_texts(train_data['text'], train_data['HSbinary'],
+                                           max_length=MAX_LENGTH)
+    train_dataloader = DataLoader(train_dataset, batch_size=batch_size, sampler=train_sampler,
+                                  collate_fn=OneHotCollate(vocab_size), drop_last=True)
+
+The batches of the DataLoader are (one-hot float32 tensor of batch x length x vocab_size,
+labels), the same as with the Dataset of the notebooks.
+
+# ------------------------------------------------------------------------------------------------
+"""
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+
+from .CharCNN_encoder import PAD, CharEncoder
+
+MAX_LENGTH = 850
+
+
+def index_dtype(vocab_size):
+    """Return smallest integer type of the indices of a vocabulary.
+    Parameters
+    ----------
+    vocab_size : int
+        Number of indices, including PAD and UNK.
+    Returns
+    -------
+    dtype : numpy.dtype
+        uint8, int16 or int32
+    """
+    for dtype in (np.uint8, np.int16):
+        if vocab_size - 1 <= np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.int32)
+
+
+def text_lengths(indices):
+    """Return lengths of post-padded index rows, up to the last index other than PAD.
+    Parameters
+    ----------
+    indices : numpy.ndarray
+        Padded character indices, samples x length.
+    Returns
+    -------
+    lengths : numpy.ndarray
+        Lengths of the samples
+    """
+    indices = np.asarray(indices)
+    if not indices.size:
+        return np.zeros(len(indices), dtype=np.int64)
+    filled = indices != PAD
+    last = indices.shape[1] - np.argmax(filled[:, ::-1], axis=1)
+    return np.where(filled.any(axis=1), last, 0).astype(np.int64)
+
+
+def one_hot(indices, vocab_size, dtype=torch.float32):
+    """Return one-hot vectors of character indices.
+    Parameters
+    ----------
+    indices : torch.Tensor or numpy.ndarray
+        Character indices, e.g. batch x length.
+    vocab_size : int
+        Length of the one-hot vectors.
+    dtype : torch.dtype, optional
+        Type of the vectors.
+    Returns
+    -------
+    vectors : torch.Tensor
+        One-hot vectors, shape of indices x vocab_size
+    """
+    if not isinstance(indices, torch.Tensor):
+        indices = torch.from_numpy(np.asarray(indices, dtype=np.int64))
+    return F.one_hot(indices.long(), vocab_size).to(dtype)
+
+
+class OneHotCollate(object):
+    """Collate function of DataLoaders building one-hot batches of CharDataset samples."""
+
+    def __init__(self, vocab_size, dtype=torch.float32):
+        """Setup collate function.
+        Parameters
+        ----------
+        vocab_size : int
+            Length of the one-hot vectors.
+        dtype : torch.dtype, optional
+            Type of the vectors.
+        """
+        self.vocab_size = vocab_size
+        self.dtype = dtype
+
+    def __call__(self, samples):
+        indices = np.stack([sample[0] for sample in samples])
+        labels = torch.as_tensor(np.array([sample[1] for sample in samples]))
+        return one_hot(indices, self.vocab_size, dtype=self.dtype), labels
+
+
+class CharDataset(torch.utils.data.Dataset):
+    """Dataset of padded character indices and labels."""
+
+    def __init__(self, indices, labels, vocab_size=None):
+        """Setup dataset.
+        Parameters
+        ----------
+        indices : numpy.ndarray
+            Padded character indices, samples x length.
+        labels : iterable of int
+            Labels of the samples.
+        vocab_size : int, optional
+            Number of indices, default is the largest index + 1.
+        """
+        indices = np.asarray(indices)
+        if vocab_size is None:
+            vocab_size = int(indices.max()) + 1 if indices.size else 1
+        self.vocab_size = vocab_size
+        self.texts = np.ascontiguousarray(indices, dtype=index_dtype(vocab_size))
+        self.lengths = text_lengths(self.texts)
+        self.labels = [label for label in labels]
+        if len(self.labels) != len(self.texts):
+            raise ValueError('%d labels for %d samples' % (len(self.labels), len(self.texts)))
+
+    @classmethod
+    def from_texts(cls, texts, labels, encoder=None, max_length=MAX_LENGTH, vocab_size=None):
+        """Return dataset of texts encoded as in the notebooks.
+        Parameters
+        ----------
+        texts : iterable of str
+            Text samples, e.g. df['text'].
+        labels : iterable of int
+            Labels of the samples, e.g. df['HSbinary'].
+        encoder : CharEncoder or keras.preprocessing.text.Tokenizer, optional
+            Character encoder, default is CharEncoder of the characters of the notebooks
+            (CharCNN_encoder.py), or the character tokenizer of the notebooks (charTokenizer).
+        max_length : int, optional
+            Length of the padded samples.
+        vocab_size : int, optional
+            Number of indices, default is the vocab_size of the encoder
+            (len(word_index) + 2 for tokenizers).
+        Returns
+        -------
+        dataset : CharDataset
+            Dataset of the padded indices
+        """
+        if encoder is None:
+            encoder = CharEncoder(max_length=max_length)
+        if hasattr(encoder, 'texts_to_sequences'):
+            from keras.preprocessing.sequence import pad_sequences
+            if vocab_size is None:
+                vocab_size = len(encoder.word_index) + 2
+            text_tokens = encoder.texts_to_sequences(list(texts))
+            pad_texts = pad_sequences(text_tokens, maxlen=max_length, padding='post')
+        else:
+            if vocab_size is None:
+                vocab_size = encoder.vocab_size
+            pad_texts = encoder.encode_many(texts, max_length=max_length)
+        return cls(pad_texts, labels, vocab_size=vocab_size)
+
+    def classes(self):
+        return self.labels
+
+    def __len__(self):
+        return len(self.labels)
+
+    @property
+    def nbytes(self):
+        """Memory of the stored indices in bytes."""
+        return self.texts.nbytes
+
+    def get_batch_labels(self, idx):
+        # Fetch a batch of labels
+        return np.array(self.labels[idx])
+
+    def get_batch_texts(self, idx):
+        # Fetch a batch of inputs as indices
+        return self.texts[idx]
+
+    def get_batch_vectors(self, idx):
+        # Fetch a batch of inputs as one-hot vectors
+        return one_hot(self.texts[idx], self.vocab_size)
+
+    def __getitem__(self, idx):
+        batch_texts = self.get_batch_texts(idx)
+        batch_labels = self.get_batch_labels(idx)
+        return batch_texts, batch_labels
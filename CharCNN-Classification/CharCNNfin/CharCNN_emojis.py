@@ -0,0 +1,301 @@
+"""Emoji normalization of texts with a compiled emoji table."""
+
+from __future__ import absolute_import, division, print_function
+
+"""
+# ------------------------------------------------------------------------------------------------
+
+The notebooks handle emojis in several slow ways: extract_emoji and change_emoji_toUnicode
+of the CharCNN emoji notebooks test every key of emoji.EMOJI_DATA (~5000) against every row,
+and the SentiStrength notebooks call emoji.demojize for every token. EmojiNormalizer compiles
+the emoji table once, and produces the requested views of a text in one pass:
+
+    - 'codes': text with the emojis changed to Unicode code tokens, e.g. ' U1F642 '
+      (code_format per code point of the emoji; NOTEBOOK_CODE_FORMAT ' %05X ' gives
+      the code tokens of change_emoji_toUnicode, see below for the texts that differ)
+    - 'names': text with the emojis changed to names, e.g. ':slightly_smiling_face:',
+      as emoji.demojize
+    - 'stripped': text without the emojis
+    - 'emojis': list of the emojis of the text, in order
+
+The emojis are found with a prefix trie of the emoji sequences, tried only at characters
+starting an emoji (one regex character class of code point ranges), and the longest emoji
+sequence at a position wins, so '👊🏻' is one emoji and not '👊' and a skin tone.
+
+With NOTEBOOK_CODE_FORMAT the 'codes' are not always the texts of change_emoji_toUnicode.
+The notebook replaces the emojis of emoji.EMOJI_DATA one at a time in the order of the
+table, so an emoji inside a longer sequence and earlier in the table is replaced first, and
+the characters of the sequence that are not emojis on their own are left as they are:
+
+    - ZWJ sequences: the notebook mostly changes the emojis of '👩\u200d💼' separately and
+      keeps the zero width joiner (' 1F469 \u200d 1F4BC '), EmojiNormalizer changes the
+      whole sequence, the joiner too (' 1F469  0200D  1F4BC ')
+    - adjacent flags: the notebook changes the flags in the order of the table, also a
+      flag made of the halves of two flags ('🇵🇦🇨🇻' gives '🇵 1F1E6  1F1E8 🇻'),
+      EmojiNormalizer pairs the regional indicators from the left
+      (' 1F1F5  1F1E6  1F1E8  1F1FB ')
+
+Single emojis, skin tones, variation selectors and single flags give the same texts. With
+the table of emoji 2.8.0 (the version of the notebooks), ~96 % of random texts with ZWJ
+sequences and ~28 % of random texts with pairs of adjacent flags differ.
+
+    normalizer = EmojiNormalizer()
+    views = normalizer.normalize_many(df['cleantext'], views=('codes', 'emojis'))
+    df['unitext'] = views['codes']
+    df['emojis'] = [''.join(emojis) for emojis in views['emojis']]
+
+The table of emojis is built from the 'emoji' package (pip install emoji), or given as
+a dictionary of names keyed by emoji sequences.
+
+# ------------------------------------------------------------------------------------------------
+"""
+
+import re
+from functools import lru_cache
+
+try:
+    import emoji
+except ImportError:
+    emoji = None
+
+VIEWS = ('codes', 'names', 'stripped', 'emojis')
+
+CODE_FORMAT = ' U%X '
+
+# Code tokens of change_emoji_toUnicode of the notebooks
+NOTEBOOK_CODE_FORMAT = ' %05X '
+
+# Key of the emoji sequence ending at a trie node, the other keys are characters
+_SEQUENCE = 0
+
+
+def character_class(characters):
+    """Return regex character class of characters, contiguous characters as ranges.
+    Examples
+    --------
+    >>> character_class('dacbx')
+    '[a-dx]'
+    """
+    codes = sorted(set(map(ord, characters)))
+    ranges = []
+    for code in codes:
+        if ranges and code == ranges[-1][1] + 1:
+            ranges[-1][1] = code
+        else:
+            ranges.append([code, code])
+    return '[' + ''.join(re.escape(chr(first)) if first == last else
+                         re.escape(chr(first)) + '-' + re.escape(chr(last))
+                         for first, last in ranges) + ']'
+
+
+@lru_cache(maxsize=None)
+def emoji_names():
+    """Return English names of the emojis of the 'emoji' package.
+    Returns
+    -------
+    names : dict
+        Names without delimiters (e.g. 'red_heart') keyed by emoji sequences
+    """
+    if emoji is None:
+        raise ImportError("Emoji normalization needs the 'emoji' package")
+    return dict((sequence, data['en'].strip(':')) for sequence, data in emoji.EMOJI_DATA.items())
+
+
+class EmojiTable(object):
+    """Prefix trie of emoji sequences."""
+
+    def __init__(self, names):
+        """Compile table.
+        Parameters
+        ----------
+        names : dict
+            Names of emojis keyed by emoji sequences.
+        """
+        self.names = dict(names)
+        self.root = {}
+        for sequence in self.names:
+            if not sequence:
+                continue
+            node = self.root
+            for character in sequence:
+                node = node.setdefault(character, {})
+            node[_SEQUENCE] = sequence
+        # Only these characters start an emoji; ranges keep the character set fast
+        # for characters beyond the Basic Multilingual Plane
+        self.pattern = re.compile(character_class(self.root)) if self.root else None
+
+    def __len__(self):
+        return len(self.names)
+
+    def finditer(self, text):
+        """Return iterator over the emojis of a text.
+        Parameters
+        ----------
+        text : str
+            Text.
+        Returns
+        -------
+        emojis : iterator of (int, int, str)
+            Start, end (exclusive) and sequence of the longest emoji at each position,
+            non-overlapping and in order
+        """
+        if self.pattern is None:
+            return
+        search = self.pattern.search
+        root = self.root
+        match = search(text)
+        while match is not None:
+            start = match.start()
+            node = root
+            found = None
+            for position in range(start, len(text)):
+                node = node.get(text[position])
+                if node is None:
+                    break
+                sequence = node.get(_SEQUENCE)
+                if sequence is not None:
+                    found = (position + 1, sequence)
+            if found is None:
+                match = search(text, start + 1)
+            else:
+                yield start, found[0], found[1]
+                match = search(text, found[0])
+
+
+class EmojiNormalizer(object):
+    """Emoji views of texts: code tokens, names, stripped text and emoji lists."""
+
+    def __init__(self, names=None, code_format=CODE_FORMAT, delimiters=(':', ':')):
+        """Setup normalizer.
+        Parameters
+        ----------
+        names : dict, optional
+            Names of emojis keyed by emoji sequences, default is the emojis
+            of the 'emoji' package (emoji_names).
+        code_format : str, optional
+            Format of the code token of each code point of an emoji.
+        delimiters : (str, str), optional
+            Delimiters of emoji names, as in emoji.demojize.
+        """
+        self.table = EmojiTable(emoji_names() if names is None else names)
+        self.code_format = code_format
+        self.delimiters = delimiters
+        self._codes = {}
+
+    def code(self, sequence):
+        """Return code tokens of an emoji sequence.
+        Examples
+        --------
+        >>> EmojiNormalizer({}).code('\\U0001f642')
+        ' U1F642 '
+        """
+        try:
+            return self._codes[sequence]
+        except KeyError:
+            code = self._codes[sequence] = ''.join(
+                self.code_format % ord(character) for character in sequence)
+            return code
+
+    def name(self, sequence):
+        """Return delimited name of an emoji sequence."""
+        return self.delimiters[0] + self.table.names[sequence] + self.delimiters[1]
+
+    def normalize(self, text, views=VIEWS):
+        """Return emoji views of a text.
+        Parameters
+        ----------
+        text : str
+            Text.
+        views : iterable of str, optional
+            Views of the text, see VIEWS.
+        Returns
+        -------
+        views : dict
+            Text with emoji codes ('codes'), text with emoji names ('names'),
+            text without emojis ('stripped') and list of emojis ('emojis')
+        Examples
+        --------
+        >>> normalizer = EmojiNormalizer({'\\U0001f642': 'slightly_smiling_face'})
+        >>> views = normalizer.normalize('Moi \\U0001f642!')
+        >>> views['codes'], views['names'], views['stripped']
+        ('Moi  U1F642 !', 'Moi :slightly_smiling_face:!', 'Moi !')
+        """
+        text = str(text)
+        unknown = set(views) - set(VIEWS)
+        if unknown:
+            raise ValueError('unknown views %s, views are %s' % (sorted(unknown), VIEWS))
+        pieces = dict((view, []) for view in views if view != 'emojis')
+        emojis = []
+        position = 0
+        for start, end, sequence in self.table.finditer(text):
+            emojis.append(sequence)
+            if pieces:
+                between = text[position:start]
+                for view, parts in pieces.items():
+                    parts.append(between)
+                    if view == 'codes':
+                        parts.append(self.code(sequence))
+                    elif view == 'names':
+                        parts.append(self.name(sequence))
+            position = end
+        result = {}
+        for view in views:
+            if view == 'emojis':
+                result[view] = emojis
+            elif not emojis:
+                result[view] = text
+            else:
+                pieces[view].append(text[position:])
+                result[view] = ''.join(pieces[view])
+        return result
+
+    def normalize_many(self, texts, views=VIEWS):
+        """Return emoji views of many texts.
+        Parameters
+        ----------
+        texts : iterable of str
+            Texts, e.g. a pandas Series.
+        views : iterable of str, optional
+            Views of the texts, see VIEWS.
+        Returns
+        -------
+        views : dict
+            Lists of the views in the order of the texts, keyed by view
+        """
+        views = tuple(views)
+        result = dict((view, []) for view in views)
+        # Repeated texts are normalized once
+        seen = {}
+        for text in texts:
+            text = str(text)
+            normalized = seen.get(text)
+            if normalized is None:
+                normalized = seen[text] = self.normalize(text, views)
+            for view in views:
+                value = normalized[view]
+                result[view].append(list(value) if view == 'emojis' else value)
+        return result
+
+    def codes(self, text):
+        """Return text with the emojis changed to code tokens.
+        Examples
+        --------
+        >>> names = {'\\U0001f469': 'woman', '\\U0001f4bc': 'briefcase',
+        ...          '\\U0001f469\\u200d\\U0001f4bc': 'woman_office_worker'}
+        >>> normalizer = EmojiNormalizer(names, code_format=NOTEBOOK_CODE_FORMAT)
+        >>> normalizer.codes('\\U0001f469\\u200d\\U0001f4bc')
+        ' 1F469  0200D  1F4BC '
+        """
+        return self.normalize(text, ('codes',))['codes']
+
+    def demojize(self, text):
+        """Return text with the emojis changed to names."""
+        return self.normalize(text, ('names',))['names']
+
+    def strip(self, text):
+        """Return text without the emojis."""
+        return self.normalize(text, ('stripped',))['stripped']
+
+    def emojis(self, text):
+        """Return list of the emojis of a text."""
+        return self.normalize(text, ('emojis',))['emojis']
@@ -0,0 +1,137 @@
+"""Vectorized character encoder of CharCNN models."""
+
+from __future__ import absolute_import, division, print_function
+
+"""
+# ------------------------------------------------------------------------------------------------
+
+The notebooks import TensorFlow/Keras only for Tokenizer(char_level=True).texts_to_sequences
+and pad_sequences over the hand-built character index (vocab_chars). CharEncoder does the same
+encoding with NumPy:
+
+    - the index is the one of the notebooks: characters of vocab_chars from 1 (a repeated
+      character keeps its last index), UNK is the largest index + 1 and PAD is 0, and
+      vocab_size is the one of the notebooks, len(word_index) + 2 with UNK in word_index
+      (112 for VOCAB_CHARS)
+    - a lookup table of code points maps characters to indices, characters missing from
+      the index (and spaces) to UNK
+    - encode_many truncates the texts longer than max_length as pad_sequences, from the
+      start ('pre', the default of pad_sequences used by the notebooks) or from the end
+      ('post'), joins the texts, maps the code points of all texts at once, and writes the
+      indices to a preallocated array (zeros, PAD) with post-padding
+
+    encoder = CharEncoder(max_length=MAX_LENGTH)
+    pad_texts = encoder.encode_many(df['text'])     # same as pad_sequences(texts_to_sequences)
+    vocab_size = encoder.vocab_size
+
+# ------------------------------------------------------------------------------------------------
+"""
+
+import sys
+
+import numpy as np
+
+# Characters of the notebooks ('|' is listed twice)
+VOCAB_CHARS = 'abcdefghijklmnopqrstuvwxyzäöåéíßABCDEFGHIJKLMNOPQRSTUVWXYZÄÖÅÉÍ1234567890' \
+              '!"#$%&\'()*+,-./:;<=>?@[\\]^_`{|}~´”€|£'
+
+PAD = 0
+
+
+class CharEncoder(object):
+    """Encoder of texts to padded character index arrays."""
+
+    def __init__(self, vocab_chars=VOCAB_CHARS, max_length=850, truncating='pre', lower=False,
+                 dtype=np.int32):
+        """Setup encoder.
+        Parameters
+        ----------
+        vocab_chars : str, optional
+            Characters of the index, indexed from 1.
+        max_length : int or None, optional
+            Length of the encoded texts, None for the length of the longest text.
+        truncating : 'pre' or 'post', optional
+            Remove characters of long texts from the start ('pre') or from the end ('post').
+        lower : bool, optional
+            Lowercase texts before encoding.
+        dtype : numpy.dtype, optional
+            Type of the encoded arrays.
+        """
+        if truncating not in ('pre', 'post'):
+            raise ValueError("truncating must be 'pre' or 'post'")
+        self.token_index = dict(zip(vocab_chars, range(1, len(vocab_chars) + 1)))
+        self.unk_index = max(self.token_index.values(), default=0) + 1
+        # The notebooks count UNK in word_index and add 1 for UNK and 1 for PAD
+        self.vocab_size = len(self.token_index) + 3
+        self.max_length = max_length
+        self.truncating = truncating
+        self.lower = lower
+        self.dtype = np.dtype(dtype)
+        # Index of each code point (1.1 MB for up to 255 indices)
+        table_dtype = np.uint8 if self.unk_index <= 0xff else self.dtype
+        self.table = np.full(sys.maxunicode + 1, self.unk_index, dtype=table_dtype)
+        for char, index in self.token_index.items():
+            self.table[ord(char)] = index
+
+    def codes(self, text):
+        """Return indices of the characters of a text, without padding.
+        Examples
+        --------
+        >>> CharEncoder().codes('Äiti 😀')
+        array([ 59,   9,  20,   9, 111, 111], dtype=uint8)
+        """
+        text = str(text)
+        if self.lower:
+            text = text.lower()
+        points = np.frombuffer(text.encode('utf-32-le', 'surrogatepass'), dtype='<u4')
+        return self.table.take(points)
+
+    def lengths(self, texts):
+        """Return numbers of characters of texts."""
+        return np.fromiter((len(str(text)) for text in texts), dtype=np.int64)
+
+    def encode_many(self, texts, max_length=None):
+        """Return padded character indices of texts.
+        Parameters
+        ----------
+        texts : iterable of str
+            Texts, e.g. a list or a pandas Series.
+        max_length : int, optional
+            Length of the encoded texts, default is the max_length of the encoder.
+        Returns
+        -------
+        indices : numpy.ndarray
+            Indices of the characters, texts x max_length, padded with PAD after the texts
+        Examples
+        --------
+        >>> encoder = CharEncoder(max_length=5)
+        >>> encoder.encode_many(['a b', 'abcdefg', ''])
+        array([[  1, 111,   2,   0,   0],
+               [  3,   4,   5,   6,   7],
+               [  0,   0,   0,   0,   0]], dtype=int32)
+        """
+        texts = [str(text) for text in texts]
+        if max_length is None:
+            max_length = self.max_length
+        if max_length is None:
+            max_length = max(map(len, texts), default=0)
+        # Truncate long texts, then the characters fill the rows in order
+        if self.truncating == 'pre':
+            texts = [text[-max_length:] if len(text) > max_length else text for text in texts]
+        else:
+            texts = [text[:max_length] for text in texts]
+        lengths = np.fromiter(map(len, texts), dtype=np.int64, count=len(texts))
+        indices = np.zeros((len(texts), max_length), dtype=self.dtype)
+        if max_length:
+            indices[np.arange(max_length) < lengths[:, None]] = self.codes(''.join(texts))
+        return indices
+
+    def encode(self, text, max_length=None):
+        """Return padded character indices of a text, see encode_many."""
+        return self.encode_many([text], max_length=max_length)[0]
+
+    def decode(self, indices):
+        """Return text of character indices, UNK as '?' and without padding."""
+        chars = dict((index, char) for char, index in self.token_index.items())
+        chars[self.unk_index] = '?'
+        return ''.join(chars.get(int(index), '') for index in indices if index != PAD)
@@ -0,0 +1,165 @@
+"""CharCNN model of the notebooks for inputs of any length."""
+
+from __future__ import absolute_import, division, print_function
+
+"""
+# ------------------------------------------------------------------------------------------------
+
+The CharCNN class of the notebooks, with the same layers and parameter names (saved state
+dictionaries load into it), changed for batches of any length and any device:
+
+    - the convolutions end with global max pooling over time, so the fully connected
+      layers do not depend on the input length; inputs shorter than MIN_LENGTH (the
+      shortest input giving one output position of the last convolution) are padded
+      with PAD vectors
+    - inputs are one-hot batches (batch x length x vocab_size) or index batches
+      (batch x length), which are changed to one-hot vectors on the device of the model
+    - inputs are cast to the type of the weights instead of torch.cuda.FloatTensor,
+      so the model runs on CPU too
+
+    model = CharCNN(CharCNNConfig(max_length=MAX_LENGTH, vocab_size=vocab_size))
+
+The predictions depend on the padding of the inputs. PAD (index 0, as in pad_sequences of
+the notebooks) is a non-zero one-hot vector, and the convolutions and the global max pooling
+run over the padded positions too, so a model trained on inputs padded to MAX_LENGTH = 850
+gives other predictions for inputs padded to their own length. Models of the notebooks
+predict inputs padded to MAX_LENGTH (OneHotCollate of CharCNN_data.py); the length-bucketed
+batches of PadCollate (CharCNN_buckets.py) are for training new models, not a drop-in for
+existing ones.
+
+# ------------------------------------------------------------------------------------------------
+"""
+
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+
+from .CharCNN_data import one_hot
+from .CharCNN_encoder import PAD
+
+# Kernel sizes of the convolutions and the max pooling after the convolution
+LAYERS = ((7, 3), (7, 3), (5, None), (5, None), (3, None), (3, None))
+
+
+def output_length(length):
+    """Return number of output positions of the last convolution for an input length.
+    Examples
+    --------
+    >>> output_length(850), output_length(141), output_length(140)
+    (79, 1, 0)
+    """
+    for kernel_size, pool_size in LAYERS:
+        length = max(length - kernel_size + 1, 0)
+        if pool_size:
+            length //= pool_size
+    return length
+
+
+# Shortest input length of the model
+MIN_LENGTH = next(length for length in range(1, 1024) if output_length(length) > 0)
+
+
+class CharCNNConfig(object):
+    """Configuration of the CharCNN model of the notebooks."""
+
+    def __init__(self, max_length=850, vocab_size=112, target_class=2, dropout=0.5,
+                 affine_factor=4):
+        """Setup configuration.
+        Parameters
+        ----------
+        max_length : int, optional
+            MAX_LENGTH of the notebooks, the number of convolution filters.
+        vocab_size : int, optional
+            Number of input channels (length of the one-hot vectors).
+        target_class : int, optional
+            Number of classes.
+        dropout : float, optional
+            Dropout of the fully connected layers.
+        affine_factor : int, optional
+            Neurons of the fully connected layers per filter.
+        """
+        self.num_conv_filters = max_length
+        self.output_channel = max_length
+        self.num_affine_neurons = affine_factor * max_length
+        self.target_class = target_class
+        self.dropout = dropout
+        self.input_channels = vocab_size
+
+
+class CharCNN(nn.Module):
+    """Character-level CNN classifier of one-hot or index batches of any length."""
+
+    def __init__(self, config):
+        super().__init__()
+
+        input_channels = config.input_channels
+        num_conv_filters = config.num_conv_filters
+        output_channel = config.output_channel
+        num_affine_neurons = config.num_affine_neurons
+        target_class = config.target_class
+
+        self.vocab_size = input_channels
+        self.min_length = MIN_LENGTH
+
+        self.conv1 = nn.Conv1d(input_channels, num_conv_filters, kernel_size=7)
+        self.conv2 = nn.Conv1d(num_conv_filters, num_conv_filters, kernel_size=7)
+        self.conv3 = nn.Conv1d(num_conv_filters, num_conv_filters, kernel_size=5)
+        self.conv4 = nn.Conv1d(num_conv_filters, num_conv_filters, kernel_size=5)
+        self.conv5 = nn.Conv1d(num_conv_filters, num_conv_filters, kernel_size=3)
+        self.conv6 = nn.Conv1d(num_conv_filters, output_channel, kernel_size=3)
+
+        self.dropout = nn.Dropout(config.dropout)
+
+        self.fc1 = nn.Linear(output_channel, num_affine_neurons)
+        self.fc2 = nn.Linear(num_affine_neurons, num_affine_neurons)
+        self.fc3 = nn.Linear(num_affine_neurons, target_class)
+
+        # softmax activation function
+        self.softmax = nn.LogSoftmax(dim=1)
+
+        # add weights to conv and linear layers
+        if num_conv_filters == 850 and num_affine_neurons in (850, 1700, 3400):
+            self.create_weights(mean=0.0, std=0.01)
+
+    def create_weights(self, mean=0.0, std=0.05):
+        for module in self.modules():
+            if isinstance(module, nn.Conv1d) or isinstance(module, nn.Linear):
+                module.weight.data.normal_(mean, std)
+
+    def vectors(self, x):
+        """Return one-hot input batch (batch x vocab_size x length) of an input batch."""
+        if x.size(1) < self.min_length:
+            padding = self.min_length - x.size(1)
+            if x.is_floating_point():
+                pad = torch.zeros(x.size(0), padding, x.size(2), dtype=x.dtype, device=x.device)
+                pad[:, :, PAD] = 1
+            else:
+                pad = torch.full((x.size(0), padding), PAD, dtype=x.dtype, device=x.device)
+            x = torch.cat([x, pad], dim=1)
+        if not x.is_floating_point():
+            x = one_hot(x, self.vocab_size)
+        # transpose of embedding matrice
+        return x.transpose(1, 2).to(self.conv1.weight.dtype)
+
+    def forward(self, x, **kwargs):
+        x = self.vectors(x)
+
+        x = F.max_pool1d(F.relu(self.conv1(x)), 3)
+        x = F.max_pool1d(F.relu(self.conv2(x)), 3)
+        x = F.relu(self.conv3(x))
+        x = F.relu(self.conv4(x))
+        x = F.relu(self.conv5(x))
+        x = F.relu(self.conv6(x))
+
+        # global max pooling over time
+        x = F.max_pool1d(x, x.size(2)).squeeze(2)
+
+        x = F.relu(self.fc1(x.view(x.size(0), -1)))
+        x = self.dropout(x)
+        x = F.relu(self.fc2(x))
+        x = self.dropout(x)
+        x = self.fc3(x)
+
+        # softmax activation
+        x = self.softmax(x)
+        return x
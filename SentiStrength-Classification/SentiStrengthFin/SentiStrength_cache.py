@@ -0,0 +1,99 @@
+"""Cache of compiled SentiStrength lookup tables."""
+
+from __future__ import absolute_import, division, print_function
+
+"""
+# ------------------------------------------------------------------------------------------------
+
+The compiled lookup tables, the wildcard-stem index of EmotionLookupTable.txt
+(SentiStrength_index.py) and the idiom automaton of IdiomLookupTable.txt
+(SentiStrength_idioms.py), are cached with cached(name, filename, build):
+
+    - in a process-wide registry, so repeated loads share the same objects
+    - on disk, so new processes (notebooks, worker processes) load them in milliseconds
+
+Cache files are keyed by the name of the compiled structure and the content (hash) of
+the table file, so an edited table file gets a new cache file.
+
+The cache folder is '~/.cache/sentistrengthfin', or the folder given in the environment
+variable SENTISTRENGTHFIN_CACHE_DIR. The folder also has the result database of
+SentiStrengthRunner (SentiStrength_runner.py).
+
+# ------------------------------------------------------------------------------------------------
+"""
+
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+from os.path import expanduser, join
+
+# Changed when the format of cached objects changes
+CACHE_VERSION = 1
+
+_REGISTRY = {}
+
+
+def cache_dir():
+    """Return folder of cache files."""
+    return os.environ.get('SENTISTRENGTHFIN_CACHE_DIR') or join(
+        expanduser('~'), '.cache', 'sentistrengthfin')
+
+
+def _table_key(name, filename):
+    digest = hashlib.sha256(repr((CACHE_VERSION, name, sys.version_info[:2])).encode('UTF-8'))
+    with open(filename, 'rb') as fid:
+        digest.update(hashlib.sha256(fid.read()).digest())
+    return digest.hexdigest()
+
+
+def _save(filename, value):
+    # Write to a temporary file first, so that concurrent processes never read
+    # a partially written cache file; failures (e.g. read-only file system) are ignored
+    directory = cache_dir()
+    try:
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_filename = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    except OSError:
+        return
+    try:
+        with os.fdopen(fd, 'wb') as fid:
+            pickle.dump(value, fid, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_filename, filename)
+    except OSError:
+        try:
+            os.remove(temp_filename)
+        except OSError:
+            pass
+
+
+def cached(name, filename, build):
+    """Return compiled structure of a lookup table file, built once and cached.
+    Parameters
+    ----------
+    name : str
+        Name of the compiled structure, e.g. 'StemIndex'.
+    filename : str
+        Lookup table file.
+    build : callable
+        Function without arguments returning the compiled structure.
+    Returns
+    -------
+    value : object
+        Compiled structure from the registry, from the cache folder or from build
+    """
+    key = _table_key(name, filename)
+    value = _REGISTRY.get(key)
+    if value is not None:
+        return value
+    cache_filename = join(cache_dir(), key + '.pickle')
+    try:
+        with open(cache_filename, 'rb') as fid:
+            value = pickle.load(fid)
+    except Exception:
+        # Missing, unreadable or broken cache file is built again
+        value = build()
+        _save(cache_filename, value)
+    _REGISTRY[key] = value
+    return value
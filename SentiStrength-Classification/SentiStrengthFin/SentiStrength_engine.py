@@ -0,0 +1,476 @@
+"""SentiStrength-compatible sentiment scoring in Python."""
+
+from __future__ import absolute_import, division, print_function
+
+"""
+# ------------------------------------------------------------------------------------------------
+
+SentiStrengthEngine scores texts with the lookup tables of a SentiStrength data folder
+(Finnish_SentiStrength) without Java: EmotionLookupTable, BoosterWordList,
+NegatingWordList, IdiomLookupTable, EmoticonLookupTable and QuestionWords.
+
+The tables are compiled once into dictionaries, the prefix trie of SentiStrength_index.py
+and the idiom automaton of SentiStrength_idioms.py (LookupTables), and rate_many(texts, mode)
+returns the same Ratings as SentiStrengthPool (SentiStrength_pool.py), so the engine can be
+used in place of the pool in the notebooks.
+
+Texts are rated as the jar reads them in the notebooks (jar_text): the notebooks and
+SentiStrengthPool send texts to the stdin mode with spaces replaced with '+', and send them
+in UTF-8, which the jar (on Windows) decodes as Windows-1252 (JAR_INPUT_ENCODING). So 'ä'
+is read as 'Ã¤', and words with 'ä' or 'ö' never match the entries of the tables
+('johan on tyhmä ja ruma ämmä' is scored by 'ruma' only). The 'plus_spaces' and
+'input_encoding' options turn these off, e.g. plus_spaces=False for texts read by the
+jar in file mode as written, with spaces.
+
+Rules of the default options of SentiStrength:
+    - text is lowercased and split to segments at whitespace, and the segments to words
+      and runs of punctuation; the rest of a segment from the start of a word or a run
+      is an emoticon, if it is in the emoticon table (including emoji names such as
+      ':smiley:'), so with '+' for spaces only a text starting with an emoticon
+      and made of it has one (':smiley:', not 'ihana :smiley:' or ':smiley: :smiley:')
+    - a word gets its strength from the emotion table, entries ending with '*' match
+      the words starting with the stem (exact entries first, then the longest stem)
+    - a word with a letter repeated three or more times is looked up without the extra letters,
+      and its strength is emphasised by one ('ihanaaa')
+    - an idiom of the idiom table gives its strength to its first word, the other words
+      of the idiom are neutral
+    - a booster word before a sentiment word adds its strength to the sentiment word
+    - a negating word (or phrase) before a sentiment word, possibly with a booster
+      in between, turns a positive word negative at half strength and neutralises
+      a negative word
+    - an emoticon adds its value to the neutral strength (':smiley:' 2 gives positive 3)
+    - repeated punctuation with '!' ('!!!') emphasises the last sentiment word by one
+    - negative strength is ignored in questions: sentences with '?' and a question word
+    - sentences end at '.', '!' and '?'; the positive (1 to 5) and negative (-1 to -5)
+      strengths of a text are the strongest of its sentences
+    - binary, trinary and scale values are computed from the strengths as in SentiStrength,
+      see SentiStrengthEngine.value
+
+Punctuation between words (e.g. the ', ' of the token lists of the notebooks) does not
+separate boosters, negations and idioms from the words they apply to.
+
+The scores follow SentiStrength closely but not exactly; SentiStrength_fidelity.py
+reports the agreement with the output of the jar, and checks the ratings of the jar in the
+notebooks (NOTEBOOK_CASES). Known deviation: the jar does not score capitalized words
+within a sentence ('Johan On Tyhmä ja Ruma Ämmä' is neutral), the engine scores them
+as lowercased words.
+
+    from SentiStrengthFin.SentiStrength_engine import SentiStrengthEngine
+    engine = SentiStrengthEngine()
+    df['ss_binary'] = engine.rate_many(df['sampleEmojis'], mode='binary').value
+
+# ------------------------------------------------------------------------------------------------
+"""
+
+import re
+from os.path import join
+
+import numpy as np
+
+from .SentiStrength_idioms import load_idiom_automaton
+from .SentiStrength_index import load_stem_index
+from .SentiStrength_pool import DATA_FOLDER, MODES, Ratings, to_line
+
+# Lookup tables of the data folder are in UTF-8 or in Windows-1252
+ENCODINGS = ('utf-8', 'cp1252')
+
+# Encoding of the jar decoding its UTF-8 input, the default of Java on Windows
+JAR_INPUT_ENCODING = 'cp1252'
+
+WORD, EMOTICON, PUNCTUATION = 'word', 'emoticon', 'punctuation'
+
+# Word (with inner hyphens, apostrophes and dots) or punctuation character
+_TERM_PATTERN = re.compile(r"(\w+(?:[-'’.]\w+)*)|([^\w\s])")
+
+_REPEATED_LETTERS = re.compile(r'([^\W\d_])\1{2,}')
+
+_SENTENCE_END = re.compile(r'[.!?]')
+
+
+def read_lines(filename):
+    """Return lines of a lookup table file.
+    Parameters
+    ----------
+    filename : str
+        Lookup table, e.g. EmotionLookupTable.txt.
+    Returns
+    -------
+    lines : list of str
+        Non-empty lines, decoded from UTF-8 or from Windows-1252
+    """
+    with open(filename, 'rb') as fid:
+        data = fid.read()
+    for encoding in ENCODINGS:
+        try:
+            text = data.decode(encoding)
+            break
+        except UnicodeDecodeError:
+            continue
+    return [line.strip() for line in text.splitlines() if line.strip()]
+
+
+def read_table(filename):
+    """Return dictionary of a tab-separated lookup table.
+    Parameters
+    ----------
+    filename : str
+        Lookup table, e.g. EmotionLookupTable.txt.
+    Returns
+    -------
+    table : dict
+        Integer strengths keyed by lowercased entries
+    """
+    table = {}
+    for line in read_lines(filename):
+        items = line.split('\t')
+        if len(items) >= 2:
+            try:
+                table[items[0].strip().lower()] = int(items[1])
+            except ValueError:
+                continue
+    return table
+
+
+def read_list(filename):
+    """Return lowercased entries (first column) of a word list, e.g. NegatingWordList.txt."""
+    return [line.split('\t')[0].strip().lower() for line in read_lines(filename)]
+
+
+def _sign(value):
+    return (value > 0) - (value < 0)
+
+
+class LookupTables(object):
+    """Lookup tables of a SentiStrength data folder compiled to dictionaries."""
+
+    def __init__(self, data_folder=DATA_FOLDER, cache=True):
+        """Read tables from data folder.
+        Parameters
+        ----------
+        data_folder : str, optional
+            Folder of the lookup tables, default is the Finnish_SentiStrength folder.
+        cache : bool, optional
+            Load the compiled emotion and idiom tables from cache, see SentiStrength_index.py
+            and SentiStrength_idioms.py.
+        """
+        self.data_folder = data_folder
+        self.emotions = load_stem_index(join(data_folder, 'EmotionLookupTable.txt'), cache=cache)
+
+        self.boosters = read_table(join(data_folder, 'BoosterWordList.txt'))
+
+        self.negators = set(tuple(entry.split())
+                            for entry in read_list(join(data_folder, 'NegatingWordList.txt')))
+        self._negator_lengths = sorted(set(len(negator) for negator in self.negators),
+                                       reverse=True)
+
+        self.idioms = load_idiom_automaton(join(data_folder, 'IdiomLookupTable.txt'), cache=cache)
+
+        self.emoticons = read_table(join(data_folder, 'EmoticonLookupTable.txt'))
+        self._max_emoticon_length = max(map(len, self.emoticons), default=0)
+
+        self.question_words = set(read_list(join(data_folder, 'QuestionWords.txt')))
+
+    def lookup(self, word):
+        """Return strength of a word in the emotion table.
+        Parameters
+        ----------
+        word : str
+            Lowercased word.
+        Returns
+        -------
+        strength : int or None
+            Strength of the exact entry or of the longest matching stem, or None.
+        """
+        return self.emotions.lookup(word)
+
+    def emoticon_at(self, segment, position):
+        """Return the rest of a segment from position, if it is an emoticon of the table,
+        or None.
+        """
+        if len(segment) - position <= self._max_emoticon_length:
+            rest = segment[position:]
+            if rest in self.emoticons:
+                return rest
+        return None
+
+    def negated(self, words, end):
+        """Return True if a negating word or phrase ends before index end of words."""
+        for length in self._negator_lengths:
+            if length <= end and tuple(words[end - length:end]) in self.negators:
+                return True
+        return False
+
+    def find_idioms(self, words):
+        """Return list of (start, end, strength) of the idioms in a list of words.
+        The longest idiom at a position is taken, and idioms do not overlap,
+        see SentiStrength_idioms.py.
+        """
+        return self.idioms.spans(words)
+
+
+class SentiStrengthEngine(object):
+    """Sentiment strength scoring with SentiStrength lookup tables."""
+
+    def __init__(self, data_folder=DATA_FOLDER, tables=None, negated_multiplier=0.5,
+                 negative_multiplier=1.5, cache=True, plus_spaces=True,
+                 input_encoding=JAR_INPUT_ENCODING):
+        """Setup engine.
+        Parameters
+        ----------
+        data_folder : str, optional
+            Folder of the lookup tables, default is the Finnish_SentiStrength folder.
+        tables : LookupTables, optional
+            Compiled lookup tables, default is read from data_folder.
+        negated_multiplier : float, optional
+            Strength of a negated positive word relative to the word.
+        negative_multiplier : float, optional
+            Weight of the total negative strength when a trinary tie is broken.
+        cache : bool, optional
+            Load the compiled tables from cache, see SentiStrength_cache.py.
+        plus_spaces : bool, optional
+            Rate texts with spaces replaced with '+', as sent to the stdin mode of the jar
+            by the notebooks, SentiStrengthPool and SentiStrengthRunner; False for texts
+            with spaces.
+        input_encoding : str or None, optional
+            Encoding the jar decodes the UTF-8 texts with, None rates texts as such.
+        """
+        self.tables = tables if tables is not None else LookupTables(data_folder, cache=cache)
+        self.negated_multiplier = negated_multiplier
+        self.negative_multiplier = negative_multiplier
+        self.plus_spaces = plus_spaces
+        self.input_encoding = input_encoding
+        # Strengths of words seen, with repeated letter emphasis
+        self._word_strengths = {}
+
+    def word_strength(self, word):
+        """Return strength of a lowercased word, 0 for words not in the emotion table."""
+        try:
+            return self._word_strengths[word]
+        except KeyError:
+            pass
+        lookup = self.tables.lookup
+        strength = lookup(word)
+        if strength is None and _REPEATED_LETTERS.search(word):
+            for replacement in (r'\1\1', r'\1'):
+                strength = lookup(_REPEATED_LETTERS.sub(replacement, word))
+                if strength is not None:
+                    # Emphasis of the extra letters
+                    strength = max(-5, min(5, strength + _sign(strength)))
+                    break
+        self._word_strengths[word] = strength or 0
+        return strength or 0
+
+    def jar_text(self, text):
+        """Return text as read by the jar, see plus_spaces and input_encoding.
+        Examples
+        --------
+        >>> SentiStrengthEngine().jar_text('ruma ämmä')
+        'ruma+Ã¤mmÃ¤'
+        """
+        text = str(text)
+        if self.plus_spaces:
+            text = to_line(text)
+        if self.input_encoding:
+            text = text.encode('utf-8').decode(self.input_encoding, 'replace')
+        return text
+
+    def tokenize(self, text):
+        """Return list of (kind, term) of a text.
+        Parameters
+        ----------
+        text : str
+            Text sample.
+        Returns
+        -------
+        terms : list of (str, str)
+            Kind (WORD, EMOTICON or PUNCTUATION) and lowercased term
+        """
+        tables = self.tables
+        terms = []
+        for segment in self.jar_text(text).lower().split():
+            punctuation = []
+            position = 0
+            while position < len(segment):
+                match = _TERM_PATTERN.match(segment, position)
+                word, character = match.groups()
+                # An emoticon is the rest of the segment from the start of a term
+                emoticon = tables.emoticon_at(segment, position) \
+                    if word is not None or not punctuation else None
+                if emoticon is not None:
+                    word, character = None, None
+                    position = len(segment)
+                else:
+                    position = match.end()
+                if character is not None:
+                    punctuation.append(character)
+                    continue
+                if punctuation:
+                    terms.append((PUNCTUATION, ''.join(punctuation)))
+                    punctuation = []
+                if emoticon is not None:
+                    terms.append((EMOTICON, emoticon))
+                elif '.' in word and tables.lookup(word) is None:
+                    # Dots between words end sentences, unless the dotted word is listed
+                    parts = word.split('.')
+                    for part in parts[:-1]:
+                        terms.extend([(WORD, part), (PUNCTUATION, '.')])
+                    terms.append((WORD, parts[-1]))
+                else:
+                    terms.append((WORD, word))
+            if punctuation:
+                terms.append((PUNCTUATION, ''.join(punctuation)))
+        return terms
+
+    def sentences(self, terms):
+        """Return terms split to sentences at punctuation with '.', '!' or '?'."""
+        sentences = []
+        sentence = []
+        for term in terms:
+            sentence.append(term)
+            if term[0] == PUNCTUATION and _SENTENCE_END.search(term[1]):
+                sentences.append(sentence)
+                sentence = []
+        if sentence:
+            sentences.append(sentence)
+        return sentences
+
+    def term_strengths(self, sentence):
+        """Return strength of each term of a sentence."""
+        tables = self.tables
+        strengths = [0] * len(sentence)
+        positions = [index for index, (kind, term) in enumerate(sentence) if kind == WORD]
+        words = [sentence[index][1] for index in positions]
+
+        for index, word in zip(positions, words):
+            strengths[index] = self.word_strength(word)
+        for start, end, value in tables.find_idioms(words):
+            strengths[positions[start]] = value
+            for word_index in range(start + 1, end):
+                strengths[positions[word_index]] = 0
+
+        for word_index, index in enumerate(positions):
+            strength = strengths[index]
+            if not strength:
+                continue
+            end = word_index
+            booster = tables.boosters.get(words[word_index - 1]) if word_index else None
+            if booster:
+                boosted = strength + booster * _sign(strength)
+                # A reducing booster does not change the polarity of the word
+                strength = boosted if _sign(boosted) == _sign(strength) else 0
+                end -= 1
+            if strength and tables.negated(words, end):
+                if strength > 0:
+                    strength = -int(strength * self.negated_multiplier + 0.5)
+                else:
+                    strength = 0
+            strengths[index] = strength
+
+        last = None
+        for index, (kind, term) in enumerate(sentence):
+            if kind == EMOTICON:
+                value = tables.emoticons[term]
+                strengths[index] = max(-5, min(5, value + _sign(value)))
+            elif kind == PUNCTUATION and len(term) > 1 and '!' in term and last is not None:
+                strengths[last] = max(-5, min(5, strengths[last] + _sign(strengths[last])))
+            if strengths[index]:
+                last = index
+        return strengths
+
+    def strengths(self, text):
+        """Return positive and negative strength and their totals of a text.
+        Parameters
+        ----------
+        text : str
+            Text sample.
+        Returns
+        -------
+        positive : int
+            Positive strength, 1 (no positive sentiment) to 5.
+        negative : int
+            Negative strength, -1 (no negative sentiment) to -5.
+        positive_total, negative_total : int
+            Sums of the positive and of the (absolute) negative term strengths.
+        """
+        positive, negative = 1, -1
+        positive_total = negative_total = 0
+        for sentence in self.sentences(self.tokenize(text)):
+            strengths = self.term_strengths(sentence)
+            sentence_negative = min(strengths + [-1])
+            if sentence_negative < -1 and any(
+                    kind == PUNCTUATION and '?' in term for kind, term in sentence) and any(
+                    kind == WORD and term in self.tables.question_words
+                    for kind, term in sentence):
+                # Negative strength is ignored in questions
+                sentence_negative = -1
+                strengths = [max(0, strength) for strength in strengths]
+            positive = max(positive, max(strengths + [1]))
+            negative = min(negative, sentence_negative)
+            positive_total += sum(strength for strength in strengths if strength > 0)
+            negative_total -= sum(strength for strength in strengths if strength < 0)
+        return min(positive, 5), max(negative, -5), positive_total, negative_total
+
+    def value(self, strengths, mode):
+        """Return value of a mode from the strengths of a text.
+        Parameters
+        ----------
+        strengths : tuple of int
+            Result of strengths.
+        mode : 'dual', 'binary', 'trinary' or 'scale'
+            Mode, see MODES of SentiStrength_pool.py.
+        Returns
+        -------
+        value : int
+            Binary (-1, 1), trinary (-1, 0, 1) or scale (-4 to 4) value, or
+            positive + negative in the 'dual' mode. Texts without sentiment are
+            neutral (trinary) or positive (binary), and ties of positive and negative
+            strength are broken by the totals of strengths, with the negative
+            total weighted by negative_multiplier in the trinary mode.
+        """
+        positive, negative, positive_total, negative_total = strengths
+        if mode in ('dual', 'scale'):
+            return positive + negative
+        if positive > -negative:
+            return 1
+        if positive < -negative:
+            return -1
+        if mode == 'trinary':
+            if positive == 1:
+                return 0
+            return 1 if positive_total > negative_total * self.negative_multiplier else -1
+        return 1 if positive_total >= negative_total else -1
+
+    def rate(self, text, mode='dual'):
+        """Rate one text.
+        Parameters
+        ----------
+        text : str
+            Text sample.
+        mode : 'dual', 'binary', 'trinary' or 'scale', optional
+            SentiStrength mode.
+        Returns
+        -------
+        rating : tuple of int
+            Positive strength, negative strength and the value of the mode
+        """
+        if mode not in MODES:
+            raise ValueError('mode must be one of %s' % (MODES,))
+        strengths = self.strengths(text)
+        return strengths[0], strengths[1], self.value(strengths, mode)
+
+    def rate_many(self, texts, mode='dual'):
+        """Rate many texts.
+        Parameters
+        ----------
+        texts : iterable of str
+            Texts, e.g. a list or a pandas Series.
+        mode : 'dual', 'binary', 'trinary' or 'scale', optional
+            SentiStrength mode.
+        Returns
+        -------
+        ratings : Ratings
+            Positive strengths, negative strengths and values of the mode
+            as NumPy int arrays in the order of the texts
+        """
+        ratings = np.array([self.rate(text, mode) for text in texts], dtype=int).reshape(-1, 3)
+        return Ratings(ratings[:, 0], ratings[:, 1], ratings[:, 2])
@@ -0,0 +1,292 @@
+"""Fidelity report of the Python SentiStrength engine against the SentiStrength jar."""
+
+from __future__ import absolute_import, division, print_function
+
+"""
+# ------------------------------------------------------------------------------------------------
+
+Rates the same texts with SentiStrengthEngine (SentiStrength_engine.py) and with the
+SentiStrength jar (through SentiStrengthPool, SentiStrength_pool.py), and reports for each
+mode the agreement of the values, the confusion of jar values (rows) and engine values
+(columns), the agreement of the positive and negative strengths, and samples of
+disagreeing texts.
+
+The texts are preprocessed as in the notebooks (--preprocess): casual tokenization (NLTK),
+lowercasing, demojized emojis and tokens joined with ', '. This needs the 'nltk' and 'emoji'
+packages, and reading the annotated collection (xlsx) needs pandas and openpyxl.
+
+The ratings of the jar in the notebooks (NOTEBOOK_CASES) are checked without the jar with
+--notebook; the engine reproduces them except for KNOWN_DEVIATIONS.
+
+Usage (from the SentiStrength-Classification folder):
+
+    python -m SentiStrengthFin.SentiStrength_fidelity --notebook
+
+    python -m SentiStrengthFin.SentiStrength_fidelity \\
+        --data data/Manually_Annotated_Collection_ALL_FINAL_22023Merja.xlsx \\
+        --column sample --preprocess --jar SentiStrengthCom.jar --output fidelity.json
+
+# ------------------------------------------------------------------------------------------------
+"""
+
+import argparse
+import json
+import sys
+from collections import Counter
+
+import numpy as np
+
+from .SentiStrength_engine import SentiStrengthEngine
+from .SentiStrength_pool import DATA_FOLDER, SentiStrengthPool
+
+REPORT_MODES = ('binary', 'trinary', 'scale')
+
+# Maximum number of disagreeing texts kept as samples per mode
+MAX_SAMPLES = 20
+
+_JOHAN = 'johan on tyhmä ja ruma ämmä'
+
+# Ratings of the jar in the notebooks (Fin_SentiStrength_*.ipynb): text, mode, and
+# (positive, negative) strengths in the 'dual' mode or the value of the other modes
+NOTEBOOK_CASES = (
+    ('Ihana päivä!!! :smiley:', 'dual', (5, -1)),
+    ('ihana päivä!!! :smiley:', 'dual', (5, -1)),
+    ('Ihana päivä!!!:rolling_on_the_floor_laughing::smiley:', 'dual', (5, -1)),
+    ('ihana päivä!!!:rolling_on_the_floor_laughing::smiley:', 'dual', (5, -1)),
+    ('Ihana päivä!!! :rolling_on_the_floor_laughing: :smiley:', 'dual', (5, -1)),
+    ('ihana päivä!!! rolling_on_the_floor_laughing smiley', 'dual', (5, -1)),
+    (':smiley:', 'dual', (3, -1)),
+    ('smiley', 'dual', (1, -1)),
+    (':rolling_on_the_floor_laughing:', 'dual', (4, -1)),
+    (':smiley::rolling_on_the_floor_laughing:', 'dual', (1, -1)),
+    (':smiley: :rolling_on_the_floor_laughing:', 'dual', (1, -1)),
+    (':rolling_on_the_floor_laughing::smiley:', 'dual', (1, -1)),
+    (':rolling_on_the_floor_laughing: :smiley:', 'dual', (1, -1)),
+    ('rolling_on_the_floor_laughing smiley', 'dual', (1, -1)),
+    ('Ihana päivä!!! Ulkona paistaa aurinko', 'binary', 1),
+    ('ihana päivä!!! ulkona paistaa aurinko', 'binary', 1),
+    ('tämä lause on tyhjää täynnä', 'binary', 1),
+    (_JOHAN, 'binary', -1),
+    ('Ihana päivä!!! Ulkona paistaa aurinko', 'trinary', 1),
+    ('ihana päivä!!! ulkona paistaa aurinko', 'trinary', 1),
+    ('tämä lause on tyhjää täynnä', 'trinary', 0),
+    (_JOHAN, 'trinary', -1),
+    (_JOHAN + ' :smiley:', 'trinary', -1),
+    (_JOHAN + ' :face_vomiting: :enraged_face:', 'trinary', -1),
+    (_JOHAN + ' face_vomiting enraged_face', 'trinary', -1),
+    (':face_vomiting: :enraged_face:', 'trinary', 0),
+    (':face_vomiting:', 'trinary', -1),
+    (':enraged_face:', 'trinary', -1),
+    (':face_vomiting::enraged_face:', 'trinary', 0),
+    (':smiley:', 'trinary', 1),
+    ('Ihana päivä!!! Ulkona paistaa aurinko :smiley:', 'scale', 4),
+    ('ihana päivä!!! ulkona paistaa aurinko :smiley:', 'scale', 4),
+    ('tämä lause on tyhjää täynnä', 'scale', 0),
+    (_JOHAN, 'scale', -2),
+    ('Johan On Tyhmä ja Ruma Ämmä', 'scale', 0),
+    (_JOHAN + ' :face_vomiting: :enraged_face:', 'scale', -2),
+    (_JOHAN + ' face_vomiting enraged_face', 'scale', -2),
+    (':face_vomiting: :enraged_face:', 'scale', 0),
+    (':face_vomiting:', 'scale', -4),
+    (':enraged_face:', 'scale', -4),
+    (':face_vomiting::enraged_face:', 'scale', 0),
+    (':smiley:', 'scale', 2),
+    )
+
+# Notebook cases the engine does not reproduce, with the presumed reason
+KNOWN_DEVIATIONS = {
+    ('Johan On Tyhmä ja Ruma Ämmä', 'scale'):
+        'the jar does not score the capitalized words (the lowercased text is -2)',
+    }
+
+
+def notebook_text(text):
+    """Return text preprocessed as in the SentiStrength notebooks.
+    Parameters
+    ----------
+    text : str
+        Text sample.
+    Returns
+    -------
+    text : str
+        Lowercased casual tokens with demojized emojis, joined with ', '
+    """
+    import emoji
+    from nltk.tokenize import casual_tokenize
+    return ', '.join(emoji.demojize(token.lower()) for token in casual_tokenize(str(text)))
+
+
+def compare_ratings(texts, reference, ratings, max_samples=MAX_SAMPLES):
+    """Return agreement of ratings with reference ratings.
+    Parameters
+    ----------
+    texts : list of str
+        Rated texts.
+    reference : Ratings
+        Ratings of the jar.
+    ratings : Ratings
+        Ratings of the engine.
+    max_samples : int, optional
+        Maximum number of disagreeing texts kept as samples.
+    Returns
+    -------
+    result : dict
+        Agreement of values, positive and negative strengths, mean absolute difference
+        of values, confusion (counts keyed by jar value and engine value) and samples
+    """
+    n_texts = len(texts)
+    same = reference.value == ratings.value
+    confusion = Counter(zip(reference.value.tolist(), ratings.value.tolist()))
+    rows = {}
+    for (jar_value, engine_value), count in sorted(confusion.items()):
+        rows.setdefault(str(jar_value), {})[str(engine_value)] = count
+    samples = [{'text': texts[index],
+                'jar': [int(reference.positive[index]), int(reference.negative[index]),
+                        int(reference.value[index])],
+                'engine': [int(ratings.positive[index]), int(ratings.negative[index]),
+                           int(ratings.value[index])]}
+               for index in np.flatnonzero(~same)[:max_samples]]
+    return {
+        'texts': n_texts,
+        'agreement': float(same.mean()) if n_texts else 1.0,
+        'positive_agreement': float((reference.positive == ratings.positive).mean())
+        if n_texts else 1.0,
+        'negative_agreement': float((reference.negative == ratings.negative).mean())
+        if n_texts else 1.0,
+        'mean_absolute_difference': float(np.abs(reference.value - ratings.value).mean())
+        if n_texts else 0.0,
+        'confusion': rows,
+        'samples': samples,
+        }
+
+
+def fidelity_report(texts, engine, reference, modes=REPORT_MODES, max_samples=MAX_SAMPLES):
+    """Return fidelity report of an engine against reference ratings.
+    Parameters
+    ----------
+    texts : iterable of str
+        Texts, preprocessed as for SentiStrength.
+    engine : SentiStrengthEngine
+        Rated engine.
+    reference : SentiStrengthPool
+        Reference with rate_many, e.g. the pool running the jar.
+    modes : list of str, optional
+        Compared modes.
+    max_samples : int, optional
+        Maximum number of disagreeing texts kept as samples per mode.
+    Returns
+    -------
+    report : dict
+        Result of compare_ratings keyed by mode
+    """
+    texts = list(texts)
+    return dict((mode, compare_ratings(texts, reference.rate_many(texts, mode=mode),
+                                       engine.rate_many(texts, mode=mode),
+                                       max_samples=max_samples))
+                for mode in modes)
+
+
+def notebook_check(engine, cases=NOTEBOOK_CASES):
+    """Return notebook cases where an engine disagrees with the jar.
+    Parameters
+    ----------
+    engine : SentiStrengthEngine
+        Checked engine, with the default plus_spaces and input_encoding of the notebooks.
+    cases : list of (str, str, int or tuple), optional
+        Text, mode and rating of the jar, see NOTEBOOK_CASES.
+    Returns
+    -------
+    disagreements : list of (str, str, int or tuple, int or tuple, str or None)
+        Text, mode, rating of the jar, rating of the engine and the reason
+        of a known deviation (KNOWN_DEVIATIONS), or None
+    Examples
+    --------
+    >>> [case[:4] for case in notebook_check(SentiStrengthEngine())]
+    [('Johan On Tyhmä ja Ruma Ämmä', 'scale', 0, -2)]
+    """
+    disagreements = []
+    for text, mode, jar in cases:
+        rating = engine.rate(text, mode)
+        rating = tuple(rating[:2]) if mode == 'dual' else rating[2]
+        if rating != jar:
+            disagreements.append((text, mode, jar, rating,
+                                  KNOWN_DEVIATIONS.get((text, mode))))
+    return disagreements
+
+
+def format_report(report):
+    """Return text lines of a fidelity report."""
+    lines = []
+    for mode, result in report.items():
+        lines.append('%-8s texts %6d  agreement %.3f  positive %.3f  negative %.3f  '
+                     'mean abs difference %.3f' % (
+                         mode, result['texts'], result['agreement'],
+                         result['positive_agreement'], result['negative_agreement'],
+                         result['mean_absolute_difference']))
+        for jar_value, row in result['confusion'].items():
+            lines.append('    jar %3s: %s' % (jar_value, '  '.join(
+                'engine %s: %d' % item for item in row.items())))
+    return lines
+
+
+def read_texts(filename, column):
+    """Return texts of a column of an xlsx or csv file, or the lines of a text file."""
+    if filename.endswith(('.xlsx', '.xls', '.csv')):
+        import pandas as pd
+        reader = pd.read_csv if filename.endswith('.csv') else pd.read_excel
+        return [str(text) for text in reader(filename)[column]]
+    with open(filename, encoding='utf-8') as fid:
+        return [line.rstrip('\n') for line in fid]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data',
+                        help='annotated collection (xlsx or csv), or a text file of lines')
+    parser.add_argument('--notebook', action='store_true',
+                        help='check the ratings of the jar in the notebooks (no jar needed)')
+    parser.add_argument('--column', default='sample', help='text column of the collection')
+    parser.add_argument('--preprocess', action='store_true',
+                        help='preprocess texts as in the notebooks')
+    parser.add_argument('--limit', type=int, help='number of texts')
+    parser.add_argument('--data-folder', default=DATA_FOLDER)
+    parser.add_argument('--jar', default='SentiStrengthCom.jar')
+    parser.add_argument('--processes', type=int)
+    parser.add_argument('--standin', action='store_true',
+                        help='use the Python stand-in instead of the jar (checks the set-up)')
+    parser.add_argument('--modes', nargs='+', choices=REPORT_MODES, default=list(REPORT_MODES))
+    parser.add_argument('--output', help='JSON file for the report')
+    args = parser.parse_args()
+
+    engine = SentiStrengthEngine(args.data_folder)
+    if args.notebook:
+        disagreements = notebook_check(engine)
+        for text, mode, jar, rating, reason in disagreements:
+            print('%-8s %r jar %s engine %s: %s' % (mode, text, jar, rating,
+                                                    reason or 'unexpected'))
+        print('notebook cases %d  disagreements %d  unexpected %d' % (
+            len(NOTEBOOK_CASES), len(disagreements),
+            sum(reason is None for *_, reason in disagreements)))
+        if not args.data:
+            return
+    elif not args.data:
+        parser.error('--data or --notebook is required')
+
+    texts = read_texts(args.data, args.column)[:args.limit]
+    if args.preprocess:
+        texts = [notebook_text(text) for text in texts]
+    command = [sys.executable, '-m', 'SentiStrengthFin.SentiStrength_standin'] \
+        if args.standin else None
+    with SentiStrengthPool(jar=args.jar, data_folder=args.data_folder, processes=args.processes,
+                           command=command) as pool:
+        report = fidelity_report(texts, engine, pool, modes=args.modes)
+    for line in format_report(report):
+        print(line)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,190 @@
+"""Token automaton of the multi-word idioms of IdiomLookupTable.txt."""
+
+from __future__ import absolute_import, division, print_function
+
+"""
+# ------------------------------------------------------------------------------------------------
+
+IdiomLookupTable.txt lists ~350 multi-word phrases, whose tokens may be wildcard stems
+('äidin vittu*', 'ylpey* aihe*'). Trying every idiom at every token position is quadratic
+in practice. IdiomAutomaton compiles the table into a token-level automaton:
+
+    - states are the prefixes of idioms (a trie of tokens); a state has exact token edges
+      in a dictionary and wildcard edges in a character trie of stems, so a token follows
+      all its edges in one pass over its characters
+    - one left-to-right pass over a token list advances the partial matches (at most
+      the length of the longest idiom) and reports every idiom occurrence as
+      (start, end, strength), end exclusive
+    - spans selects the leftmost-longest non-overlapping occurrences, which the scorer
+      uses to override the strengths of the words of the idioms (SentiStrength_engine.py)
+
+    automaton = load_idiom_automaton('Finnish_SentiStrength/IdiomLookupTable.txt')
+    automaton.spans(['hän', 'ylitti', 'itsensä'])     # [(1, 3, 2)]
+
+# ------------------------------------------------------------------------------------------------
+"""
+
+from . import SentiStrength_cache
+
+# Key of the target states in the character tries of wildcard edges
+_TARGETS = 0
+
+
+class IdiomAutomaton(object):
+    """Token-level automaton of idioms with wildcard tokens."""
+
+    def __init__(self, table=None):
+        """Setup automaton.
+        Parameters
+        ----------
+        table : dict, optional
+            Strengths keyed by idioms, tokens separated by spaces; tokens ending
+            with '*' are stems.
+        """
+        # Exact token edges, character tries of wildcard edges and the strength
+        # of the idiom ending at each state
+        self.edges = [{}]
+        self.stem_edges = [{}]
+        self.values = [None]
+        self.max_length = 0
+        for idiom, value in (table or {}).items():
+            self.add(idiom, value)
+
+    def __len__(self):
+        return sum(value is not None for value in self.values)
+
+    def _new_state(self):
+        self.edges.append({})
+        self.stem_edges.append({})
+        self.values.append(None)
+        return len(self.values) - 1
+
+    def add(self, idiom, value):
+        """Add idiom to the automaton.
+        Parameters
+        ----------
+        idiom : str
+            Lowercased tokens separated by spaces, tokens ending with '*' are stems.
+        value : int
+            Strength of the idiom.
+        """
+        tokens = idiom.split()
+        if not tokens:
+            return
+        state = 0
+        for token in tokens:
+            if token.endswith('*'):
+                node = self.stem_edges[state]
+                for character in token[:-1]:
+                    node = node.setdefault(character, {})
+                targets = node.setdefault(_TARGETS, [])
+                if not targets:
+                    targets.append(self._new_state())
+                state = targets[0]
+            else:
+                edges = self.edges[state]
+                if token not in edges:
+                    edges[token] = self._new_state()
+                state = edges[token]
+        self.values[state] = value
+        self.max_length = max(self.max_length, len(tokens))
+
+    def next_states(self, state, token):
+        """Return states following a state with a token, exact edge first."""
+        states = []
+        target = self.edges[state].get(token)
+        if target is not None:
+            states.append(target)
+        node = self.stem_edges[state]
+        if node:
+            states.extend(node.get(_TARGETS, ()))
+            for character in token:
+                node = node.get(character)
+                if node is None:
+                    break
+                states.extend(node.get(_TARGETS, ()))
+        return states
+
+    def finditer(self, tokens):
+        """Return iterator over all idiom occurrences in a token list.
+        Parameters
+        ----------
+        tokens : list of str
+            Lowercased tokens, e.g. the words of a sentence.
+        Returns
+        -------
+        occurrences : iterator of (int, int, int)
+            Start, end (exclusive) and strength of the idioms, in order of end
+        """
+        edges = self.edges
+        stem_edges = self.stem_edges
+        values = self.values
+        active = []
+        for position, token in enumerate(tokens):
+            following = []
+            for start, state in active + [(position, 0)]:
+                for target in self.next_states(state, token):
+                    value = values[target]
+                    if value is not None:
+                        yield start, position + 1, value
+                    if edges[target] or stem_edges[target]:
+                        following.append((start, target))
+            active = following
+
+    def findall(self, tokens):
+        """Return list of all idiom occurrences, see finditer."""
+        return list(self.finditer(tokens))
+
+    def spans(self, tokens):
+        """Return leftmost-longest non-overlapping idiom occurrences.
+        Parameters
+        ----------
+        tokens : list of str
+            Lowercased tokens.
+        Returns
+        -------
+        spans : list of (int, int, int)
+            Start, end (exclusive) and strength of the idioms, in order of start.
+            Of the occurrences with the same span, the first found is kept (exact
+            token edges are followed before wildcard edges).
+        Examples
+        --------
+        >>> automaton = IdiomAutomaton({'ylit* itse*': 2, 'ylitti itsensä': 3, 'itse asiassa': 0})
+        >>> automaton.spans(['hän', 'ylitti', 'itsensä', 'itse', 'asiassa'])
+        [(1, 3, 3), (3, 5, 0)]
+        """
+        if not tokens or not self.max_length:
+            return []
+        best = {}
+        for start, end, value in self.finditer(tokens):
+            if start not in best or end > best[start][0]:
+                best[start] = (end, value)
+        spans = []
+        position = 0
+        for start in sorted(best):
+            if start >= position:
+                end, value = best[start]
+                spans.append((start, end, value))
+                position = end
+        return spans
+
+
+def load_idiom_automaton(filename, cache=True):
+    """Return idiom automaton of an idiom table file.
+    Parameters
+    ----------
+    filename : str
+        Idiom table, e.g. IdiomLookupTable.txt.
+    cache : bool, optional
+        Load the automaton from cache, see SentiStrength_cache.py.
+    Returns
+    -------
+    automaton : IdiomAutomaton
+        Compiled automaton of the table
+    """
+    # The engine imports this module
+    from .SentiStrength_engine import read_table
+    if not cache:
+        return IdiomAutomaton(read_table(filename))
+    return SentiStrength_cache.cached('IdiomAutomaton', filename,
+                                      lambda: IdiomAutomaton(read_table(filename)))
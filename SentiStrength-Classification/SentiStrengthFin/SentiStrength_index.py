@@ -0,0 +1,135 @@
+"""Compiled wildcard-stem index of SentiStrength lookup tables."""
+
+from __future__ import absolute_import, division, print_function
+
+"""
+# ------------------------------------------------------------------------------------------------
+
+EmotionLookupTable.txt has ~11500 entries, and ~1400 of them are wildcard stems ('vittu*'),
+which match all words starting with the stem. StemIndex compiles the entries into a prefix
+trie of nested dictionaries:
+
+    - a lookup walks the characters of the word once, so the cost per word is
+      O(word length) regardless of the number of stems
+    - an exact entry of the word wins, otherwise the longest matching stem wins
+    - the table file is decoded once (UTF-8, or the legacy Windows-1252 of the Finnish
+      tables), and the compiled trie is cached on disk keyed by the hash of the file
+      (SentiStrength_cache.py), so repeated loads do not read or decode the table
+
+    index = load_stem_index('Finnish_SentiStrength/EmotionLookupTable.txt')
+    index.lookup('vittuilu')    # -5, from the stem 'vittu*'
+
+# ------------------------------------------------------------------------------------------------
+"""
+
+from . import SentiStrength_cache
+
+# Keys of the values in trie nodes, the other keys are characters
+_EXACT = 0
+_STEM = 1
+
+
+class StemIndex(object):
+    """Prefix trie of lookup table entries with wildcard stems."""
+
+    def __init__(self, table=None):
+        """Setup index.
+        Parameters
+        ----------
+        table : dict, optional
+            Strengths keyed by entries, entries ending with '*' are stems.
+        """
+        self.root = {}
+        self._size = 0
+        for entry, value in (table or {}).items():
+            self.add(entry, value)
+
+    def __len__(self):
+        return self._size
+
+    def _node(self, key, create=False):
+        node = self.root
+        for character in key:
+            child = node.get(character)
+            if child is None:
+                if not create:
+                    return None
+                child = node[character] = {}
+            node = child
+        return node
+
+    def __contains__(self, entry):
+        stem = entry.endswith('*')
+        node = self._node(entry[:-1] if stem else entry)
+        return node is not None and (_STEM if stem else _EXACT) in node
+
+    def add(self, entry, value):
+        """Add entry to the index.
+        Parameters
+        ----------
+        entry : str
+            Lowercased word, or stem ending with '*'.
+        value : int
+            Strength of the entry.
+        """
+        stem = entry.endswith('*')
+        node = self._node(entry[:-1] if stem else entry, create=True)
+        kind = _STEM if stem else _EXACT
+        if kind not in node:
+            self._size += 1
+        node[kind] = value
+
+    def lookup(self, word):
+        """Return strength of a word.
+        Parameters
+        ----------
+        word : str
+            Lowercased word.
+        Returns
+        -------
+        strength : int or None
+            Strength of the exact entry of the word, or of the longest stem
+            matching the word, or None.
+        Examples
+        --------
+        >>> index = StemIndex({'vit*': -5, 'vitsi': 2, 'vitsik*': 1})
+        >>> index.lookup('vitsi'), index.lookup('vitsikäs'), index.lookup('vitun')
+        (2, 1, -5)
+        """
+        node = self.root
+        value = node.get(_STEM)
+        for character in word:
+            node = node.get(character)
+            if node is None:
+                return value
+            stem = node.get(_STEM)
+            if stem is not None:
+                value = stem
+        exact = node.get(_EXACT)
+        return value if exact is None else exact
+
+    def get(self, word, default=None):
+        """Return strength of a word, or default."""
+        value = self.lookup(word)
+        return default if value is None else value
+
+
+def load_stem_index(filename, cache=True):
+    """Return stem index of a lookup table file.
+    Parameters
+    ----------
+    filename : str
+        Lookup table, e.g. EmotionLookupTable.txt.
+    cache : bool, optional
+        Load the index from cache, see SentiStrength_cache.py.
+    Returns
+    -------
+    index : StemIndex
+        Compiled index of the table
+    """
+    # The engine imports this module
+    from .SentiStrength_engine import read_table
+    if not cache:
+        return StemIndex(read_table(filename))
+    return SentiStrength_cache.cached('StemIndex', filename,
+                                      lambda: StemIndex(read_table(filename)))
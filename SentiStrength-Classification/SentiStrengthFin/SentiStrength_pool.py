@@ -0,0 +1,298 @@
+"""Pool of long-lived SentiStrength processes."""
+
+from __future__ import absolute_import, division, print_function
+
+"""
+# ------------------------------------------------------------------------------------------------
+
+The notebooks start a new SentiStrength process (java -jar SentiStrengthCom.jar stdin ...)
+for every text sample and every mode (RateSentiment_FIN_binary_value, _trinary_value and
+_scale_value), so most of the run time goes to JVM start-ups.
+
+SentiStrengthPool keeps N processes per mode running in the line-oriented stdin mode
+of SentiStrength: each line written to stdin is rated, and the rating is written to stdout
+as one line, e.g. '3<tab>-1<tab>1' (positive strength, negative strength, and the binary,
+trinary or scale value of the mode).
+
+    - texts are split to N contiguous chunks, one per process, and the chunks are rated
+      in parallel; within a process lines are written by a writer thread while the ratings
+      are read, so the pipes do not fill up
+    - processes are started on the first use of a mode and stay alive until close();
+      a process whose output cannot be read as ratings (e.g. an extra warning line) is
+      killed when the error is raised, so that its unread lines are never returned as the
+      ratings of later texts, and a new process is started on the next use of the mode
+    - texts are sent as in the notebooks: one line, spaces replaced with '+'
+
+Any program speaking the same protocol can be used instead of Java with the 'command'
+argument, e.g. the stand-in of SentiStrength_standin.py, which needs no Java:
+
+    standin = [sys.executable, '-m', 'SentiStrengthFin.SentiStrength_standin']
+    pool = SentiStrengthPool(command=standin)
+
+Example (from the SentiStrength-Classification folder):
+
+    from SentiStrengthFin.SentiStrength_pool import SentiStrengthPool
+    with SentiStrengthPool(jar='SentiStrengthCom.jar', processes=4) as pool:
+        df['ss_binary'] = pool.rate_many(df['sampleEmojis'], mode='binary').value
+        df['ss_trinary'] = pool.rate_many(df['sampleEmojis'], mode='trinary').value
+        df['ss_scale'] = pool.rate_many(df['sampleEmojis'], mode='scale').value
+
+# ------------------------------------------------------------------------------------------------
+"""
+
+import os
+import subprocess
+import tempfile
+import threading
+from collections import namedtuple
+from os.path import dirname, join
+
+import numpy as np
+
+# Modes of SentiStrength: 'dual' is the default output of positive and negative strength
+MODES = ('dual', 'binary', 'trinary', 'scale')
+
+Ratings = namedtuple('Ratings', ['positive', 'negative', 'value'])
+
+DATA_FOLDER = join(dirname(dirname(os.path.abspath(__file__))), 'Finnish_SentiStrength')
+
+
+def to_line(text):
+    """Return text as one input line of SentiStrength.
+    Parameters
+    ----------
+    text : str
+        Text sample.
+    Returns
+    -------
+    line : str
+        Text without line breaks, spaces replaced with '+' as in the notebooks
+    Examples
+    --------
+    >>> to_line('Ihana päivä!\\nJee')
+    'Ihana+päivä!+Jee'
+    """
+    line = ' '.join(str(text).splitlines()).replace(' ', '+')
+    # An empty line would be rated as an empty text by SentiStrength, but keep one character
+    # so that every text gets exactly one output line
+    return line or '+'
+
+
+def parse_rating(line, mode):
+    """Return (positive, negative, value) of an output line of SentiStrength.
+    Parameters
+    ----------
+    line : str
+        Output line, e.g. '3\\t-1\\t1'.
+    mode : str
+        Mode of the process, see MODES.
+    Returns
+    -------
+    rating : tuple of int
+        Positive strength (1 to 5), negative strength (-1 to -5) and the value of the mode.
+        The value of the 'dual' mode is positive + negative.
+    """
+    items = line.split()
+    if len(items) < (2 if mode == 'dual' else 3):
+        raise ValueError('unexpected SentiStrength output: %r' % line)
+    positive, negative = int(items[0]), int(items[1])
+    value = positive + negative if mode == 'dual' else int(items[2])
+    return positive, negative, value
+
+
+class _Worker(object):
+    """One SentiStrength process in stdin mode."""
+
+    def __init__(self, args, encoding):
+        self.encoding = encoding
+        self.lock = threading.Lock()
+        self.stderr = tempfile.TemporaryFile()
+        self.process = subprocess.Popen(args, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                        stderr=self.stderr, bufsize=0)
+
+    def _error(self, message):
+        self.stderr.seek(0)
+        stderr = self.stderr.read().decode(self.encoding, 'replace').strip()
+        return RuntimeError('SentiStrength process %s: %s' % (message, stderr or 'no output'))
+
+    def rate(self, lines, mode):
+        """Return list of ratings of input lines."""
+        with self.lock:
+            if self.process.poll() is not None:
+                raise self._error('exited with code %s' % self.process.returncode)
+            errors = []
+
+            def write():
+                try:
+                    for line in lines:
+                        self.process.stdin.write((line + '\n').encode(self.encoding))
+                    self.process.stdin.flush()
+                except (OSError, ValueError) as error:
+                    errors.append(error)
+
+            writer = threading.Thread(target=write)
+            writer.daemon = True
+            writer.start()
+            ratings = []
+            try:
+                for _ in lines:
+                    output = self.process.stdout.readline()
+                    if not output:
+                        raise self._error('closed its output')
+                    ratings.append(parse_rating(output.decode(self.encoding), mode))
+            except BaseException:
+                # Unread output lines would be read as the ratings of the next texts,
+                # the pool starts a new process instead (and the writer is not left blocked)
+                self.kill()
+                raise
+            finally:
+                writer.join()
+            if errors:
+                self.kill()
+                raise self._error('failed to read input (%s)' % errors[0])
+            return ratings
+
+    @property
+    def alive(self):
+        """True if the process is running."""
+        return self.process.poll() is None
+
+    def kill(self):
+        if self.alive:
+            self.process.kill()
+            self.process.wait()
+
+    def close(self):
+        if self.process.poll() is None:
+            try:
+                self.process.stdin.close()
+                self.process.wait(timeout=5)
+            except (OSError, subprocess.TimeoutExpired):
+                self.process.kill()
+                self.process.wait()
+        self.process.stdout.close()
+        self.stderr.close()
+
+
+class SentiStrengthPool(object):
+    """Long-lived SentiStrength processes in stdin mode."""
+
+    def __init__(self, jar='SentiStrengthCom.jar', data_folder=DATA_FOLDER, processes=None,
+                 command=None, encoding='utf-8'):
+        """Setup pool, processes are started on the first use of a mode.
+        Parameters
+        ----------
+        jar : str, optional
+            Path of the SentiStrength jar file.
+        data_folder : str, optional
+            Folder of the SentiStrength lexicons, default is the Finnish_SentiStrength folder.
+        processes : int, optional
+            Number of processes per mode, default is the number of CPUs.
+        command : list of str, optional
+            Program run instead of 'java -jar <jar>', with the SentiStrength arguments
+            'stdin sentidata <data_folder> [mode]'.
+        encoding : str, optional
+            Encoding of the texts and of the output.
+        """
+        if command is None:
+            command = ['java', '-jar', jar]
+        self.command = list(command)
+        # SentiStrength joins file names to the data folder without a separator
+        self.data_folder = os.path.join(data_folder, '')
+        self.processes = processes or os.cpu_count() or 1
+        self.encoding = encoding
+        self._workers = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def args(self, mode):
+        """Return command line of a process of a mode."""
+        args = self.command + ['stdin', 'sentidata', self.data_folder]
+        if mode != 'dual':
+            args.append(mode)
+        return args
+
+    def workers(self, mode):
+        """Return the processes of a mode, started if needed.
+        Processes that exited or failed (see _Worker.rate) are replaced with new ones.
+        """
+        if mode not in MODES:
+            raise ValueError('mode must be one of %s' % (MODES,))
+        with self._lock:
+            workers = self._workers.setdefault(mode, [None] * self.processes)
+            for index, worker in enumerate(workers):
+                if worker is not None and not worker.alive:
+                    worker.close()
+                    worker = None
+                if worker is None:
+                    workers[index] = _Worker(self.args(mode), self.encoding)
+            return workers
+
+    def rate_many(self, texts, mode='dual'):
+        """Rate many texts.
+        Parameters
+        ----------
+        texts : iterable of str
+            Texts, e.g. a list or a pandas Series.
+        mode : 'dual', 'binary', 'trinary' or 'scale', optional
+            SentiStrength mode, see MODES.
+        Returns
+        -------
+        ratings : Ratings
+            Positive strengths, negative strengths and values of the mode
+            as NumPy int arrays in the order of the texts
+        """
+        lines = [to_line(text) for text in texts]
+        workers = self.workers(mode)
+        # Contiguous chunks, so that the ratings are concatenated in order
+        bounds = np.linspace(0, len(lines), len(workers) + 1).astype(int)
+        chunks = [lines[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+        results = [None] * len(chunks)
+        errors = []
+
+        def rate(index):
+            try:
+                results[index] = workers[index].rate(chunks[index], mode)
+            except Exception as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=rate, args=(index,))
+                   for index, chunk in enumerate(chunks) if chunk]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if errors:
+            raise errors[0]
+
+        ratings = np.array([rating for result in results if result for rating in result],
+                           dtype=int).reshape(-1, 3)
+        return Ratings(ratings[:, 0], ratings[:, 1], ratings[:, 2])
+
+    def rate(self, text, mode='dual'):
+        """Rate one text.
+        Parameters
+        ----------
+        text : str
+            Text sample.
+        mode : 'dual', 'binary', 'trinary' or 'scale', optional
+            SentiStrength mode, see MODES.
+        Returns
+        -------
+        rating : tuple of int
+            Positive strength, negative strength and the value of the mode
+        """
+        return self.workers(mode)[0].rate([to_line(text)], mode)[0]
+
+    def close(self):
+        """Stop all processes."""
+        with self._lock:
+            workers, self._workers = self._workers, {}
+        for mode_workers in workers.values():
+            for worker in mode_workers:
+                worker.close()
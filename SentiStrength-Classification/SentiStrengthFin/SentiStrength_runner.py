@@ -0,0 +1,349 @@
+"""Bulk file-mode SentiStrength runner with a result cache."""
+
+from __future__ import absolute_import, division, print_function
+
+"""
+# ------------------------------------------------------------------------------------------------
+
+The notebooks score the same samples again in every rerun and in every variant (raw and
+corrected samples, tokens and lemmas). SentiStrengthRunner scores a text collection with
+one SentiStrength run per mode in file mode, and caches the ratings in SQLite:
+
+    - texts are normalized (whitespace collapsed to single spaces, one line per text) and
+      looked up from the cache by (normalized text, mode, table hash); the table hash is
+      the hash of the lookup tables of the data folder, of the scoring program (jar),
+      of the encoding and of the input format (INPUT_FORMAT)
+    - the texts missing from the cache are written to one input file as the notebooks and
+      SentiStrengthPool send them to the stdin mode (to_line: spaces replaced with '+'),
+      so that the ratings are the same as in the notebooks, and SentiStrength is run once
+      in file mode ('input <file>'), which writes '<file>0_out.txt'
+    - the output file is parsed back (columns by header: Positive, Negative and the
+      value of the mode) and the new ratings are stored in the cache
+    - rate_many returns Ratings aligned with the texts, rate_all the Ratings of the
+      binary, trinary and scale modes
+
+The cache database is 'results.sqlite' in the cache folder of SentiStrength_cache.py.
+
+    from SentiStrengthFin.SentiStrength_runner import SentiStrengthRunner
+    runner = SentiStrengthRunner(jar='SentiStrengthCom.jar')
+    ratings = runner.rate_all(df['sampleEmojis'])
+    df['ss_binary'] = ratings['binary'].value
+    df['ss_trinary'] = ratings['trinary'].value
+    df['ss_scale'] = ratings['scale'].value
+
+The 'command' argument runs another program with the command line of the jar, e.g.
+the stand-in of SentiStrength_standin.py, which also supports the file mode.
+
+# ------------------------------------------------------------------------------------------------
+"""
+
+import hashlib
+import os
+import sqlite3
+import subprocess
+import tempfile
+from os.path import exists, isfile, join, splitext
+
+import numpy as np
+
+from . import SentiStrength_cache
+from .SentiStrength_pool import DATA_FOLDER, MODES, Ratings, to_line
+
+REPORT_MODES = ('binary', 'trinary', 'scale')
+
+# Column names of the values of the modes in output files
+VALUE_COLUMNS = ('overall', 'binary', 'trinary', 'scale')
+
+# Format of the lines of input files (to_line), part of the table hash of cached ratings
+INPUT_FORMAT = 'plus-spaces'
+
+# Texts per SQLite query
+_QUERY_SIZE = 500
+
+
+def normalize_text(text):
+    """Return text normalized for SentiStrength and for the cache.
+    Parameters
+    ----------
+    text : str
+        Text sample.
+    Returns
+    -------
+    text : str
+        Text with whitespace collapsed to single spaces
+    Examples
+    --------
+    >>> normalize_text(' Ihana\\tpäivä!\\n:smiley: ')
+    'Ihana päivä! :smiley:'
+    """
+    return ' '.join(str(text).split())
+
+
+def tables_hash(data_folder=DATA_FOLDER, program=None, encoding='utf-8'):
+    """Return hash of the lookup tables of a data folder, of the scoring program and of the
+    input of the program.
+    Parameters
+    ----------
+    data_folder : str, optional
+        Folder of the lookup tables.
+    program : list of str, optional
+        Command of the scoring program; the content of files in the command
+        (e.g. the jar) is hashed, and other items as such.
+    encoding : str, optional
+        Encoding of the input files; the input format (INPUT_FORMAT) is hashed too.
+    Returns
+    -------
+    key : str
+        Hexadecimal hash
+    """
+    digest = hashlib.sha256()
+    digest.update(repr((INPUT_FORMAT, encoding)).encode('utf-8'))
+    for filename in sorted(os.listdir(data_folder)):
+        full_filename = join(data_folder, filename)
+        if isfile(full_filename):
+            with open(full_filename, 'rb') as fid:
+                digest.update(filename.encode('utf-8'))
+                digest.update(hashlib.sha256(fid.read()).digest())
+    for item in program or ():
+        if isfile(item):
+            with open(item, 'rb') as fid:
+                digest.update(hashlib.sha256(fid.read()).digest())
+        else:
+            digest.update(item.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def output_filename(input_filename):
+    """Return name of the output file of SentiStrength for an input file.
+    Examples
+    --------
+    >>> output_filename('texts.txt')
+    'texts0_out.txt'
+    """
+    return splitext(input_filename)[0] + '0_out.txt'
+
+
+def parse_output(lines, mode):
+    """Return ratings of the lines of a SentiStrength output file.
+    Parameters
+    ----------
+    lines : list of str
+        Lines of the output file, with or without the header line.
+    mode : str
+        Mode of the run, see MODES.
+    Returns
+    -------
+    ratings : list of (int, int, int)
+        Positive strength, negative strength and value of each text.
+        The value of the 'dual' mode is positive + negative.
+    """
+    columns = (0, 1, 2)
+    if lines and not lines[0].split('\t')[0].strip().lstrip('-').isdigit():
+        header = [cell.strip().lower() for cell in lines[0].split('\t')]
+        value = next((header.index(name) for name in VALUE_COLUMNS if name in header), 2)
+        columns = (header.index('positive'), header.index('negative'), value)
+        lines = lines[1:]
+    ratings = []
+    for line in lines:
+        cells = line.split('\t')
+        positive, negative = int(cells[columns[0]]), int(cells[columns[1]])
+        value = positive + negative if mode == 'dual' else int(cells[columns[2]])
+        ratings.append((positive, negative, value))
+    return ratings
+
+
+class ResultCache(object):
+    """SQLite cache of SentiStrength ratings."""
+
+    def __init__(self, filename=None):
+        """Open cache database.
+        Parameters
+        ----------
+        filename : str, optional
+            Database file, default is 'results.sqlite' in the cache folder.
+        """
+        if filename is None:
+            os.makedirs(SentiStrength_cache.cache_dir(), exist_ok=True)
+            filename = join(SentiStrength_cache.cache_dir(), 'results.sqlite')
+        self.filename = filename
+        self.connection = sqlite3.connect(filename)
+        with self.connection:
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS ratings (text TEXT, mode TEXT, tables TEXT, '
+                'positive INTEGER, negative INTEGER, value INTEGER, '
+                'PRIMARY KEY (text, mode, tables)) WITHOUT ROWID')
+
+    def get_many(self, texts, mode, tables):
+        """Return cached ratings of normalized texts.
+        Parameters
+        ----------
+        texts : list of str
+            Normalized texts.
+        mode : str
+            Mode of the ratings.
+        tables : str
+            Table hash, see tables_hash.
+        Returns
+        -------
+        ratings : dict
+            (positive, negative, value) keyed by the cached texts
+        """
+        ratings = {}
+        for start in range(0, len(texts), _QUERY_SIZE):
+            chunk = texts[start:start + _QUERY_SIZE]
+            rows = self.connection.execute(
+                'SELECT text, positive, negative, value FROM ratings '
+                'WHERE mode = ? AND tables = ? AND text IN (%s)' % ','.join('?' * len(chunk)),
+                [mode, tables] + list(chunk))
+            for text, positive, negative, value in rows:
+                ratings[text] = (positive, negative, value)
+        return ratings
+
+    def put_many(self, ratings, mode, tables):
+        """Store ratings of normalized texts.
+        Parameters
+        ----------
+        ratings : dict
+            (positive, negative, value) keyed by normalized texts.
+        mode : str
+            Mode of the ratings.
+        tables : str
+            Table hash, see tables_hash.
+        """
+        with self.connection:
+            self.connection.executemany(
+                'INSERT OR REPLACE INTO ratings VALUES (?, ?, ?, ?, ?, ?)',
+                [(text, mode, tables) + tuple(int(item) for item in rating)
+                 for text, rating in ratings.items()])
+
+    def __len__(self):
+        return self.connection.execute('SELECT COUNT(*) FROM ratings').fetchone()[0]
+
+    def clear(self):
+        """Remove all cached ratings."""
+        with self.connection:
+            self.connection.execute('DELETE FROM ratings')
+
+    def close(self):
+        self.connection.close()
+
+
+class SentiStrengthRunner(object):
+    """Scoring of text collections with SentiStrength in file mode."""
+
+    def __init__(self, jar='SentiStrengthCom.jar', data_folder=DATA_FOLDER, command=None,
+                 encoding='utf-8', cache=True):
+        """Setup runner.
+        Parameters
+        ----------
+        jar : str, optional
+            Path of the SentiStrength jar file.
+        data_folder : str, optional
+            Folder of the SentiStrength lexicons, default is the Finnish_SentiStrength folder.
+        command : list of str, optional
+            Program run instead of 'java -jar <jar>', with the SentiStrength arguments
+            'sentidata <data_folder> input <file> [mode]'.
+        encoding : str, optional
+            Encoding of the input and output files.
+        cache : bool, str or ResultCache, optional
+            Cache of ratings: True for the default database, a database filename,
+            a ResultCache, or False for no cache.
+        """
+        if command is None:
+            command = ['java', '-jar', jar]
+        self.command = list(command)
+        # SentiStrength joins file names to the data folder without a separator
+        self.data_folder = os.path.join(data_folder, '')
+        self.encoding = encoding
+        if cache is True:
+            cache = ResultCache()
+        elif isinstance(cache, str):
+            cache = ResultCache(cache)
+        self.cache = cache if isinstance(cache, ResultCache) else None
+        self.tables = tables_hash(data_folder, self.command, encoding)
+
+    def args(self, input_filename, mode):
+        """Return command line of a file-mode run."""
+        args = self.command + ['sentidata', self.data_folder, 'input', input_filename]
+        if mode != 'dual':
+            args.append(mode)
+        return args
+
+    def run(self, texts, mode='dual'):
+        """Rate normalized texts with one SentiStrength run.
+        Parameters
+        ----------
+        texts : list of str
+            Normalized texts, see normalize_text.
+        mode : 'dual', 'binary', 'trinary' or 'scale', optional
+            SentiStrength mode, see MODES of SentiStrength_pool.py.
+        Returns
+        -------
+        ratings : list of (int, int, int)
+            Positive strength, negative strength and value of each text
+        """
+        if mode not in MODES:
+            raise ValueError('mode must be one of %s' % (MODES,))
+        if not texts:
+            return []
+        with tempfile.TemporaryDirectory() as directory:
+            input_filename = join(directory, 'texts.txt')
+            with open(input_filename, 'w', encoding=self.encoding, newline='\n') as fid:
+                # As sent to the stdin mode; an empty text is '+', rated as neutral
+                fid.writelines(to_line(text) + '\n' for text in texts)
+            process = subprocess.run(self.args(input_filename, mode), stdout=subprocess.PIPE,
+                                     stderr=subprocess.PIPE)
+            filename = output_filename(input_filename)
+            if process.returncode or not exists(filename):
+                raise RuntimeError('SentiStrength run failed (exit code %s): %s' % (
+                    process.returncode,
+                    process.stderr.decode(self.encoding, 'replace').strip() or 'no output file'))
+            with open(filename, encoding=self.encoding, errors='replace') as fid:
+                lines = [line.rstrip('\r\n') for line in fid if line.strip()]
+        ratings = parse_output(lines, mode)
+        if len(ratings) != len(texts):
+            raise RuntimeError('SentiStrength rated %d of %d texts' % (len(ratings), len(texts)))
+        return ratings
+
+    def rate_many(self, texts, mode='dual'):
+        """Rate many texts, only the texts missing from the cache are run.
+        Parameters
+        ----------
+        texts : iterable of str
+            Texts, e.g. a list or a pandas Series.
+        mode : 'dual', 'binary', 'trinary' or 'scale', optional
+            SentiStrength mode.
+        Returns
+        -------
+        ratings : Ratings
+            Positive strengths, negative strengths and values of the mode
+            as NumPy int arrays in the order of the texts
+        """
+        texts = [normalize_text(text) for text in texts]
+        unique = list(dict.fromkeys(texts))
+        ratings = self.cache.get_many(unique, mode, self.tables) \
+            if self.cache is not None else {}
+        pending = [text for text in unique if text not in ratings]
+        if pending:
+            new = dict(zip(pending, self.run(pending, mode)))
+            if self.cache is not None:
+                self.cache.put_many(new, mode, self.tables)
+            ratings.update(new)
+        values = np.array([ratings[text] for text in texts], dtype=int).reshape(-1, 3)
+        return Ratings(values[:, 0], values[:, 1], values[:, 2])
+
+    def rate_all(self, texts, modes=REPORT_MODES):
+        """Rate many texts in many modes.
+        Parameters
+        ----------
+        texts : iterable of str
+            Texts.
+        modes : list of str, optional
+            SentiStrength modes, default is binary, trinary and scale.
+        Returns
+        -------
+        ratings : dict
+            Ratings keyed by mode
+        """
+        texts = list(texts)
+        return dict((mode, self.rate_many(texts, mode)) for mode in modes)
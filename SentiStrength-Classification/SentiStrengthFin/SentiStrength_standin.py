@@ -0,0 +1,67 @@
+"""Stand-in process for the stdin and file modes of SentiStrength."""
+
+from __future__ import absolute_import, division, print_function
+
+"""
+# ------------------------------------------------------------------------------------------------
+
+A small Python program with the command line and the line protocol of the stdin mode of
+SentiStrength, for running SentiStrengthPool (SentiStrength_pool.py) without Java:
+
+    python -m SentiStrengthFin.SentiStrength_standin stdin sentidata Finnish_SentiStrength/ binary
+
+Each input line ('+' for spaces) is rated with SentiStrengthEngine (SentiStrength_engine.py)
+as the jar reads it, and one line '<positive>\t<negative>[\t<value>]' is written and
+flushed per input line.
+
+In file mode ('input <file>', for SentiStrengthRunner of SentiStrength_runner.py) each line
+of the file is rated, and the output file '<file>0_out.txt' has a header line and one line
+'<positive>\t<negative>[\t<value>]\t<text>' per input line; the lines are rated as
+written (plus_spaces=False of SentiStrengthEngine), SentiStrengthRunner writes them with
+'+' for spaces.
+
+# ------------------------------------------------------------------------------------------------
+"""
+
+import sys
+from os.path import splitext
+
+from .SentiStrength_engine import SentiStrengthEngine
+from .SentiStrength_pool import DATA_FOLDER
+
+
+def rating_line(rating, mode):
+    """Return output line of a rating in a SentiStrength mode."""
+    if mode == 'dual':
+        return '%d\t%d' % rating[:2]
+    return '%d\t%d\t%d' % rating
+
+
+def main(argv=None):
+    args = list(sys.argv[1:] if argv is None else argv)
+    data_folder = args[args.index('sentidata') + 1] if 'sentidata' in args else DATA_FOLDER
+    mode = next((arg for arg in args if arg in ('binary', 'trinary', 'scale')), 'dual')
+    engine = SentiStrengthEngine(data_folder, plus_spaces='input' not in args)
+
+    if 'input' in args:
+        filename = args[args.index('input') + 1]
+        header = 'Positive\tNegative\tText' if mode == 'dual' else \
+            'Positive\tNegative\tOverall\tText'
+        with open(filename, encoding='utf-8', errors='replace') as fid:
+            texts = [line.rstrip('\r\n') for line in fid]
+        with open(splitext(filename)[0] + '0_out.txt', 'w', encoding='utf-8') as fid:
+            fid.write(header + '\n')
+            for text in texts:
+                fid.write('%s\t%s\n' % (rating_line(engine.rate(text, mode), mode), text))
+        return
+
+    stdin = sys.stdin.buffer
+    stdout = sys.stdout.buffer
+    for line in iter(stdin.readline, b''):
+        text = line.decode('utf-8', 'replace').strip()
+        stdout.write((rating_line(engine.rate(text, mode), mode) + '\n').encode('utf-8'))
+        stdout.flush()
+
+
+if __name__ == '__main__':
+    main()